@@ -1,13 +1,38 @@
 import os
-from flask import Flask, jsonify, send_from_directory
+from functools import wraps
+import click
+from flask import Flask, Response, current_app, jsonify, send_from_directory
 from flask_cors import CORS
-from flask_jwt_extended import JWTManager
+from flask_jwt_extended import JWTManager, verify_jwt_in_request
 from dotenv import load_dotenv
-from .config import Config
+from .config import Config, env_settings
 from .models import db
+from .database import configure_database
+from .instrumentation import init_instrumentation, render_metrics, PROMETHEUS_CONTENT_TYPE
+from .schema import upgrade_schema, explain_hot_queries
 from .auth import bp as auth_bp
 from .routes.tasks import bp as tasks_bp
 from .services.reminder import start_reminder_worker
+from .services.scoring import start_scoring_worker, get_scoring_queue
+from .services.gemini_client import get_gemini_client
+from .services.score_cache import get_score_cache
+from .services.search import rebuild_search_index, search_available
+from .services.local_model import train_from_history
+from .services.email import get_mail_dispatcher
+from .services.export_jobs import init_export_jobs
+from .services.outbox import start_outbox_worker, outbox_stats, retry_dead_messages
+from .services.stats import init_stats_counters, verify_counters, rebuild_counters
+from .services.response_cache import init_response_cache, get_response_cache
+
+
+def ops_endpoint(view):
+    """Stats and metrics endpoints: they expose server-wide data, so a JWT is required unless METRICS_PUBLIC is set."""
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        if not current_app.config.get('METRICS_PUBLIC'):
+            verify_jwt_in_request()
+        return view(*args, **kwargs)
+    return wrapper
 
 
 def create_app():
@@ -17,19 +42,115 @@ def create_app():
     if os.path.exists(env_path):
         load_dotenv(env_path)
     app.config.from_object(Config)
-    CORS(app)
+    app.config.update(env_settings())
+    configure_database(app)
+    CORS(app, expose_headers=['X-Next-Cursor', 'ETag'])
     db.init_app(app)
     JWTManager(app)
+    init_instrumentation(app)
 
     with app.app_context():
-        db.create_all()
+        # create_all plus missing columns/indexes for databases from older versions
+        upgrade_schema()
         # Start reminder worker (idempotent)
         start_reminder_worker(app)
+        start_scoring_worker(app)
+        start_outbox_worker(app)
+    init_export_jobs(app)
+    init_stats_counters(app)
+    init_response_cache(app)
 
     @app.get('/api/health')
     def health():
         return jsonify({'status': 'ok'})
 
+    @app.get('/api/scoring/stats')
+    @ops_endpoint
+    def scoring_stats():
+        q = get_scoring_queue(app)
+        client = get_gemini_client()
+        return jsonify({'queue': q.stats() if q else {}, 'cache': get_score_cache().stats(),
+                        'gemini': client.stats() if client else {}})
+
+    @app.get('/api/mail/stats')
+    @ops_endpoint
+    def mail_stats():
+        return jsonify({'dispatcher': get_mail_dispatcher().stats(), 'outbox': outbox_stats()})
+
+    @app.get('/api/cache/stats')
+    @ops_endpoint
+    def cache_stats():
+        cache = get_response_cache(app)
+        return jsonify({'responses': cache.stats() if cache else {}})
+
+    @app.get('/api/metrics')
+    @ops_endpoint
+    def metrics():
+        return Response(render_metrics(), content_type=PROMETHEUS_CONTENT_TYPE)
+
+    @app.cli.command('outbox-retry-dead')
+    def outbox_retry_dead():
+        """Requeue dead-lettered outbox emails."""
+        n = retry_dead_messages()
+        db.session.commit()
+        print(f'Requeued {n} message(s).')
+
+    @app.cli.command('train-priority-model')
+    def train_priority_model():
+        """Fit the local priority model on stored task history."""
+        model = train_from_history()
+        if model is None:
+            print('Not enough Gemini-scored tasks to train on yet.')
+        else:
+            print(f'Trained local priority model on {model.trained_on} tasks.')
+
+    @app.cli.command('upgrade-db')
+    def upgrade_db():
+        """Add missing columns and indexes to an existing database."""
+        changes = upgrade_schema()
+        print(f"columns added: {changes['columns'] or 'none'}")
+        print(f"indexes created: {changes['indexes'] or 'none'}")
+        if changes['search_index']:
+            print('search index created')
+
+    @app.cli.command('rebuild-search-index')
+    def rebuild_search_index_command():
+        """Refill the task full-text search index from the task and subtask tables."""
+        if not search_available():
+            print('Full-text search is not available on this database.')
+            return
+        with db.engine.begin() as conn:
+            rebuild_search_index(conn)
+        print('Search index rebuilt.')
+
+    @app.cli.command('explain-queries')
+    @click.option('--user-id', default=1, show_default=True)
+    def explain_queries(user_id):
+        """Show query plans for the hot queries with and without the managed indexes."""
+        labels = ('without indexes', 'with indexes')
+        before = explain_hot_queries(uid=user_id, without_indexes=True)
+        after = explain_hot_queries(uid=user_id)
+        for name in after:
+            print(f'== {name}')
+            for label, result in zip(labels, (before[name], after[name])):
+                print(f"  {label} ({result['ms']} ms):")
+                for step in result['plan']:
+                    print(f'    {step}')
+
+    @app.cli.command('check-stats-counters')
+    @click.option('--fix', is_flag=True, help='Rebuild the counters if they drifted.')
+    def check_stats_counters(fix):
+        """Compare per-user stats counters against the task table."""
+        mismatches = verify_counters()
+        for user_id, diff in mismatches.items():
+            print(f'user {user_id}: ' + ', '.join(f'{k} counter={a} actual={b}' for k, (a, b) in diff.items()))
+        if not mismatches:
+            print('Counters are consistent.')
+        elif fix:
+            rebuild_counters()
+            db.session.commit()
+            print('Counters rebuilt.')
+
     app.register_blueprint(auth_bp)
     app.register_blueprint(tasks_bp)
 
@@ -49,7 +170,8 @@ def create_app():
         return send_from_directory(front_dir, 'index.html')
     return app
 
-app = create_app()
 
+# No module-level app: importing this module has no side effects. `flask --app backend.app`
+# and gunicorn "backend.app:create_app()" call the factory.
 if __name__ == '__main__':
-    app.run(host='0.0.0.0', port=5000, debug=True)
+    create_app().run(host='0.0.0.0', port=5000, debug=True)
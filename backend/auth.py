@@ -1,6 +1,7 @@
-from flask import Blueprint, request, jsonify
-from flask_jwt_extended import create_access_token
+from flask import Blueprint, request, jsonify, current_app
+from flask_jwt_extended import create_access_token, get_jwt_identity, jwt_required
 from .models import db, User
+from .services.users import get_user_cache
 
 bp = Blueprint('auth', __name__, url_prefix='/api/auth')
 
@@ -14,7 +15,7 @@ def register():
     if User.query.filter_by(email=email).first():
         return jsonify({'message': 'email already registered'}), 400
     user = User(email=email)
-    user.set_password(password)
+    user.set_password(password, current_app.config.get('PASSWORD_HASH_METHOD'))
     db.session.add(user)
     db.session.commit()
     return jsonify({'message': 'registered'}), 201
@@ -27,5 +28,34 @@ def login():
     user = User.query.filter_by(email=email).first()
     if not user or not user.check_password(password):
         return jsonify({'message': 'invalid credentials'}), 401
+    method = current_app.config.get('PASSWORD_HASH_METHOD')
+    if method and user.needs_rehash(method):
+        # The password is known right now, so move the hash to the configured parameters
+        user.set_password(password, method)
+        db.session.commit()
     token = create_access_token(identity=str(user.id))
     return jsonify({'access_token': token})
+
+@bp.get('/preferences')
+@jwt_required()
+def get_preferences():
+    user = db.session.get(User, int(get_jwt_identity()))
+    if not user:
+        return jsonify({'message': 'user not found'}), 404
+    return jsonify({'reminder_digest': user.reminder_digest})
+
+@bp.patch('/preferences')
+@jwt_required()
+def update_preferences():
+    user = db.session.get(User, int(get_jwt_identity()))
+    if not user:
+        return jsonify({'message': 'user not found'}), 404
+    data = request.get_json() or {}
+    if 'reminder_digest' in data:
+        if not isinstance(data['reminder_digest'], bool):
+            return jsonify({'message': 'reminder_digest must be true or false'}), 400
+        user.reminder_digest = data['reminder_digest']
+    db.session.commit()
+    # Other processes pick the change up when their cached copy expires (USER_CACHE_TTL)
+    get_user_cache().invalidate(user.id)
+    return jsonify({'reminder_digest': user.reminder_digest})
@@ -0,0 +1 @@
+"""Benchmark and load-test harness. Run ``python -m backend.bench --help``."""
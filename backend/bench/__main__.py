@@ -0,0 +1,147 @@
+"""
+Seeds a throwaway database, runs the benchmark suites against the app with Gemini
+and SMTP stubbed out, prints a report and optionally saves/compares JSON baselines:
+
+    python -m backend.bench --save bench-results/baseline.json
+    python -m backend.bench --compare bench-results/baseline.json   # exit code 1 on regression
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+SUITES = ('startup', 'inprocess', 'http', 'micro')
+
+
+def parse_args(argv=None):
+    p = argparse.ArgumentParser(prog='python -m backend.bench', description=__doc__,
+                                formatter_class=argparse.RawDescriptionHelpFormatter)
+    p.add_argument('--suites', default=','.join(SUITES), help=f'comma separated subset of {", ".join(SUITES)}')
+    p.add_argument('--users', type=int, default=5)
+    p.add_argument('--tasks', type=int, default=1000, help='tasks per user')
+    p.add_argument('--subtasks', type=int, default=2, help='subtasks per task')
+    p.add_argument('--logs', type=int, default=1, help='progress logs per task')
+    p.add_argument('--seed', type=int, default=42)
+    p.add_argument('--iterations', type=int, default=50, help='calls per endpoint in the in-process suite')
+    p.add_argument('--threads', type=int, default=8, help='client threads for the HTTP load suite')
+    p.add_argument('--duration', type=float, default=10.0, help='seconds of HTTP load')
+    p.add_argument('--export-rows', type=int, default=100_000, help='rows for the export micro-benchmark')
+    p.add_argument('--reminder-processes', type=int, default=4,
+                   help='app processes sharing one database in the reminder check (0 skips it)')
+    p.add_argument('--scorer', choices=('gemini', 'local'), default='gemini')
+    p.add_argument('--gemini-latency-ms', type=float, default=0.0, help='simulated model latency')
+    p.add_argument('--gemini-server', action='store_true',
+                   help='score through the real Gemini client against a local fake model server')
+    p.add_argument('--smtp-latency-ms', type=float, default=0.0, help='simulated SMTP send latency')
+    p.add_argument('--db', help='SQLite file to use (default: a new temp file)')
+    p.add_argument('--save', metavar='PATH', help='write results as JSON')
+    p.add_argument('--compare', metavar='PATH', help='baseline JSON; exit 1 on regression')
+    p.add_argument('--tolerance', type=float, default=0.25, help='allowed relative slowdown (default 0.25)')
+    return p.parse_args(argv)
+
+
+def _print_section(title, results):
+    print(f'\n== {title}')
+    for name, r in results.items():
+        if 'p50_ms' in r:
+            print(f"  {name:<28} n={r['count']:<6} err={r['errors']:<4} p50={r['p50_ms']:>9.2f}ms "
+                  f"p95={r['p95_ms']:>9.2f}ms p99={r['p99_ms']:>9.2f}ms {r['throughput_rps']:>9.1f}/s")
+        else:
+            print(f'  {name:<28} ' + ' '.join(f'{k}={v}' for k, v in r.items()))
+
+
+def _prepare_environment(args):
+    # Everything read from the environment must be in place before the app is imported
+    db_path = args.db or os.path.join(tempfile.mkdtemp(prefix='taskgenius-bench-'), 'bench.db')
+    if not args.db and os.path.exists(db_path):
+        os.remove(db_path)
+    os.environ['DATABASE_URL'] = f'sqlite:///{db_path}'
+    os.environ['PRIORITY_SCORER'] = args.scorer
+    os.environ.setdefault('GEMINI_API_KEY', 'bench')
+    os.environ['MAIL_FROM_EMAIL'] = 'bench@example.com'
+    os.environ['SMTP_STARTTLS'] = 'false'
+    os.environ['PROFILE_SAMPLE_RATE'] = '0'
+    return db_path
+
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+    suites = [s.strip() for s in args.suites.split(',') if s.strip()]
+    unknown = set(suites) - set(SUITES)
+    if unknown:
+        print(f'unknown suite(s): {", ".join(sorted(unknown))}', file=sys.stderr)
+        return 2
+    db_path = _prepare_environment(args)
+    results = {}
+    if 'startup' in suites:
+        # Fresh interpreters, so it runs before this process imports the app
+        from .startup import bench_startup
+        results['startup'] = bench_startup()
+        _print_section('startup (fresh interpreter per run)', results['startup'])
+
+    from flask_jwt_extended import create_access_token
+    from .stubs import install_stubs
+    install_stubs(args.gemini_latency_ms, args.smtp_latency_ms, gemini_server=args.gemini_server)
+    from ..app import create_app
+    from ..models import db, User
+    from ..services.stats import counters_enabled, rebuild_counters
+    from . import micro
+    from .baseline import compare, load_results, save_results
+    from .reminders import bench_reminder_workers
+    from .runner import Credentials, LoadGenerator, default_scenarios, run_inprocess
+    from .seed import BENCH_PASSWORD, seed_database
+
+    app = create_app()
+    with app.app_context():
+        start = time.perf_counter()
+        user_ids = seed_database(args.users, args.tasks, args.subtasks, args.logs, seed=args.seed,
+                                 hash_method=app.config.get('PASSWORD_HASH_METHOD'))
+        if counters_enabled(app):
+            rebuild_counters()
+            db.session.commit()
+        print(f'seeded {len(user_ids)} users x {args.tasks} tasks into {db_path} '
+              f'in {time.perf_counter() - start:.1f}s')
+        emails = [db.session.get(User, uid).email for uid in user_ids]
+        creds = Credentials(emails, [create_access_token(identity=str(uid)) for uid in user_ids], BENCH_PASSWORD)
+
+    scenarios = default_scenarios()
+    if 'inprocess' in suites:
+        results['inprocess'] = run_inprocess(app, scenarios, creds, iterations=args.iterations, seed=args.seed)
+        _print_section('in-process (test client)', results['inprocess'])
+    if 'http' in suites:
+        gen = LoadGenerator(app, scenarios, creds, threads=args.threads, duration=args.duration, seed=args.seed)
+        results['http'] = gen.run()
+        _print_section(f'HTTP load ({args.threads} threads, {args.duration:g}s)', results['http'])
+    if 'micro' in suites:
+        with app.app_context():
+            section = {}
+            section.update(micro.bench_parse())
+            section.update(micro.bench_password_hash(app.config.get('PASSWORD_HASH_METHOD')))
+            section.update(micro.bench_index_plans(user_ids[0]))
+            # Separate user so the export rows do not skew the endpoint suites of a reused db
+            export_uid = seed_database(1, 0, seed=args.seed + 1)[0]
+            section.update(micro.bench_export(export_uid, args.export_rows))
+        section.update(micro.bench_concurrency(app, creds))
+        if args.reminder_processes:
+            section.update(bench_reminder_workers(args.reminder_processes, smtp_latency_ms=args.smtp_latency_ms))
+        results['micro'] = section
+        _print_section('micro-benchmarks', section)
+
+    options = {k: v for k, v in vars(args).items() if k not in ('save', 'compare', 'db')}
+    if args.save:
+        save_results(args.save, results, options)
+        print(f'\nsaved {args.save}')
+    if args.compare:
+        problems = compare(results, load_results(args.compare)['results'], args.tolerance)
+        if problems:
+            print(f'\n{len(problems)} regression(s) against {args.compare}:')
+            for line in problems:
+                print(f'  {line}')
+            return 1
+        print(f'\nno regressions against {args.compare} (tolerance {args.tolerance:.0%})')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
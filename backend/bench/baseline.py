@@ -0,0 +1,71 @@
+import json
+import os
+import platform
+import sys
+from datetime import datetime
+from typing import Any, Dict, List
+
+# metric -> True if bigger is worse
+LOWER_IS_BETTER = {'p50_ms': True, 'p95_ms': True, 'seconds': True, 'ms': True, 'throughput_rps': False,
+                   'rows_per_sec': False, 'import_ms': True, 'create_app_ms': True, 'rss_mb': True}
+# Timings can only regress by at least this much; sub-millisecond jitter is not a regression
+MIN_DELTA_MS = 2.0
+# Flags that must not flip from False to True (e.g. a query plan starting to sort)
+FLAGS = ('temp_sort', 'full_scan', 'heavy_imports')
+
+
+def save_results(path: str, results: Dict[str, Any], options: Dict[str, Any]):
+    doc = {
+        'meta': {
+            'created_at': datetime.now().isoformat(timespec='seconds'),
+            'python': sys.version.split()[0],
+            'platform': platform.platform(),
+            'cpus': os.cpu_count(),
+            'options': options,
+        },
+        'results': results,
+    }
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(doc, f, indent=2, sort_keys=True)
+
+
+def load_results(path: str) -> Dict[str, Any]:
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def _delta_counts(metric: str, before: float, after: float) -> bool:
+    if metric.endswith('ms') or metric == 'seconds':
+        ms = (after - before) * (1000 if metric == 'seconds' else 1)
+        return abs(ms) >= MIN_DELTA_MS
+    return True
+
+
+def compare(current: Dict[str, Any], baseline: Dict[str, Any], tolerance: float = 0.25) -> List[str]:
+    """
+    Regressions of `current` against `baseline` (both {section: {name: metrics}}), as
+    readable lines. A metric regresses when it is more than `tolerance` worse; error
+    counts and plan flags regress on any increase. Entries missing on either side are skipped.
+    """
+    problems = []
+    for section, entries in baseline.items():
+        for name, base in entries.items():
+            cur = current.get(section, {}).get(name)
+            if not isinstance(base, dict) or not isinstance(cur, dict):
+                continue
+            label = f'{section}.{name}'
+            for metric, higher_is_worse in LOWER_IS_BETTER.items():
+                if metric not in base or metric not in cur or not base[metric]:
+                    continue
+                before, after = float(base[metric]), float(cur[metric])
+                change = (after - before) / before
+                worse = change > tolerance if higher_is_worse else change < -tolerance
+                if worse and _delta_counts(metric, before, after):
+                    problems.append(f'{label}: {metric} {before:g} -> {after:g} ({change:+.0%})')
+            if cur.get('errors', 0) > base.get('errors', 0):
+                problems.append(f"{label}: errors {base.get('errors', 0)} -> {cur['errors']}")
+            for flag in FLAGS:
+                if cur.get(flag) and not base.get(flag):
+                    problems.append(f'{label}: {flag} became true')
+    return problems
@@ -0,0 +1,128 @@
+import random
+import threading
+import time
+from typing import Any, Dict
+from werkzeug.security import check_password_hash, generate_password_hash
+from ..models import db, Task
+from ..schema import explain_hot_queries
+from ..services import nlp
+from ..services.export_jobs import EXPORT_FORMATS, export_rows
+from .runner import PARSE_TEXTS, summarize
+from .seed import BENCH_PASSWORD, seed_tasks
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+
+def _timed_calls(fn, iterations: int):
+    latencies = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        fn()
+        latencies.append(time.perf_counter() - start)
+    return latencies
+
+
+def bench_parse(iterations: int = 200) -> Dict[str, Any]:
+    """parse_task_text on a cold cache (every call parses) and on a warm one."""
+    texts = [f'{t} #{i}' for i, t in enumerate(PARSE_TEXTS * (iterations // len(PARSE_TEXTS) + 1))][:iterations]
+    nlp._parse_cache.clear()
+    it = iter(texts)
+    cold = _timed_calls(lambda: nlp.parse_task_text(next(it)), iterations)
+    it = iter(texts)
+    warm = _timed_calls(lambda: nlp.parse_task_text(next(it)), iterations)
+    return {'parse_cold': summarize(cold), 'parse_warm': summarize(warm)}
+
+
+def bench_password_hash(method: str = None, iterations: int = 20) -> Dict[str, Any]:
+    """Cost of one login's password check with the configured hash parameters."""
+    stored = generate_password_hash(BENCH_PASSWORD, method=method) if method else generate_password_hash(BENCH_PASSWORD)
+    result = summarize(_timed_calls(lambda: check_password_hash(stored, BENCH_PASSWORD), iterations))
+    result['method'] = stored.split('$', 1)[0]
+    return {'password_check': result}
+
+
+def _peak_rss_mb() -> float:
+    if resource is None:
+        return 0.0
+    # ru_maxrss is KiB on Linux
+    return round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)
+
+
+def bench_export(uid: int, rows: int, formats=('csv', 'ndjson'), seed: int = 7) -> Dict[str, Any]:
+    """
+    Streams `rows` tasks of one user through each exporter into a byte counter. Peak
+    RSS is process-wide, so only its growth across the run is meaningful.
+    """
+    have = db.session.query(db.func.count(Task.id)).filter(Task.user_id == uid).scalar()
+    if have < rows:
+        seed_tasks(uid, rows - have, 0, 0, random.Random(seed))
+        db.session.commit()
+    results = {}
+    for fmt in formats:
+        writer = EXPORT_FORMATS[fmt][0]
+        rss_before = _peak_rss_mb()
+        start = time.perf_counter()
+        size = 0
+        for chunk in writer(export_rows(uid)):
+            size += len(chunk)
+        elapsed = time.perf_counter() - start
+        results[f'export_{fmt}'] = {
+            'rows': rows,
+            'seconds': round(elapsed, 3),
+            'rows_per_sec': round(rows / elapsed, 1) if elapsed else 0.0,
+            'bytes': size,
+            'peak_rss_growth_mb': round(_peak_rss_mb() - rss_before, 1),
+        }
+    return results
+
+
+def bench_index_plans(uid: int) -> Dict[str, Any]:
+    """Hot query timings with and without the managed indexes, and whether SQLite had to sort."""
+    if db.engine.dialect.name != 'sqlite':
+        return {}
+    out = {}
+    for label, without in (('with_indexes', False), ('without_indexes', True)):
+        for name, result in explain_hot_queries(uid=uid, without_indexes=without).items():
+            out[f'plan_{name}_{label}'] = {
+                'ms': result['ms'],
+                'temp_sort': any('TEMP B-TREE' in step for step in result['plan']),
+                'full_scan': any(step.startswith('SCAN') and 'USING' not in step for step in result['plan']),
+            }
+    return out
+
+
+def bench_concurrency(app, creds, writers: int = 4, readers: int = 4, requests_each: int = 50) -> Dict[str, Any]:
+    """Concurrent writers and readers through the test client; any 5xx counts as a lock error."""
+    lock = threading.Lock()
+    latencies = {'write': [], 'read': []}
+    errors = {'write': 0, 'read': 0}
+
+    def run(kind: str, n: int):
+        client = app.test_client()
+        rng = random.Random(n)
+        for i in range(requests_each):
+            _, token = creds.pick(rng)
+            headers = {'Authorization': f'Bearer {token}'}
+            start = time.perf_counter()
+            if kind == 'write':
+                resp = client.post('/api/tasks', json={'title': f'concurrent {n}-{i}'}, headers=headers)
+            else:
+                resp = client.get('/api/tasks?limit=50', headers=headers)
+            elapsed = time.perf_counter() - start
+            with lock:
+                latencies[kind].append(elapsed)
+                if resp.status_code >= 500:
+                    errors[kind] += 1
+
+    threads = [threading.Thread(target=run, args=('write', n)) for n in range(writers)]
+    threads += [threading.Thread(target=run, args=('read', 100 + n)) for n in range(readers)]
+    start = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    wall = time.perf_counter() - start
+    return {f'concurrent_{kind}': summarize(latencies[kind], errors[kind], wall) for kind in latencies}
@@ -0,0 +1,98 @@
+import multiprocessing
+import os
+import re
+import shutil
+import tempfile
+import time
+from collections import Counter
+from datetime import datetime, timedelta
+from typing import Any, Dict
+from sqlalchemy import create_engine, func, insert
+
+_TITLE_RE = re.compile(r'^Title: (bench reminder \d+)$', re.M)
+
+
+def _worker(db_url: str, smtp_latency_ms: float, ready, results, timeout: float):
+    # Runs in a spawned interpreter: a whole app process, as one gunicorn worker would be
+    os.environ['DATABASE_URL'] = db_url
+    from .stubs import FakeSMTP, install_stubs
+    install_stubs(smtp_latency_ms=smtp_latency_ms)
+    from ..app import create_app
+    from ..models import db, Task
+    app = create_app()
+    ready.put(os.getpid())
+    deadline = time.monotonic() + timeout
+    with app.app_context():
+        while time.monotonic() < deadline:
+            left = db.session.query(func.count(Task.id)).filter(Task.reminder_date.isnot(None)).scalar()
+            db.session.rollback()
+            if not left:
+                break
+            time.sleep(0.1)
+    results.put((os.getpid(), [_TITLE_RE.findall(body) for body in FakeSMTP.messages]))
+
+
+def _seed(db_url: str, reminders: int, users: int, due: datetime):
+    from ..models import User, Task
+    from ..schema import upgrade_schema
+    engine = create_engine(db_url)
+    upgrade_schema(engine)
+    with engine.begin() as conn:
+        uids = list(conn.scalars(insert(User).returning(User.id, sort_by_parameter_order=True), [
+            {'email': f'reminders{i}@example.com', 'password_hash': '-', 'created_at': datetime.now()}
+            for i in range(users)]))
+        # Spread over a minute, so digests have to coalesce reminders due at different times
+        conn.execute(insert(Task), [{'user_id': uids[i % users], 'title': f'bench reminder {i}', 'status': 'pending',
+                                     'priority': 'medium', 'priority_score': 0.0,
+                                     'reminder_date': due + timedelta(seconds=(i // users) % 60)}
+                                    for i in range(reminders)])
+    engine.dispose()
+
+
+def bench_reminder_workers(processes: int = 4, reminders: int = 1000, users: int = 50,
+                           smtp_latency_ms: float = 2.0, start_after: float = 8.0,
+                           timeout: float = 120.0) -> Dict[str, Any]:
+    """
+    Starts `processes` app processes against one fresh SQLite database holding
+    `reminders` reminders of `users` users that start falling due `start_after` seconds
+    later, then checks every reminder went out exactly once, how many emails that took
+    and how the sends were spread over the processes.
+    """
+    tmp_dir = tempfile.mkdtemp(prefix='taskgenius-reminders-')
+    db_url = f"sqlite:///{os.path.join(tmp_dir, 'reminders.db')}"
+    due = datetime.now() + timedelta(seconds=start_after)
+    _seed(db_url, reminders, users, due)
+    ctx = multiprocessing.get_context('spawn')
+    ready, results = ctx.Queue(), ctx.Queue()
+    procs = [ctx.Process(target=_worker, args=(db_url, smtp_latency_ms, ready, results, timeout), daemon=True)
+             for _ in range(processes)]
+    for p in procs:
+        p.start()
+    for _ in range(processes):
+        ready.get(timeout=timeout)
+    # With a late process the others split the work between them; still correct, less spread
+    all_ready = datetime.now() < due
+    sent: Dict[int, list] = dict(results.get(timeout=timeout + start_after) for _ in range(processes))
+    finished = datetime.now()
+    for p in procs:
+        p.join(timeout=10)
+        if p.is_alive():
+            p.terminate()
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+
+    counts = Counter(title for emails in sent.values() for titles in emails for title in titles)
+    duplicates = sum(n - 1 for n in counts.values())
+    missing = reminders - len(counts)
+    return {'reminder_workers': {
+        'processes': processes,
+        'all_ready_before_due': all_ready,
+        'reminders': reminders,
+        'sent': sum(counts.values()),
+        'emails': sum(len(emails) for emails in sent.values()),
+        'duplicates': duplicates,
+        'missing': missing,
+        'errors': duplicates + missing,
+        'seconds': round(max(0.0, (finished - due).total_seconds()), 3),
+        'per_process': ','.join(str(n) for n in sorted((sum(map(len, emails)) for emails in sent.values()),
+                                                          reverse=True)),
+    }}
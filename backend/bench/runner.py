@@ -0,0 +1,193 @@
+import http.client
+import json
+import math
+import random
+import threading
+import time
+from collections import defaultdict
+from typing import Any, Callable, Dict, List, Optional, Sequence
+from werkzeug.serving import WSGIRequestHandler, make_server
+
+PARSE_TEXTS = (
+    'urgent report for the board tomorrow at 5pm 2h',
+    'call the doctor next week',
+    'study for exam on friday remind me at 9am 3 hours',
+    'groceries sometime',
+    'deploy hotfix asap',
+    'prepare meeting slides by monday 1.5h',
+)
+
+
+class _QuietHandler(WSGIRequestHandler):
+    def log_request(self, *args, **kwargs):
+        pass
+
+
+class Scenario:
+    """One endpoint call. `body(rng)` builds the JSON body, so requests can vary between calls."""
+
+    def __init__(self, name: str, method: str, path: str, body: Optional[Callable] = None,
+                 weight: float = 1.0, auth: bool = True):
+        self.name = name
+        self.method = method
+        self.path = path
+        self.body = body
+        self.weight = weight
+        self.auth = auth
+
+
+def default_scenarios() -> List[Scenario]:
+    return [
+        Scenario('list_tasks_page', 'GET', '/api/tasks?limit=50', weight=4),
+        Scenario('list_tasks_full', 'GET', '/api/tasks?fields=title,status,due_date', weight=0.5),
+        Scenario('stats', 'GET', '/api/stats', weight=3),
+        Scenario('search', 'GET', '/api/tasks/search?q=review%20dep&limit=20', weight=1),
+        Scenario('parse', 'POST', '/api/parse', lambda rng: {'text': rng.choice(PARSE_TEXTS)}, weight=2),
+        Scenario('create_task', 'POST', '/api/tasks',
+                 lambda rng: {'title': f'bench task {rng.randint(0, 10 ** 9)}', 'priority': 'high',
+                              'due_date': '2031-01-01T09:00:00'}, weight=1),
+        Scenario('export_csv', 'POST', '/api/export?format=csv', weight=0.1),
+        Scenario('login', 'POST', '/api/auth/login', None, weight=0.2, auth=False),
+    ]
+
+
+def percentile(sorted_values: Sequence[float], p: float) -> float:
+    """Nearest-rank percentile of already sorted values."""
+    if not sorted_values:
+        return 0.0
+    rank = math.ceil(p / 100.0 * len(sorted_values))
+    return sorted_values[max(0, min(len(sorted_values), rank) - 1)]
+
+
+def summarize(latencies: Sequence[float], errors: int = 0, elapsed: Optional[float] = None) -> Dict[str, Any]:
+    """Latencies in seconds -> report in milliseconds; throughput needs the wall time."""
+    values = sorted(latencies)
+    total = sum(values)
+    out = {
+        'count': len(values),
+        'errors': errors,
+        'mean_ms': round(total / len(values) * 1000, 3) if values else 0.0,
+        'p50_ms': round(percentile(values, 50) * 1000, 3),
+        'p90_ms': round(percentile(values, 90) * 1000, 3),
+        'p95_ms': round(percentile(values, 95) * 1000, 3),
+        'p99_ms': round(percentile(values, 99) * 1000, 3),
+        'max_ms': round(values[-1] * 1000, 3) if values else 0.0,
+    }
+    wall = elapsed if elapsed is not None else total
+    out['throughput_rps'] = round(len(values) / wall, 2) if wall > 0 else 0.0
+    return out
+
+
+class Credentials:
+    """Bench users' emails and JWTs; scenarios pick a random user per request."""
+
+    def __init__(self, emails: List[str], tokens: List[str], password: str):
+        self.emails = emails
+        self.tokens = tokens
+        self.password = password
+
+    def pick(self, rng: random.Random):
+        i = rng.randrange(len(self.tokens))
+        return self.emails[i], self.tokens[i]
+
+
+def _request_args(scenario: Scenario, creds: Credentials, rng: random.Random):
+    email, token = creds.pick(rng)
+    headers = {'Authorization': f'Bearer {token}'} if scenario.auth else {}
+    if scenario.name == 'login':
+        body = {'email': email, 'password': creds.password}
+    else:
+        body = scenario.body(rng) if scenario.body else None
+    return headers, body
+
+
+def run_inprocess(app, scenarios: Sequence[Scenario], creds: Credentials, iterations: int = 50,
+                  warmup: int = 5, seed: int = 1) -> Dict[str, Dict[str, Any]]:
+    """Calls each scenario sequentially through the Flask test client (no network, no threads)."""
+    rng = random.Random(seed)
+    client = app.test_client()
+    results = {}
+    for scenario in scenarios:
+        latencies, errors = [], 0
+        for i in range(warmup + iterations):
+            headers, body = _request_args(scenario, creds, rng)
+            start = time.perf_counter()
+            resp = client.open(scenario.path, method=scenario.method, headers=headers, json=body)
+            resp.get_data()
+            elapsed = time.perf_counter() - start
+            if i < warmup:
+                continue
+            if resp.status_code >= 400:
+                errors += 1
+            latencies.append(elapsed)
+        results[scenario.name] = summarize(latencies, errors)
+    return results
+
+
+class LoadGenerator:
+    """
+    Serves the app on a real socket (threaded werkzeug server) and drives it from
+    `threads` client threads for `duration` seconds, each picking scenarios by weight.
+    """
+
+    def __init__(self, app, scenarios: Sequence[Scenario], creds: Credentials, threads: int = 8,
+                 duration: float = 10.0, seed: int = 1):
+        self.app = app
+        self.scenarios = list(scenarios)
+        self.creds = creds
+        self.threads = threads
+        self.duration = duration
+        self.seed = seed
+        self._lock = threading.Lock()
+        self._latencies: Dict[str, List[float]] = defaultdict(list)
+        self._errors: Dict[str, int] = defaultdict(int)
+
+    def _worker(self, port: int, n: int, deadline: float):
+        rng = random.Random(self.seed * 1000 + n)
+        weights = [s.weight for s in self.scenarios]
+        conn = http.client.HTTPConnection('127.0.0.1', port, timeout=60)
+        while time.perf_counter() < deadline:
+            scenario = rng.choices(self.scenarios, weights)[0]
+            headers, body = _request_args(scenario, self.creds, rng)
+            payload = None
+            if body is not None:
+                payload = json.dumps(body)
+                headers['Content-Type'] = 'application/json'
+            start = time.perf_counter()
+            try:
+                conn.request(scenario.method, scenario.path, body=payload, headers=headers)
+                resp = conn.getresponse()
+                resp.read()
+                ok = resp.status < 400
+                if resp.getheader('Connection', '').lower() == 'close' or resp.version == 10:
+                    conn.close()
+            except (OSError, http.client.HTTPException):
+                ok = False
+                conn.close()
+            elapsed = time.perf_counter() - start
+            with self._lock:
+                self._latencies[scenario.name].append(elapsed)
+                if not ok:
+                    self._errors[scenario.name] += 1
+        conn.close()
+
+    def run(self) -> Dict[str, Dict[str, Any]]:
+        server = make_server('127.0.0.1', 0, self.app, threaded=True, request_handler=_QuietHandler)
+        server_thread = threading.Thread(target=server.serve_forever, name='bench-server', daemon=True)
+        server_thread.start()
+        try:
+            start = time.perf_counter()
+            deadline = start + self.duration
+            workers = [threading.Thread(target=self._worker, args=(server.server_port, n, deadline))
+                       for n in range(self.threads)]
+            for w in workers:
+                w.start()
+            for w in workers:
+                w.join()
+            wall = time.perf_counter() - start
+        finally:
+            server.shutdown()
+        results = {name: summarize(lat, self._errors[name], wall) for name, lat in self._latencies.items()}
+        everything = [x for lat in self._latencies.values() for x in lat]
+        results['all'] = summarize(everything, sum(self._errors.values()), wall)
+        return results
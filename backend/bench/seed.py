@@ -0,0 +1,81 @@
+import random
+from datetime import datetime, timedelta
+from typing import Dict, List
+from sqlalchemy import insert
+from werkzeug.security import generate_password_hash
+from ..models import db, User, Task, Subtask, ProgressLog
+from ..services.nlp import CATEGORIES
+
+BENCH_PASSWORD = 'bench-password'
+STATUSES = ('pending', 'pending', 'in_progress', 'completed')
+PRIORITIES = ('low', 'medium', 'medium', 'high')
+_WORDS = ('report', 'meeting', 'review', 'deploy', 'fix', 'plan', 'study', 'course', 'call', 'doctor',
+          'groceries', 'draft', 'email', 'budget', 'slides', 'exam', 'gym', 'invoice', 'refactor', 'notes')
+INSERT_CHUNK = 5000
+
+
+def bench_email(i: int) -> str:
+    return f'bench{i}@example.com'
+
+
+def _insert_chunked(table, rows: List[Dict]):
+    for i in range(0, len(rows), INSERT_CHUNK):
+        db.session.execute(insert(table), rows[i:i + INSERT_CHUNK])
+
+
+def seed_database(users: int = 5, tasks_per_user: int = 1000, subtasks_per_task: int = 2,
+                  logs_per_task: int = 1, seed: int = 42, hash_method: str = None) -> List[int]:
+    """
+    Fills the app's database with synthetic users, tasks, subtasks and progress logs
+    drawn from a seeded RNG, so runs with the same arguments see the same data.
+    Must run inside an app context; returns the user ids.
+    """
+    rng = random.Random(seed)
+    now = datetime.now()
+    # One hash shared by every bench user: seeding should not cost users x hash time
+    password_hash = (generate_password_hash(BENCH_PASSWORD, method=hash_method) if hash_method
+                     else generate_password_hash(BENCH_PASSWORD))
+    start = db.session.query(db.func.count(User.id)).scalar()
+    user_ids = list(db.session.scalars(
+        insert(User).returning(User.id, sort_by_parameter_order=True),
+        [{'email': bench_email(start + i), 'password_hash': password_hash, 'created_at': now}
+         for i in range(users)],
+    ))
+    categories = list(CATEGORIES) + [None]
+    for uid in user_ids:
+        seed_tasks(uid, tasks_per_user, subtasks_per_task, logs_per_task, rng, now, categories)
+    db.session.commit()
+    return user_ids
+
+
+def seed_tasks(uid: int, count: int, subtasks_per_task: int, logs_per_task: int, rng: random.Random,
+               now: datetime = None, categories=None) -> None:
+    now = now or datetime.now()
+    categories = categories or list(CATEGORIES) + [None]
+    rows = []
+    for _ in range(count):
+        due = now + timedelta(hours=rng.randint(-24 * 14, 24 * 60)) if rng.random() < 0.8 else None
+        rows.append({
+            'user_id': uid,
+            'title': ' '.join(rng.choice(_WORDS) for _ in range(rng.randint(2, 6))),
+            'description': ' '.join(rng.choice(_WORDS) for _ in range(rng.randint(0, 20))) or None,
+            'category': rng.choice(categories),
+            'status': rng.choice(STATUSES),
+            'priority': rng.choice(PRIORITIES),
+            'due_date': due,
+            'estimated_hours': round(rng.uniform(0.5, 12), 1) if rng.random() < 0.6 else None,
+            'priority_score': round(rng.uniform(0, 100), 2),
+            'reminder_date': due - timedelta(hours=2) if due and due > now and rng.random() < 0.2 else None,
+            'created_at': now - timedelta(days=rng.randint(0, 90)),
+        })
+    task_ids = []
+    for i in range(0, len(rows), INSERT_CHUNK):
+        task_ids.extend(db.session.scalars(
+            insert(Task).returning(Task.id, sort_by_parameter_order=True), rows[i:i + INSERT_CHUNK]))
+    subtasks = [{'task_id': tid, 'title': f'step {k + 1}', 'status': rng.choice(('pending', 'completed'))}
+                for tid in task_ids for k in range(subtasks_per_task)]
+    logs = [{'task_id': tid, 'note': 'progress', 'progress': round(rng.uniform(0, 100), 1),
+             'created_at': now - timedelta(days=rng.randint(0, 30))}
+            for tid in task_ids for _ in range(logs_per_task)]
+    _insert_chunked(Subtask, subtasks)
+    _insert_chunked(ProgressLog, logs)
@@ -0,0 +1,61 @@
+import json
+import os
+import statistics
+import subprocess
+import sys
+from typing import Any, Dict
+
+# Dependencies that should only load on first use, never at import or create_app time
+HEAVY_MODULES = ('xhtml2pdf', 'dateparser', 'requests', 'sklearn', 'pandas', 'openpyxl')
+
+_PROBE = r'''
+import json, os, sys, time
+
+def rss_mb():
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') / 2 ** 20
+    except (OSError, ValueError, AttributeError):
+        import resource
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+base = rss_mb()
+t0 = time.perf_counter()
+import backend.app as module
+t1 = time.perf_counter()
+after_import = rss_mb()
+app = module.create_app()
+t2 = time.perf_counter()
+heavy = [m for m in HEAVY if m in sys.modules]
+print(json.dumps({
+    'import_ms': (t1 - t0) * 1000, 'create_app_ms': (t2 - t1) * 1000,
+    'import_rss_mb': after_import - base, 'rss_mb': rss_mb(), 'heavy': heavy,
+}))
+'''
+
+
+def _run_probe(root: str) -> Dict[str, Any]:
+    code = f'HEAVY = {HEAVY_MODULES!r}\n' + _PROBE
+    out = subprocess.run([sys.executable, '-c', code], cwd=root, capture_output=True, text=True,
+                         env=dict(os.environ), timeout=120, check=True)
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def bench_startup(runs: int = 3) -> Dict[str, Any]:
+    """
+    Cold start of a worker in fresh interpreters: time to import backend.app, time to
+    run create_app(), and resident memory. Medians over `runs`; `heavy_imports` flags
+    any optional dependency that got loaded eagerly.
+    """
+    root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    samples = [_run_probe(root) for _ in range(runs)]
+    heavy = sorted({m for s in samples for m in s['heavy']})
+    return {'startup': {
+        'runs': runs,
+        'import_ms': round(statistics.median(s['import_ms'] for s in samples), 1),
+        'create_app_ms': round(statistics.median(s['create_app_ms'] for s in samples), 1),
+        'import_rss_mb': round(statistics.median(s['import_rss_mb'] for s in samples), 1),
+        'rss_mb': round(statistics.median(s['rss_mb'] for s in samples), 1),
+        'heavy_imports': bool(heavy),
+        'heavy_modules': ','.join(heavy) or '-',
+    }}
@@ -0,0 +1,193 @@
+import json
+import os
+import random
+import re
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from ..services import email as email_service
+from ..services import ml
+from ..services.email import MailDispatcher, smtp_settings
+
+_TASK_RE = re.compile(r'^Task (\d+):', re.M)
+
+
+class FakeGemini:
+    """Stands in for ml._generate: answers after a fixed delay with plausible JSON."""
+
+    def __init__(self, latency_ms: float = 0.0, score: float = 55.0):
+        self.latency = latency_ms / 1000.0
+        self.score = score
+        self.calls = 0
+
+    def __call__(self, system_prompt: str, user_prompt: str):
+        self.calls += 1
+        if self.latency:
+            time.sleep(self.latency)
+        indexes = [int(i) for i in _TASK_RE.findall(user_prompt)]
+        if indexes:
+            return json.dumps([{'index': i, 'priority_score': self.score} for i in indexes])
+        return json.dumps({'priority_score': self.score})
+
+
+class _QuietHTTPServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def handle_error(self, request, client_address):
+        # A client that gave up at its deadline has closed the socket before the answer
+        if isinstance(sys.exc_info()[1], (BrokenPipeError, ConnectionResetError)):
+            return
+        super().handle_error(request, client_address)
+
+
+class FakeGeminiServer:
+    """
+    Local HTTP stand-in for the generateContent endpoint, for running the real
+    GeminiClient (pooling, deadlines, breaker) offline. Point GEMINI_BASE_URL at `url`.
+    `error_rate` of the calls answer 503; `hang_rate` of them sleep for `hang_seconds`.
+    `requests` and `max_in_flight` count what reached the server, e.g. to check the
+    client's concurrency cap.
+    """
+
+    def __init__(self, latency_ms: float = 0.0, score: float = 55.0, error_rate: float = 0.0,
+                 hang_rate: float = 0.0, hang_seconds: float = 30.0, seed: int = 1):
+        self.model = FakeGemini(latency_ms, score)
+        self.error_rate = error_rate
+        self.hang_rate = hang_rate
+        self.hang_seconds = hang_seconds
+        self.connections = 0
+        self.requests = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self._count_lock = threading.Lock()
+        self._rng = random.Random(seed)
+        self._rng_lock = threading.Lock()
+        self._server = _QuietHTTPServer(('127.0.0.1', 0), self._handler())
+        self._thread = None
+
+    @property
+    def url(self) -> str:
+        return f'http://127.0.0.1:{self._server.server_port}'
+
+    def _roll(self) -> float:
+        with self._rng_lock:
+            return self._rng.random()
+
+    def _enter(self):
+        with self._count_lock:
+            self.requests += 1
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+
+    def _leave(self):
+        with self._count_lock:
+            self.in_flight -= 1
+
+    def _handler(self):
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+            disable_nagle_algorithm = True
+
+            def setup(self):
+                super().setup()
+                fake.connections += 1
+
+            def log_message(self, *args):
+                pass
+
+            def do_POST(self):
+                body = json.loads(self.rfile.read(int(self.headers.get('Content-Length', 0))) or b'{}')
+                fake._enter()
+                try:
+                    status, obj = self._answer(body)
+                finally:
+                    # Before the response goes out, so the client's next call never overlaps this one
+                    fake._leave()
+                self._send(status, obj)
+
+            def _answer(self, body):
+                roll = fake._roll()
+                if roll < fake.hang_rate:
+                    time.sleep(fake.hang_seconds)
+                if roll >= 1.0 - fake.error_rate:
+                    return 503, {'error': {'code': 503, 'message': 'overloaded'}}
+                system = ''.join(p['text'] for p in body['systemInstruction']['parts'])
+                user = ''.join(p['text'] for p in body['contents'][0]['parts'])
+                text = fake.model(system, user)
+                return 200, {'candidates': [{'content': {'role': 'model', 'parts': [{'text': text}]}}]}
+
+            def _send(self, status, obj):
+                data = json.dumps(obj).encode('utf-8')
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+        return Handler
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, name='fake-gemini', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+
+class FakeSMTP:
+    """smtplib.SMTP look-alike that accepts everything after a fixed delay."""
+    latency = 0.0
+    sent = 0
+    messages = []
+
+    def __init__(self, host, port, timeout=None):
+        pass
+
+    def ehlo(self):
+        return 250, b'ok'
+
+    def has_extn(self, name):
+        return False
+
+    def starttls(self):
+        pass
+
+    def login(self, user, password):
+        pass
+
+    def send_message(self, msg):
+        if FakeSMTP.latency:
+            time.sleep(FakeSMTP.latency)
+        FakeSMTP.sent += 1
+        FakeSMTP.messages.append(msg.get_content())
+
+    def quit(self):
+        pass
+
+    def close(self):
+        pass
+
+
+def install_stubs(gemini_latency_ms: float = 0.0, smtp_latency_ms: float = 0.0, gemini_server: bool = False):
+    """
+    Replaces the Gemini call and the SMTP connection process-wide, so benchmarks run
+    offline but still exercise the scoring queue, outbox and mail dispatcher. With
+    `gemini_server` the model is a FakeGeminiServer behind the real client instead.
+    Call before the app is created; needs MAIL_FROM_EMAIL set (see bench.__main__).
+    """
+    if gemini_server:
+        fake = FakeGeminiServer(gemini_latency_ms).start()
+        os.environ['GEMINI_BASE_URL'] = fake.url
+    else:
+        fake = FakeGemini(gemini_latency_ms)
+        ml._generate = fake
+    FakeSMTP.latency = smtp_latency_ms / 1000.0
+    dispatcher = MailDispatcher(smtp_settings(), smtp_factory=FakeSMTP)
+    dispatcher.start()
+    email_service._dispatcher = dispatcher
+    return fake
@@ -1,11 +1,59 @@
 import os
 from datetime import timedelta
+from typing import Any, Dict
 
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 DB_PATH = os.path.join(os.path.dirname(BASE_DIR), 'taskgenius.db')
 
 class Config:
+    # Overridden by DATABASE_URL (e.g. postgresql://...), see database.configure_database
     SQLALCHEMY_DATABASE_URI = f"sqlite:///{DB_PATH}"
     SQLALCHEMY_TRACK_MODIFICATIONS = False
     JWT_SECRET_KEY = os.environ.get('JWT_SECRET_KEY', 'dev-secret-key')
     JWT_ACCESS_TOKEN_EXPIRES = timedelta(hours=12)
+
+
+def env_settings() -> Dict[str, Any]:
+    """
+    Tunables read from the environment. create_app applies them after loading
+    backend/.env, so values set in that file count (Config's class attributes are
+    evaluated when this module is imported, before the file is read).
+    """
+    return {
+        # Background priority scoring
+        'SCORING_WORKERS': int(os.environ.get('SCORING_WORKERS', '4')),
+        'SCORING_QUEUE_SIZE': int(os.environ.get('SCORING_QUEUE_SIZE', '1000')),
+        # /api/stats: read per-user counters kept up to date on every write instead of counting
+        'STATS_COUNTERS': os.environ.get('STATS_COUNTERS', '').lower() in ('1', 'true', 'yes'),
+        'STATS_DUE_SOON_HOURS': float(os.environ.get('STATS_DUE_SOON_HOURS', '24')),
+        # Reminder scheduler: how far ahead reminders are held in memory, and retry delay for failed sends
+        'REMINDER_LOOKAHEAD_MINUTES': int(os.environ.get('REMINDER_LOOKAHEAD_MINUTES', '60')),
+        'REMINDER_RETRY_SECONDS': int(os.environ.get('REMINDER_RETRY_SECONDS', '60')),
+        # Lease length and batch size when several processes claim due reminders from one database
+        'REMINDER_CLAIM_SECONDS': int(os.environ.get('REMINDER_CLAIM_SECONDS', '300')),
+        'REMINDER_CLAIM_BATCH': int(os.environ.get('REMINDER_CLAIM_BATCH', '50')),
+        # Reminders of one user falling due within this many seconds go out as one digest
+        'REMINDER_DIGEST_WINDOW_SECONDS': int(os.environ.get('REMINDER_DIGEST_WINDOW_SECONDS', '300')),
+        # Email outbox delivery
+        'OUTBOX_POLL_SECONDS': float(os.environ.get('OUTBOX_POLL_SECONDS', '5')),
+        'OUTBOX_MAX_ATTEMPTS': int(os.environ.get('OUTBOX_MAX_ATTEMPTS', '8')),
+        # Background export jobs; artifacts are cached here (default: <tmp>/taskgenius-exports)
+        'EXPORT_CACHE_DIR': os.environ.get('EXPORT_CACHE_DIR'),
+        'EXPORT_WORKERS': int(os.environ.get('EXPORT_WORKERS', '2')),
+        # POST /api/tasks/bulk
+        'BULK_MAX_LINES': int(os.environ.get('BULK_MAX_LINES', '10000')),
+        # werkzeug hash method for passwords, e.g. 'scrypt:16384:8:1' or 'pbkdf2:sha256:600000';
+        # existing hashes are upgraded on the next successful login
+        'PASSWORD_HASH_METHOD': os.environ.get('PASSWORD_HASH_METHOD', 'scrypt'),
+        # Request/SQL metrics at /api/metrics; PROFILE_SAMPLE_RATE (0..1) dumps cProfile
+        # (or PROFILER=pyinstrument) output of that share of requests into PROFILE_DIR
+        'METRICS_ENABLED': os.environ.get('METRICS_ENABLED', 'true').lower() not in ('0', 'false', 'no'),
+        # /api/metrics and the /api/*/stats endpoints need a JWT unless this is set (e.g. for a
+        # Prometheus scraper on a private network)
+        'METRICS_PUBLIC': os.environ.get('METRICS_PUBLIC', '').lower() in ('1', 'true', 'yes'),
+        'PROFILE_SAMPLE_RATE': float(os.environ.get('PROFILE_SAMPLE_RATE', '0')),
+        'PROFILER': os.environ.get('PROFILER', 'cprofile'),
+        'PROFILE_DIR': os.environ.get('PROFILE_DIR'),
+        # In-process cache of /api/tasks and /api/stats responses per (user, data version, args); 0 disables
+        'RESPONSE_CACHE_MAX_BYTES': int(os.environ.get('RESPONSE_CACHE_MAX_BYTES', str(32 * 1024 * 1024))),
+    }
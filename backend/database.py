@@ -0,0 +1,90 @@
+import os
+import sqlite3
+from typing import Any, Dict
+from sqlalchemy import event
+from sqlalchemy.engine import Engine, make_url
+
+_pragmas_installed = False
+
+
+def _env_int(name: str, default: int) -> int:
+    return int(os.environ.get(name, str(default)))
+
+
+def normalize_database_url(url: str) -> str:
+    # Heroku-style URLs use the scheme SQLAlchemy dropped in 1.4
+    if url.startswith('postgres://'):
+        return 'postgresql://' + url[len('postgres://'):]
+    return url
+
+
+def sqlite_pragmas() -> Dict[str, Any]:
+    """
+    Applied to every new SQLite connection. WAL lets readers run alongside the one
+    writer, and busy_timeout makes a writer wait for the lock instead of failing
+    at once with "database is locked".
+    """
+    return {
+        'journal_mode': os.environ.get('SQLITE_JOURNAL_MODE', 'WAL'),
+        # Durable at checkpoints; with WAL a crash can lose the last commits but not corrupt
+        'synchronous': os.environ.get('SQLITE_SYNCHRONOUS', 'NORMAL'),
+        'busy_timeout': _env_int('SQLITE_BUSY_TIMEOUT_MS', 5000),
+        'mmap_size': _env_int('SQLITE_MMAP_SIZE', 256 * 1024 * 1024),
+        # Negative means KiB rather than pages
+        'cache_size': -_env_int('SQLITE_CACHE_SIZE_KB', 64 * 1024),
+        'temp_store': 'MEMORY',
+    }
+
+
+def _set_sqlite_pragmas(dbapi_connection, connection_record):
+    if not isinstance(dbapi_connection, sqlite3.Connection):
+        return
+    cursor = dbapi_connection.cursor()
+    try:
+        for name, value in sqlite_pragmas().items():
+            cursor.execute(f'PRAGMA {name}={value}')
+    finally:
+        cursor.close()
+
+
+def install_sqlite_pragmas():
+    """Registers the connect hook for all engines (the app's and ad-hoc ones). Idempotent."""
+    global _pragmas_installed
+    if _pragmas_installed:
+        return
+    event.listen(Engine, 'connect', _set_sqlite_pragmas)
+    _pragmas_installed = True
+
+
+def engine_options(url: str) -> Dict[str, Any]:
+    """SQLALCHEMY_ENGINE_OPTIONS suited to the database behind `url`."""
+    backend = make_url(url).get_backend_name()
+    if backend == 'sqlite':
+        return {
+            # Threads share pooled connections; busy_timeout (above) covers lock waits
+            'connect_args': {'check_same_thread': False, 'timeout': _env_int('SQLITE_BUSY_TIMEOUT_MS', 5000) / 1000},
+        }
+    return {
+        'pool_size': _env_int('DB_POOL_SIZE', 10),
+        'max_overflow': _env_int('DB_MAX_OVERFLOW', 20),
+        'pool_timeout': _env_int('DB_POOL_TIMEOUT', 30),
+        # Recycle before typical server/proxy idle timeouts close the socket under us
+        'pool_recycle': _env_int('DB_POOL_RECYCLE', 1800),
+        'pool_pre_ping': True,
+    }
+
+
+def configure_database(app):
+    """
+    Picks the database for `app`: DATABASE_URL when set (read here, after backend/.env
+    is loaded), otherwise the configured SQLite file. Must run before db.init_app.
+    """
+    url = os.environ.get('DATABASE_URL')
+    if url:
+        app.config['SQLALCHEMY_DATABASE_URI'] = normalize_database_url(url)
+    url = app.config['SQLALCHEMY_DATABASE_URI']
+    options = engine_options(url)
+    options.update(app.config.get('SQLALCHEMY_ENGINE_OPTIONS') or {})
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = options
+    if make_url(url).get_backend_name() == 'sqlite':
+        install_sqlite_pragmas()
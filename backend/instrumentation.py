@@ -0,0 +1,276 @@
+import functools
+import inspect
+import os
+import random
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, List, Optional, Sequence, Tuple
+from flask import g, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+LATENCY_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 500)
+PROMETHEUS_CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+def _escape(value: str) -> str:
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _label_str(names: Sequence[str], values: Sequence[str], extra: str = '') -> str:
+    parts = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return '{' + ','.join(parts) + '}' if parts else ''
+
+
+class Counter:
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *labels, amount: float = 1.0):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0.0) + amount
+
+    def render(self) -> List[str]:
+        lines = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} counter']
+        with self._lock:
+            for labels, value in sorted(self._values.items()):
+                lines.append(f'{self.name}{_label_str(self.labelnames, labels)} {value:g}')
+        return lines
+
+
+class Histogram:
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = LATENCY_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets)
+        # labels -> [per-bucket counts..., +Inf count, sum]
+        self._values: Dict[Tuple[str, ...], List[float]] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *labels):
+        with self._lock:
+            slot = self._values.get(labels)
+            if slot is None:
+                slot = self._values[labels] = [0] * (len(self.buckets) + 1) + [0.0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    slot[i] += 1
+                    break
+            else:
+                slot[len(self.buckets)] += 1
+            slot[-1] += value
+
+    def render(self) -> List[str]:
+        lines = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} histogram']
+        with self._lock:
+            for labels, slot in sorted(self._values.items()):
+                cumulative = 0
+                for bound, n in zip(self.buckets + ('+Inf',), slot[:-1]):
+                    cumulative += n
+                    le = 'le="{}"'.format(bound if bound == '+Inf' else f'{bound:g}')
+                    lines.append(f'{self.name}_bucket{_label_str(self.labelnames, labels, le)} {cumulative}')
+                lines.append(f'{self.name}_sum{_label_str(self.labelnames, labels)} {slot[-1]:.6f}')
+                lines.append(f'{self.name}_count{_label_str(self.labelnames, labels)} {cumulative}')
+        return lines
+
+
+REQUEST_SECONDS = Histogram('taskgenius_request_duration_seconds', 'Time to build the response, per route.',
+                            ('method', 'route', 'status'))
+REQUEST_SQL_QUERIES = Histogram('taskgenius_request_sql_queries', 'SQL statements executed per request.',
+                                ('method', 'route'), COUNT_BUCKETS)
+REQUEST_SQL_SECONDS = Histogram('taskgenius_request_sql_duration_seconds', 'Time spent in SQL per request.',
+                                ('method', 'route'))
+SQL_QUERIES = Counter('taskgenius_sql_queries_total', 'SQL statements executed, in requests or background work.',
+                      ('context',))
+SQL_SECONDS = Counter('taskgenius_sql_duration_seconds_total', 'Time spent in SQL statements.', ('context',))
+SPAN_SECONDS = Histogram('taskgenius_span_duration_seconds', 'Duration of instrumented operations.', ('span',))
+SPAN_ERRORS = Counter('taskgenius_span_errors_total', 'Instrumented operations that raised.', ('span',))
+METRICS = [REQUEST_SECONDS, REQUEST_SQL_QUERIES, REQUEST_SQL_SECONDS, SQL_QUERIES, SQL_SECONDS,
+           SPAN_SECONDS, SPAN_ERRORS]
+
+# [queries, seconds] for the request running in this context; None outside requests
+_request_sql: ContextVar[Optional[list]] = ContextVar('request_sql', default=None)
+_profile_lock = threading.Lock()
+_listeners_installed = False
+
+
+def render_metrics() -> str:
+    lines = []
+    for metric in METRICS:
+        lines.extend(metric.render())
+    return '\n'.join(lines) + '\n'
+
+
+@contextmanager
+def span(name: str):
+    """Times the enclosed block into taskgenius_span_duration_seconds{span=name}."""
+    start = time.perf_counter()
+    try:
+        yield
+    except BaseException:
+        SPAN_ERRORS.inc(name)
+        raise
+    finally:
+        SPAN_SECONDS.observe(time.perf_counter() - start, name)
+
+
+def timed(name: str):
+    """Decorator form of span(); for generator functions the whole iteration is timed."""
+    def decorate(fn):
+        if inspect.isgeneratorfunction(fn):
+            @functools.wraps(fn)
+            def gen_wrapper(*args, **kwargs):
+                with span(name):
+                    yield from fn(*args, **kwargs)
+            return gen_wrapper
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with span(name):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorate
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault('query_started', []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = conn.info.get('query_started')
+    if not started:
+        return
+    elapsed = time.perf_counter() - started.pop()
+    current = _request_sql.get()
+    if current is not None:
+        current[0] += 1
+        current[1] += elapsed
+    context_label = 'request' if current is not None else 'background'
+    SQL_QUERIES.inc(context_label)
+    SQL_SECONDS.inc(context_label, amount=elapsed)
+
+
+def _handle_error(exception_context):
+    # A failed statement never reaches after_cursor_execute; drop its start time
+    conn = exception_context.connection
+    if conn is not None and conn.info.get('query_started'):
+        conn.info['query_started'].pop()
+
+
+def install_sql_listeners():
+    """Counts and times every statement on every engine. Idempotent."""
+    global _listeners_installed
+    if _listeners_installed:
+        return
+    event.listen(Engine, 'before_cursor_execute', _before_cursor_execute)
+    event.listen(Engine, 'after_cursor_execute', _after_cursor_execute)
+    event.listen(Engine, 'handle_error', _handle_error)
+    _listeners_installed = True
+
+
+def _start_profiler(app):
+    rate = app.config.get('PROFILE_SAMPLE_RATE', 0.0)
+    if rate <= 0 or random.random() >= rate:
+        return None
+    # Only one profiler can be active per process
+    if not _profile_lock.acquire(blocking=False):
+        return None
+    try:
+        if app.config.get('PROFILER') == 'pyinstrument':
+            from pyinstrument import Profiler
+            profiler = Profiler()
+            profiler.start()
+        else:
+            import cProfile
+            profiler = cProfile.Profile()
+            profiler.enable()
+    except Exception:
+        _profile_lock.release()
+        return None
+    return profiler
+
+
+def _dump_profile(app, profiler, route: str, elapsed: float):
+    try:
+        out_dir = app.config.get('PROFILE_DIR') or os.path.join(tempfile.gettempdir(), 'taskgenius-profiles')
+        os.makedirs(out_dir, exist_ok=True)
+        stem = '{}-{}-{}-{}ms'.format(
+            time.strftime('%Y%m%d-%H%M%S'), request.method,
+            route.strip('/').replace('/', '_').replace('<', '').replace('>', '').replace(':', '-') or 'root',
+            int(elapsed * 1000),
+        )
+        if app.config.get('PROFILER') == 'pyinstrument':
+            profiler.stop()
+            with open(os.path.join(out_dir, stem + '.html'), 'w', encoding='utf-8') as f:
+                f.write(profiler.output_html())
+        else:
+            profiler.disable()
+            # Inspect with: python -m pstats <file> or snakeviz <file>
+            profiler.dump_stats(os.path.join(out_dir, stem + '.prof'))
+    finally:
+        _profile_lock.release()
+
+
+def init_instrumentation(app):
+    """Per-route latency and SQL metrics for every request, plus sampled profiles."""
+    if not app.config.get('METRICS_ENABLED', True):
+        return
+    install_sql_listeners()
+
+    @app.before_request
+    def _start_request_metrics():
+        g._metrics_started = time.perf_counter()
+        g._metrics_sql_token = _request_sql.set([0, 0.0])
+        g._profiler = _start_profiler(app)
+
+    @app.after_request
+    def _record_request_metrics(response):
+        started = g.pop('_metrics_started', None)
+        if started is None:
+            return response
+        elapsed = time.perf_counter() - started
+        route = request.url_rule.rule if request.url_rule is not None else 'unmatched'
+        sql = _request_sql.get() or [0, 0.0]
+        REQUEST_SECONDS.observe(elapsed, request.method, route, str(response.status_code))
+        REQUEST_SQL_QUERIES.observe(sql[0], request.method, route)
+        REQUEST_SQL_SECONDS.observe(sql[1], request.method, route)
+        # Shows up in the browser's network panel
+        response.headers['Server-Timing'] = (
+            f'app;dur={elapsed * 1000:.1f}, sql;dur={sql[1] * 1000:.1f};desc="{sql[0]} queries"'
+        )
+        profiler = g.pop('_profiler', None)
+        if profiler is not None:
+            _dump_profile(app, profiler, route, elapsed)
+        return response
+
+    @app.teardown_request
+    def _reset_request_metrics(exc):
+        token = g.pop('_metrics_sql_token', None)
+        if token is not None:
+            try:
+                _request_sql.reset(token)
+            except ValueError:
+                # Token from another context (e.g. a copied one); nothing to undo here
+                pass
+        profiler = g.pop('_profiler', None)
+        if profiler is not None:
+            # after_request did not run (unhandled error); stop without dumping
+            try:
+                if hasattr(profiler, 'disable'):
+                    profiler.disable()
+                else:
+                    profiler.stop()
+            finally:
+                _profile_lock.release()
@@ -1,4 +1,5 @@
 from datetime import datetime
+from functools import lru_cache
 from flask_sqlalchemy import SQLAlchemy
 from werkzeug.security import generate_password_hash, check_password_hash
 
@@ -9,13 +10,31 @@ class User(db.Model):
     email = db.Column(db.String(120), unique=True, nullable=False)
     password_hash = db.Column(db.String(256), nullable=False)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    # Bumped on every change to the user's tasks/subtasks; see services/response_cache.py
+    data_version = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    # One digest email for reminders falling due together, instead of one email per task
+    reminder_digest = db.Column(db.Boolean, nullable=False, default=True, server_default='1')
 
-    def set_password(self, password: str):
-        self.password_hash = generate_password_hash(password)
+    def set_password(self, password: str, method: str = None):
+        # method is a werkzeug method string, e.g. 'scrypt:16384:8:1' or 'pbkdf2:sha256:600000'
+        if method:
+            self.password_hash = generate_password_hash(password, method=method)
+        else:
+            self.password_hash = generate_password_hash(password)
 
     def check_password(self, password: str) -> bool:
         return check_password_hash(self.password_hash, password)
 
+    def needs_rehash(self, method: str) -> bool:
+        """True if the stored hash was made with other parameters than `method`."""
+        return self.password_hash.split('$', 1)[0] != _hash_prefix(method)
+
+
+@lru_cache(maxsize=8)
+def _hash_prefix(method: str) -> str:
+    # werkzeug expands defaults (e.g. 'scrypt' -> 'scrypt:32768:8:1'); hash once to see how
+    return generate_password_hash('', method=method).split('$', 1)[0]
+
 class Task(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
@@ -27,19 +46,67 @@ class Task(db.Model):
     due_date = db.Column(db.DateTime, nullable=True)
     estimated_hours = db.Column(db.Float, nullable=True)
     priority_score = db.Column(db.Float, default=0.0)
+    # Which model produced priority_score ('gemini' or 'local'); NULL for rows scored before it was tracked
+    score_source = db.Column(db.String(16), nullable=True)
     reminder_date = db.Column(db.DateTime, nullable=True) # NEW COLUMN
+    # Lease taken by the reminder worker sending this reminder (services/reminder.py)
+    reminder_claimed_by = db.Column(db.String(64), nullable=True)
+    reminder_claim_expires = db.Column(db.DateTime, nullable=True)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     subtasks = db.relationship('Subtask', backref='task', lazy='dynamic', cascade="all, delete-orphan")
 
+    # Matched to the hot query shapes: list_tasks filters + ordering, stats by status,
+    # and the reminder scan (partial, so tasks without reminders cost nothing)
+    __table_args__ = (
+        db.Index('ix_task_user_rank', 'user_id', priority_score.desc(), 'due_date', 'id'),
+        db.Index('ix_task_user_status', 'user_id', 'status'),
+        db.Index('ix_task_user_priority', 'user_id', 'priority'),
+        db.Index('ix_task_user_category', 'user_id', 'category'),
+        db.Index(
+            'ix_task_reminder_due', 'reminder_date',
+            sqlite_where=reminder_date.isnot(None),
+            postgresql_where=reminder_date.isnot(None),
+        ),
+    )
+
 class Subtask(db.Model):
     id = db.Column(db.Integer, primary_key=True)
-    task_id = db.Column(db.Integer, db.ForeignKey('task.id'), nullable=False)
+    task_id = db.Column(db.Integer, db.ForeignKey('task.id'), nullable=False, index=True)
     title = db.Column(db.String(255), nullable=False)
     status = db.Column(db.String(32), default='pending')
 
 class ProgressLog(db.Model):
     id = db.Column(db.Integer, primary_key=True)
-    task_id = db.Column(db.Integer, db.ForeignKey('task.id'), nullable=False)
+    task_id = db.Column(db.Integer, db.ForeignKey('task.id'), nullable=False, index=True)
     note = db.Column(db.Text, nullable=True)
     progress = db.Column(db.Float, default=0.0)
-    created_at = db.Column(db.DateTime, default=datetime.utcnow)
\ No newline at end of file
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+class TaskCounter(db.Model):
+    """Per-user task counts by dimension ('total', 'status', 'priority', 'category'), kept by services/stats.py."""
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), primary_key=True)
+    dimension = db.Column(db.String(16), primary_key=True)
+    value = db.Column(db.String(64), primary_key=True)
+    count = db.Column(db.Integer, nullable=False, default=0)
+
+
+class OutboxMessage(db.Model):
+    """Outgoing email written in the same transaction as the change that caused it; see services/outbox.py."""
+    id = db.Column(db.Integer, primary_key=True)
+    idempotency_key = db.Column(db.String(128), unique=True, nullable=False)
+    kind = db.Column(db.String(32), nullable=False)
+    to_email = db.Column(db.String(120), nullable=False)
+    subject = db.Column(db.String(255), nullable=False)
+    body = db.Column(db.Text, nullable=False)
+    status = db.Column(db.String(16), default='pending', nullable=False)  # pending, sending, sent, dead
+    attempts = db.Column(db.Integer, default=0, nullable=False)
+    next_attempt_at = db.Column(db.DateTime, default=datetime.utcnow)
+    claimed_by = db.Column(db.String(64), nullable=True)
+    claimed_until = db.Column(db.DateTime, nullable=True)
+    last_error = db.Column(db.Text, nullable=True)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    sent_at = db.Column(db.DateTime, nullable=True)
+
+    __table_args__ = (
+        db.Index('ix_outbox_status_next', 'status', 'next_attempt_at'),
+    )
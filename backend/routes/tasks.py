@@ -1,12 +1,24 @@
+import base64
+import json
 from datetime import datetime, timedelta
-from flask import Blueprint, request, jsonify, send_file
+from flask import Blueprint, Response, abort, request, jsonify, send_file, current_app, stream_with_context
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from io import BytesIO
-from ..models import db, Task, Subtask, ProgressLog, User
+from sqlalchemy import and_, or_, insert
+from ..models import db, Task, Subtask, ProgressLog
 from ..services.nlp import parse_task_text
-from ..services.ml import gemini_priority_score
-from ..services.exports import to_excel, to_pdf
-from ..services.email import send_email
+from ..services.bulk_import import parse_lines, split_lines, task_row
+from ..services.local_model import get_local_model
+from ..services.scoring import enqueue_priority_score, enqueue_priority_scores, provisional_score
+from ..services.ml import score_many_with_sources, SOURCE_LOCAL
+from ..services.stats import compute_stats, counter_stats, counters_enabled, apply_counter_deltas, task_deltas
+from ..services.exports import to_pdf
+from ..services.export_jobs import EXPORT_FORMATS, export_rows, get_export_jobs
+from ..services.outbox import add_outbox_email, notify_outbox, outbox_key
+from ..services.reminder import notify_reminder_changed
+from ..services.users import cached_user
+from ..services.response_cache import versioned_response, bump_data_version
+from ..services.search import search_tasks
 
 bp = Blueprint('tasks', __name__, url_prefix='/api')
 
@@ -48,76 +60,302 @@ def create_task():
     task_data = {
         'title': title,
         'description': data.get('description'),
+        'category': task.category,
         'priority': task.priority,
         'due_date': data.get('due_date'),
         'estimated_hours': data.get('estimated_hours')
     }
-    task.priority_score = gemini_priority_score(task_data)
+    # Provisional score; the scoring queue writes the real one back later
+    task.priority_score = provisional_score(task_data)
+    task.score_source = SOURCE_LOCAL
     db.session.add(task)
+    db.session.flush()
+
+    # Task Created email goes through the outbox: written in this transaction, delivered
+    # by the outbox worker, so the response never waits for the mail server
+    user = cached_user(uid)
+    if user and user.email:
+        subject = f"Task Created: {task.title}"
+        parts = [
+            f"Title: {task.title}",
+            f"Description: {task.description or '-'}",
+            f"Priority: {task.priority}",
+            f"Due: {task.due_date.isoformat() if task.due_date else '-'}",
+            f"Reminder: {task.reminder_date.isoformat() if task.reminder_date else '-'}",
+        ]
+        body = "\n".join(parts)
+        # created_at tells a task apart from an older one whose id SQLite has reused
+        key = outbox_key('task_created', uid, task.id, task.created_at.isoformat())
+        add_outbox_email('task_created', key, user.email, subject, body)
     db.session.commit()
 
-    # Send Task Created email (best-effort; do not fail the request if email errors)
-    try:
-        user = User.query.get(uid)
-        if user and user.email:
-            subject = f"Task Created: {task.title}"
-            parts = [
-                f"Title: {task.title}",
-                f"Description: {task.description or '-'}",
-                f"Priority: {task.priority}",
-                f"Due: {task.due_date.isoformat() if task.due_date else '-'}",
-                f"Reminder: {task.reminder_date.isoformat() if task.reminder_date else '-'}",
-            ]
-            body = "\n".join(parts)
-            send_email(subject, user.email, body)
-    except Exception:
-        pass
+    app = current_app._get_current_object()
+    enqueue_priority_score(app, task.id, task_data)
+    if task.reminder_date:
+        notify_reminder_changed(app, task.id, task.reminder_date)
+    notify_outbox(app)
     return jsonify({'id': task.id}), 201
 
-@bp.get('/tasks')
+@bp.post('/tasks/bulk')
 @jwt_required()
-def list_tasks():
+def bulk_create_tasks():
+    """
+    Creates one task per line of free text: JSON {"lines": [...]} or {"text": "..."},
+    or a multipart upload in the "file" field. Lines are parsed in a process pool and
+    inserted with one executemany INSERT; the response has a result per line.
+    """
     uid = int(get_jwt_identity())
-    
+    upload = request.files.get('file')
+    if upload is not None:
+        try:
+            lines = split_lines(upload.read().decode('utf-8-sig'))
+        except UnicodeDecodeError:
+            return jsonify({'message': 'file must be UTF-8 text'}), 400
+    else:
+        data = request.get_json(silent=True) or {}
+        if isinstance(data.get('lines'), list):
+            # Same normalization as text and files, so "- buy groceries" loses its list marker
+            lines = [line for entry in data['lines'] for line in split_lines(str(entry))]
+        else:
+            lines = split_lines(data.get('text') or '')
+    if not lines:
+        return jsonify({'message': 'no tasks given'}), 400
+    max_lines = current_app.config.get('BULK_MAX_LINES', 10000)
+    if len(lines) > max_lines:
+        return jsonify({'message': f'at most {max_lines} lines per request'}), 413
+
+    results = []
+    rows = []
+    task_data = []
+    for n, (line, outcome) in enumerate(zip(lines, parse_lines(lines)), start=1):
+        parsed = outcome.get('parsed')
+        if not parsed or not parsed.get('title'):
+            results.append({'line': n, 'text': line, 'error': outcome.get('error') or 'empty task'})
+            continue
+        results.append({'line': n, 'text': line, 'parsed': parsed})
+        rows.append(task_row(uid, parsed))
+        task_data.append({
+            'title': parsed['title'],
+            'description': None,
+            'category': parsed.get('category'),
+            'priority': parsed.get('priority'),
+            'due_date': parsed.get('due_date'),
+            'estimated_hours': parsed.get('estimated_hours'),
+        })
+    if not rows:
+        return jsonify({'created': 0, 'failed': len(results), 'results': results}), 400
+
+    # Provisional scores for the whole batch in one matrix product
+    for row, score in zip(rows, get_local_model().score_many(task_data)):
+        row['priority_score'] = score
+        row['score_source'] = SOURCE_LOCAL
+    inserted = db.session.execute(insert(Task).returning(Task.id, Task.created_at, sort_by_parameter_order=True), rows).all()
+    ids = [r.id for r in inserted]
+    # A Core INSERT does not go through the ORM flush hooks that keep the counters current
+    if counters_enabled(current_app):
+        apply_counter_deltas(db.session.connection(), task_deltas(rows))
+    bump_data_version(db.session.connection(), [uid])
+    # One summary email instead of one per imported task
+    user = cached_user(uid)
+    if user and user.email:
+        body = "\n".join(f"- {row['title']}" for row in rows)
+        key = outbox_key('bulk_import', uid, ids[0], ids[-1], inserted[0].created_at.isoformat())
+        add_outbox_email('bulk_import', key, user.email, f"Imported {len(rows)} tasks", body)
+    db.session.commit()
+
+    app = current_app._get_current_object()
+    # Batched jobs: one queue entry and model call per BATCH_JOB_SIZE tasks, not one per line
+    enqueue_priority_scores(app, list(zip(ids, task_data)))
+    for task_id, row in zip(ids, rows):
+        if row['reminder_date']:
+            notify_reminder_changed(app, task_id, row['reminder_date'])
+    notify_outbox(app)
+
+    ok = iter(ids)
+    for r in results:
+        if 'parsed' in r:
+            r['id'] = next(ok)
+    return jsonify({'created': len(ids), 'failed': len(results) - len(ids), 'results': results}), 201
+
+# Columns serialized by list_tasks; rows are read as plain tuples, never as ORM objects
+TASK_FIELDS = {
+    'id': Task.id,
+    'title': Task.title,
+    'description': Task.description,
+    'category': Task.category,
+    'status': Task.status,
+    'priority': Task.priority,
+    'due_date': Task.due_date,
+    'estimated_hours': Task.estimated_hours,
+    'priority_score': Task.priority_score,
+    'reminder_date': Task.reminder_date,
+    'created_at': Task.created_at,
+}
+DATETIME_FIELDS = {'due_date', 'reminder_date', 'created_at'}
+# Needed on every row to build the next keyset cursor
+SORT_FIELDS = ('priority_score', 'due_date', 'id')
+MAX_PAGE_SIZE = 500
+
+
+def _filter_tasks(query, uid: int):
     # --- START FEATURE 5: Filtering Tasks ---
-    query = Task.query.filter_by(user_id=uid)
-    
+    query = query.filter(Task.user_id == uid)
+
     status_filter = request.args.get('status')
     priority_filter = request.args.get('priority')
     category_filter = request.args.get('category')
-    
+
     if status_filter:
         query = query.filter(Task.status == status_filter)
     if priority_filter:
         query = query.filter(Task.priority == priority_filter)
     if category_filter:
         query = query.filter(Task.category == category_filter)
-    
-    tasks = query.order_by(Task.priority_score.desc(), Task.due_date.asc().nullsfirst()).all()
     # --- END FEATURE 5: Filtering Tasks ---
+    return query
 
-    # Utility to convert subtask to dict
-    def subtask_to_dict(s: Subtask):
-        return {'id': s.id, 'title': s.title, 'status': s.status}
-        
-    def to_dict(t: Task):
-        return {
-            'id': t.id,
-            'title': t.title,
-            'description': t.description,
-            'category': t.category,
-            'status': t.status,
-            'priority': t.priority,
-            'due_date': t.due_date.isoformat() if t.due_date else None,
-            'estimated_hours': t.estimated_hours,
-            'priority_score': t.priority_score,
-            'reminder_date': t.reminder_date.isoformat() if t.reminder_date else None,
-            # --- START FEATURE 6: Subtasks ---
-            'subtasks': [subtask_to_dict(s) for s in t.subtasks.all()],
-            # --- END FEATURE 6: Subtasks ---
-            'created_at': t.created_at.isoformat(),
-        }
-    return jsonify([to_dict(t) for t in tasks])
+
+def _encode_cursor(row) -> str:
+    raw = json.dumps([row.priority_score, row.due_date.isoformat() if row.due_date else None, row.id])
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def _decode_cursor(cursor: str):
+    raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+    score, due, tid = json.loads(raw)
+    return float(score), datetime.fromisoformat(due) if due else None, int(tid)
+
+
+def _after_cursor(query, cursor):
+    """Rows strictly after the cursor in (priority_score desc, due_date asc nulls first, id asc) order."""
+    score, due, tid = cursor
+    if due is None:
+        same_score = or_(and_(Task.due_date.is_(None), Task.id > tid), Task.due_date.isnot(None))
+    else:
+        same_score = or_(Task.due_date > due, and_(Task.due_date == due, Task.id > tid))
+    return query.filter(or_(Task.priority_score < score, and_(Task.priority_score == score, same_score)))
+
+
+def _subtasks_by_task(uid: int, task_ids=None):
+    """All subtasks of the listed (or all filtered) tasks in one query, grouped by task id."""
+    query = db.session.query(Subtask.task_id, Subtask.id, Subtask.title, Subtask.status)
+    if task_ids is not None:
+        query = query.filter(Subtask.task_id.in_(task_ids))
+    else:
+        query = _filter_tasks(query.join(Task, Subtask.task_id == Task.id), uid)
+    grouped = {}
+    for task_id, sid, title, status in query.order_by(Subtask.id).all():
+        grouped.setdefault(task_id, []).append({'id': sid, 'title': title, 'status': status})
+    return grouped
+
+
+def _task_row_to_dict(r, fields, subtasks):
+    out = {}
+    for name in fields:
+        value = getattr(r, name)
+        if name in DATETIME_FIELDS and value is not None:
+            value = value.isoformat()
+        out[name] = value
+    # --- START FEATURE 6: Subtasks ---
+    if subtasks is not None:
+        out['subtasks'] = subtasks.get(r.id, [])
+    # --- END FEATURE 6: Subtasks ---
+    return out
+
+
+@bp.get('/tasks')
+@jwt_required()
+@versioned_response('tasks')
+def list_tasks():
+    uid = int(get_jwt_identity())
+
+    fields_arg = request.args.get('fields')
+    if fields_arg:
+        fields = ['id'] + [f for f in (x.strip() for x in fields_arg.split(',')) if f and f != 'id']
+        unknown = [f for f in fields if f not in TASK_FIELDS]
+        if unknown:
+            return jsonify({'message': f"unknown fields: {', '.join(unknown)}"}), 400
+    else:
+        fields = list(TASK_FIELDS)
+    include_arg = request.args.get('include')
+    if include_arg is not None:
+        with_subtasks = 'subtasks' in include_arg.split(',')
+    else:
+        # Full listing keeps its subtasks; sparse fieldsets opt in explicitly
+        with_subtasks = not fields_arg
+
+    limit = request.args.get('limit')
+    if limit is not None:
+        try:
+            limit = int(limit)
+        except ValueError:
+            return jsonify({'message': 'invalid limit'}), 400
+        limit = max(1, min(limit, MAX_PAGE_SIZE))
+    cursor = request.args.get('cursor')
+
+    columns = [TASK_FIELDS[f] for f in dict.fromkeys(list(fields) + list(SORT_FIELDS))]
+    query = _filter_tasks(db.session.query(*columns), uid)
+    if cursor:
+        try:
+            query = _after_cursor(query, _decode_cursor(cursor))
+        except (ValueError, TypeError):
+            return jsonify({'message': 'invalid cursor'}), 400
+    query = query.order_by(Task.priority_score.desc(), Task.due_date.asc().nullsfirst(), Task.id.asc())
+
+    if limit is None:
+        rows = query.all()
+        next_cursor = None
+    else:
+        # One extra row tells whether another page exists
+        rows = query.limit(limit + 1).all()
+        next_cursor = _encode_cursor(rows[limit - 1]) if len(rows) > limit else None
+        rows = rows[:limit]
+
+    subtasks = None
+    if with_subtasks:
+        if not rows:
+            subtasks = {}
+        elif limit is None:
+            subtasks = _subtasks_by_task(uid)
+        else:
+            subtasks = _subtasks_by_task(uid, [r.id for r in rows])
+    resp = jsonify([_task_row_to_dict(r, fields, subtasks) for r in rows])
+    if next_cursor:
+        resp.headers['X-Next-Cursor'] = next_cursor
+    return resp
+
+SEARCH_PAGE_SIZE = 20
+MAX_SEARCH_PAGE_SIZE = 100
+
+
+@bp.get('/tasks/search')
+@jwt_required()
+@versioned_response('search')
+def search_tasks_view():
+    uid = int(get_jwt_identity())
+    q = (request.args.get('q') or '').strip()
+    if not q:
+        return jsonify({'message': 'q is required'}), 400
+    try:
+        limit = max(1, min(int(request.args.get('limit', SEARCH_PAGE_SIZE)), MAX_SEARCH_PAGE_SIZE))
+    except ValueError:
+        return jsonify({'message': 'invalid limit'}), 400
+    offset = 0
+    cursor = request.args.get('cursor')
+    if cursor:
+        try:
+            offset = max(0, int(base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))))
+        except ValueError:
+            return jsonify({'message': 'invalid cursor'}), 400
+    results = search_tasks(uid, q, limit, offset)
+    for r in results:
+        if r['due_date'] is not None:
+            r['due_date'] = r['due_date'].isoformat()
+    resp = jsonify(results[:limit])
+    if len(results) > limit:
+        # Ranked results have no stable keyset; the cursor is an opaque offset
+        resp.headers['X-Next-Cursor'] = base64.urlsafe_b64encode(str(offset + limit).encode()).decode().rstrip('=')
+    return resp
 
 @bp.patch('/tasks/<int:task_id>')
 @jwt_required()
@@ -132,7 +370,7 @@ def update_task(task_id):
     for k in ['title','description','category','status','priority','estimated_hours']:
         if k in data:
             setattr(task, k, data[k])
-            if k in ['title', 'description', 'priority', 'estimated_hours']:
+            if k in ['title', 'description', 'category', 'priority', 'estimated_hours']:
                 recalculate_score = True
             
     if 'due_date' in data:
@@ -142,20 +380,61 @@ def update_task(task_id):
     if 'reminder_date' in data: # NEW: Handle reminder date update
         task.reminder_date = datetime.fromisoformat(data['reminder_date']) if data['reminder_date'] else None
 
-    # Recalculate AI score (if relevant fields changed)
     if recalculate_score:
         task_data = {
             'title': task.title,
             'description': task.description,
+            'category': task.category,
             'priority': task.priority,
             'due_date': task.due_date.isoformat() if task.due_date else None,
             'estimated_hours': task.estimated_hours
         }
-        task.priority_score = gemini_priority_score(task_data)
-        
+        # Provisional score, as in create_task; the scoring queue writes the real one back later
+        task.priority_score = provisional_score(task_data)
+        task.score_source = SOURCE_LOCAL
+
     db.session.commit()
+    if 'reminder_date' in data:
+        notify_reminder_changed(current_app._get_current_object(), task.id, task.reminder_date)
+
+    # Recalculate AI score in the background (if relevant fields changed)
+    if recalculate_score:
+        enqueue_priority_score(current_app._get_current_object(), task.id, task_data)
     return jsonify({'message': 'updated'})
 
+@bp.post('/tasks/rescore')
+@jwt_required()
+def rescore_tasks():
+    uid = int(get_jwt_identity())
+    data = request.get_json(silent=True) or {}
+    query = Task.query.filter_by(user_id=uid)
+    ids = data.get('ids')
+    if ids is not None and (not isinstance(ids, list)
+                            or not all(isinstance(i, int) and not isinstance(i, bool) for i in ids)):
+        return jsonify({'message': 'ids must be a list of task ids'}), 400
+    if ids is not None:
+        # An empty list rescores nothing; leave "ids" out to rescore the whole backlog
+        query = query.filter(Task.id.in_(ids))
+    if not data.get('include_completed'):
+        query = query.filter(Task.status != 'completed')
+    tasks = query.all()
+    if not tasks:
+        return jsonify({'rescored': 0})
+
+    scores, sources = score_many_with_sources([{
+        'title': t.title,
+        'description': t.description,
+        'category': t.category,
+        'priority': t.priority,
+        'due_date': t.due_date.isoformat() if t.due_date else None,
+        'estimated_hours': t.estimated_hours
+    } for t in tasks])
+    for t, score, source in zip(tasks, scores, sources):
+        t.priority_score = score
+        t.score_source = source
+    db.session.commit()
+    return jsonify({'rescored': len(tasks)})
+
 @bp.delete('/tasks/<int:task_id>')
 @jwt_required()
 def delete_task(task_id):
@@ -163,41 +442,69 @@ def delete_task(task_id):
     task = Task.query.filter_by(id=task_id, user_id=uid).first_or_404()
     db.session.delete(task)
     db.session.commit()
+    notify_reminder_changed(current_app._get_current_object(), task_id, None)
     return jsonify({'message': 'deleted'})
 
 @bp.get('/stats')
 @jwt_required()
+@versioned_response('stats', time_bucket=60)
 def stats():
     uid = int(get_jwt_identity())
-    total = Task.query.filter_by(user_id=uid).count()
-    completed = Task.query.filter_by(user_id=uid, status='completed').count()
-    pending = Task.query.filter_by(user_id=uid, status='pending').count()
-    in_progress = Task.query.filter_by(user_id=uid, status='in_progress').count()
-    return jsonify({'total': total, 'completed': completed, 'pending': pending, 'in_progress': in_progress})
+    due_soon_hours = current_app.config.get('STATS_DUE_SOON_HOURS', 24)
+    if counters_enabled(current_app):
+        return jsonify(counter_stats(uid, due_soon_hours=due_soon_hours))
+    return jsonify(compute_stats(uid, due_soon_hours=due_soon_hours))
 
 @bp.post('/export')
 @jwt_required()
 def export():
     uid = int(get_jwt_identity())
     fmt = (request.args.get('format') or 'excel').lower()
-    tasks = Task.query.filter_by(user_id=uid).all()
-    rows = []
-    for t in tasks:
-        rows.append({
-            'title': t.title,
-            'category': t.category,
-            'status': t.status,
-            'priority': t.priority,
-            'due_date': t.due_date.isoformat() if t.due_date else '',
-            'estimated_hours': t.estimated_hours or '',
-            'priority_score': t.priority_score,
-            'created_at': t.created_at.isoformat(),
-        })
     if fmt == 'pdf':
-        data = to_pdf(rows)
+        data = to_pdf(list(export_rows(uid)))
         return send_file(BytesIO(data), mimetype='application/pdf', as_attachment=True, download_name='tasks.pdf')
-    data = to_excel(rows)
-    return send_file(BytesIO(data), mimetype='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet', as_attachment=True, download_name='tasks.xlsx')
+    if fmt not in EXPORT_FORMATS:
+        return jsonify({'message': 'unsupported format'}), 400
+    writer, mimetype, ext = EXPORT_FORMATS[fmt]
+    # Rows are produced while the response is being sent, so memory stays flat
+    return Response(
+        stream_with_context(writer(export_rows(uid))),
+        mimetype=mimetype,
+        headers={'Content-Disposition': f'attachment; filename=tasks.{ext}'},
+    )
+
+@bp.post('/exports')
+@jwt_required()
+def create_export_job():
+    uid = int(get_jwt_identity())
+    data = request.get_json(silent=True) or {}
+    fmt = (data.get('format') or request.args.get('format') or 'pdf').lower()
+    if fmt not in EXPORT_FORMATS:
+        return jsonify({'message': 'unsupported format'}), 400
+    job = get_export_jobs(current_app).submit(uid, fmt)
+    # 200 when served straight from the artifact cache, 202 while rendering
+    return jsonify(job.to_dict()), 200 if job.status == 'done' else 202
+
+@bp.get('/exports/<job_id>')
+@jwt_required()
+def get_export_job(job_id):
+    uid = int(get_jwt_identity())
+    job = get_export_jobs(current_app).get(uid, job_id)
+    if job is None:
+        return jsonify({'message': 'not found'}), 404
+    return jsonify(job.to_dict())
+
+@bp.get('/exports/<job_id>/download')
+@jwt_required()
+def download_export(job_id):
+    uid = int(get_jwt_identity())
+    job = get_export_jobs(current_app).get(uid, job_id)
+    if job is None:
+        return jsonify({'message': 'not found'}), 404
+    if job.status != 'done':
+        return jsonify(job.to_dict()), 409
+    _, mimetype, ext = EXPORT_FORMATS[job.format]
+    return send_file(job.path, mimetype=mimetype, as_attachment=True, download_name=f'tasks.{ext}')
 
 @bp.post('/tasks/<int:task_id>/snooze')
 @jwt_required()
@@ -212,6 +519,7 @@ def snooze_task(task_id):
     base = task.reminder_date or datetime.now()
     task.reminder_date = base + timedelta(minutes=minutes)
     db.session.commit()
+    notify_reminder_changed(current_app._get_current_object(), task.id, task.reminder_date)
     return jsonify({'reminder_date': task.reminder_date.isoformat()})
 
 @bp.post('/tasks/<int:task_id>/subtasks')
@@ -247,10 +555,19 @@ def list_subtasks(task_id: int):
 @jwt_required()
 def update_subtask(subtask_id: int):
     uid = int(get_jwt_identity())
-    sub = Subtask.query.get_or_404(subtask_id)
+    # Subtask and owner in one query instead of a second lazy load of the parent task
+    row = (
+        db.session.query(Subtask, Task.user_id)
+        .join(Task, Subtask.task_id == Task.id)
+        .filter(Subtask.id == subtask_id)
+        .first()
+    )
+    if row is None:
+        abort(404)
+    sub, owner_id = row
 
     # Check ownership via the parent task
-    if sub.task.user_id != uid:
+    if owner_id != uid:
         return jsonify({'message': 'Forbidden'}), 403
 
     data = request.get_json() or {}
@@ -267,10 +584,19 @@ def update_subtask(subtask_id: int):
 @jwt_required()
 def delete_subtask(subtask_id: int):
     uid = int(get_jwt_identity())
-    sub = Subtask.query.get_or_404(subtask_id)
+    # Subtask and owner in one query instead of a second lazy load of the parent task
+    row = (
+        db.session.query(Subtask, Task.user_id)
+        .join(Task, Subtask.task_id == Task.id)
+        .filter(Subtask.id == subtask_id)
+        .first()
+    )
+    if row is None:
+        abort(404)
+    sub, owner_id = row
 
     # Check ownership via the parent task
-    if sub.task.user_id != uid:
+    if owner_id != uid:
         return jsonify({'message': 'Forbidden'}), 403
 
     db.session.delete(sub)
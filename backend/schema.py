@@ -0,0 +1,138 @@
+import time
+from sqlalchemy import create_engine, inspect, text
+from sqlalchemy.pool import StaticPool
+from .models import db
+from .services.search import install_search_index
+
+# Representative hot queries, written as the ORM emits them (SQLite dialect)
+HOT_QUERIES = {
+    'list_tasks': (
+        "SELECT id, title, status FROM task WHERE user_id = :uid "
+        "ORDER BY priority_score DESC, due_date ASC NULLS FIRST, id ASC LIMIT 50"
+    ),
+    'list_tasks_by_status': (
+        "SELECT id, title FROM task WHERE user_id = :uid AND status = 'pending' "
+        "ORDER BY priority_score DESC, due_date ASC NULLS FIRST, id ASC"
+    ),
+    'stats_by_status': "SELECT status, count(*) FROM task WHERE user_id = :uid GROUP BY status",
+    'subtasks_of_tasks': (
+        "SELECT subtask.task_id, subtask.id, subtask.title FROM subtask "
+        "JOIN task ON subtask.task_id = task.id WHERE task.user_id = :uid"
+    ),
+    'due_reminders': (
+        "SELECT id FROM task WHERE reminder_date IS NOT NULL AND reminder_date <= :now"
+    ),
+}
+
+
+def add_column_ddl(dialect, table, column) -> str:
+    # Identifiers quoted as the dialect needs: "user" is a reserved word on PostgreSQL
+    preparer = dialect.identifier_preparer
+    col_type = column.type.compile(dialect=dialect)
+    ddl = f'ALTER TABLE {preparer.format_table(table)} ADD COLUMN {preparer.format_column(column)} {col_type}'
+    if column.server_default is not None:
+        default = column.server_default.arg
+        # Quoted, so string defaults work too ('0' still fits integer columns)
+        ddl += " DEFAULT '{}'".format(str(default).replace("'", "''"))
+    return ddl
+
+
+def _add_missing_columns(conn):
+    """ALTER TABLE ADD COLUMN for model columns an older database file does not have yet."""
+    inspector = inspect(conn)
+    added = []
+    existing_tables = set(inspector.get_table_names())
+    for table in db.metadata.sorted_tables:
+        if table.name not in existing_tables:
+            continue
+        present = {c['name'] for c in inspector.get_columns(table.name)}
+        for column in table.columns:
+            if column.name in present:
+                continue
+            if column.primary_key or (not column.nullable and column.server_default is None):
+                raise RuntimeError(
+                    f'cannot add required column {table.name}.{column.name} to an existing table'
+                )
+            conn.execute(text(add_column_ddl(conn.dialect, table, column)))
+            added.append(f'{table.name}.{column.name}')
+    return added
+
+
+def _create_missing_indexes(conn):
+    inspector = inspect(conn)
+    created = []
+    for table in db.metadata.sorted_tables:
+        present = {ix['name'] for ix in inspector.get_indexes(table.name)}
+        for index in table.indexes:
+            if index.name not in present:
+                index.create(conn)
+                created.append(index.name)
+    return created
+
+
+def upgrade_schema(engine=None):
+    """
+    Brings an existing database (e.g. an old taskgenius.db) up to the current models:
+    new tables via create_all, then missing columns and indexes, then the SQLite
+    full-text search index. Safe to run on every start.
+    """
+    engine = engine or db.engine
+    db.metadata.create_all(engine)
+    with engine.begin() as conn:
+        added = _add_missing_columns(conn)
+        created = _create_missing_indexes(conn)
+        search_index = install_search_index(conn)
+        if created and conn.dialect.name == 'sqlite':
+            # Give the planner statistics for the new indexes
+            conn.execute(text('ANALYZE'))
+    return {'columns': added, 'indexes': created, 'search_index': search_index}
+
+
+def _explain(conn, sql, params):
+    if conn.dialect.name == 'sqlite':
+        rows = conn.execute(text('EXPLAIN QUERY PLAN ' + sql), params).fetchall()
+        plan = [r[-1] for r in rows]
+    else:
+        rows = conn.execute(text('EXPLAIN ' + sql), params).fetchall()
+        plan = [r[0] for r in rows]
+    start = time.perf_counter()
+    conn.execute(text(sql), params).fetchall()
+    return plan, (time.perf_counter() - start) * 1000.0
+
+
+def _sqlite_copy_without_indexes(engine):
+    """In-memory copy of a SQLite database with the managed indexes dropped."""
+    copy = create_engine('sqlite://', poolclass=StaticPool)
+    src = engine.raw_connection()
+    dst = copy.raw_connection()
+    try:
+        src.driver_connection.backup(dst.driver_connection)
+    finally:
+        src.close()
+        dst.close()
+    with copy.begin() as conn:
+        for table in db.metadata.sorted_tables:
+            for index in table.indexes:
+                conn.execute(text(f'DROP INDEX IF EXISTS {index.name}'))
+    return copy
+
+
+def explain_hot_queries(engine=None, uid=1, without_indexes=False):
+    """
+    Query plans and timings for HOT_QUERIES. With without_indexes=True they run against
+    an in-memory copy of the database minus the managed indexes, i.e. the "before" plans
+    on the same data. That comparison is SQLite-only.
+    """
+    from datetime import datetime
+    engine = engine or db.engine
+    if without_indexes:
+        if engine.dialect.name != 'sqlite':
+            raise RuntimeError('without_indexes comparison needs a SQLite database')
+        engine = _sqlite_copy_without_indexes(engine)
+    params = {'uid': uid, 'now': datetime.now()}
+    results = {}
+    with engine.connect() as conn:
+        for name, sql in HOT_QUERIES.items():
+            plan, ms = _explain(conn, sql, params)
+            results[name] = {'plan': plan, 'ms': round(ms, 3)}
+    return results
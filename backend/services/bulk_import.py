@@ -0,0 +1,104 @@
+import multiprocessing
+import os
+import re
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Sequence
+from .nlp import parse_task_text
+
+# Below this many lines the pool's startup and pickling cost more than it saves
+INLINE_PARSE_LINES = 64
+PARSE_CHUNK_LINES = 256
+
+_LIST_MARKER_RE = re.compile(r'^(?:[-*]\s+)?(?:\[[ xX]?\]\s*)?')
+
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_lock = threading.Lock()
+
+
+def _parse_pool() -> ProcessPoolExecutor:
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                workers = int(os.environ.get('BULK_PARSE_WORKERS', '0')) or min(4, os.cpu_count() or 1)
+                # spawn: forking a process that runs mail/scoring threads can inherit held locks
+                _pool = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn'))
+    return _pool
+
+
+def _parse_chunk(lines: Sequence[str]) -> List[Dict[str, Any]]:
+    """Runs in a pool worker. One result per line: the parsed dict or an error message."""
+    out = []
+    for line in lines:
+        try:
+            out.append({'parsed': parse_task_text(line)})
+        except Exception as e:
+            out.append({'error': f'{type(e).__name__}: {e}'})
+    return out
+
+
+def _discard_pool(pool: ProcessPoolExecutor):
+    """Drops a broken pool so the next call builds a fresh one."""
+    global _pool
+    with _pool_lock:
+        if _pool is pool:
+            _pool = None
+    pool.shutdown(wait=False, cancel_futures=True)
+
+
+def _map_chunks(chunks: List[Sequence[str]], results: List[Dict[str, Any]]) -> bool:
+    """Appends the parsed chunks to `results` in order; False if the pool broke part way."""
+    pool = _parse_pool()
+    try:
+        for part in pool.map(_parse_chunk, chunks):
+            results.extend(part)
+    except BrokenProcessPool:
+        # A worker died (e.g. killed by the OS for memory)
+        _discard_pool(pool)
+        return False
+    return True
+
+
+def parse_lines(lines: Sequence[str]) -> List[Dict[str, Any]]:
+    """
+    Parses many task lines, fanning out to a process pool for large inputs. If the pool
+    breaks, the unparsed lines get one more try on a fresh pool; if that breaks too they
+    come back as per-line errors rather than failing the whole import.
+    """
+    if len(lines) <= INLINE_PARSE_LINES:
+        return _parse_chunk(lines)
+    results: List[Dict[str, Any]] = []
+    for _ in range(2):
+        rest = lines[len(results):]
+        chunks = [rest[i:i + PARSE_CHUNK_LINES] for i in range(0, len(rest), PARSE_CHUNK_LINES)]
+        if _map_chunks(chunks, results):
+            return results
+    results.extend({'error': 'parser process crashed'} for _ in lines[len(results):])
+    return results
+
+
+def split_lines(text: str) -> List[str]:
+    """Non-empty lines of an upload, without leading '- ', '* ' or '[ ]' list markers."""
+    lines = []
+    for raw in text.splitlines():
+        line = _LIST_MARKER_RE.sub('', raw.strip(), count=1).strip()
+        if line:
+            lines.append(line)
+    return lines
+
+
+def task_row(uid: int, parsed: Dict[str, Any]) -> Dict[str, Any]:
+    """Insert parameters for one parsed line (Task column names)."""
+    return {
+        'user_id': uid,
+        'title': parsed['title'],
+        'category': parsed.get('category'),
+        'status': 'pending',
+        'priority': parsed.get('priority') or 'medium',
+        'due_date': datetime.fromisoformat(parsed['due_date']) if parsed.get('due_date') else None,
+        'estimated_hours': parsed.get('estimated_hours'),
+        'reminder_date': datetime.fromisoformat(parsed['reminder_date']) if parsed.get('reminder_date') else None,
+    }
@@ -1,27 +1,227 @@
+import hashlib
 import os
+import queue
 import smtplib
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
 from email.message import EmailMessage
+from typing import Dict, Any, Optional
+from ..instrumentation import span, timed
 
-SMTP_HOST = os.environ.get('SMTP_HOST', 'smtp.gmail.com')
-SMTP_PORT = int(os.environ.get('SMTP_PORT', '587'))
-SMTP_USER = os.environ.get('SMTP_USER') or os.environ.get('GMAIL_USER')
-SMTP_PASSWORD = os.environ.get('SMTP_PASSWORD') or os.environ.get('GMAIL_APP_PASSWORD')
-FROM_NAME = os.environ.get('MAIL_FROM_NAME', 'Task Manager')
-FROM_EMAIL = os.environ.get('MAIL_FROM_EMAIL') or SMTP_USER
+# Errors that mean the message itself was rejected; reconnecting will not help
+PERMANENT_ERRORS = (smtplib.SMTPRecipientsRefused, smtplib.SMTPSenderRefused, smtplib.SMTPDataError)
 
 
-def send_email(subject: str, to_email: str, body: str):
-    if not SMTP_USER or not SMTP_PASSWORD or not FROM_EMAIL:
-        raise RuntimeError('SMTP is not configured. Set SMTP_USER/GMAIL_USER and SMTP_PASSWORD/GMAIL_APP_PASSWORD.')
+def smtp_settings() -> Dict[str, Any]:
+    # Read at call time so values from backend/.env (loaded in create_app) are seen
+    user = os.environ.get('SMTP_USER') or os.environ.get('GMAIL_USER')
+    return {
+        'host': os.environ.get('SMTP_HOST', 'smtp.gmail.com'),
+        'port': int(os.environ.get('SMTP_PORT', '587')),
+        'user': user,
+        'password': os.environ.get('SMTP_PASSWORD') or os.environ.get('GMAIL_APP_PASSWORD'),
+        'from_name': os.environ.get('MAIL_FROM_NAME', 'Task Manager'),
+        'from_email': os.environ.get('MAIL_FROM_EMAIL') or user,
+        'starttls': os.environ.get('SMTP_STARTTLS', 'true').lower() not in ('0', 'false', 'no'),
+        'timeout': float(os.environ.get('SMTP_TIMEOUT', '30')),
+    }
+
+
+def message_id_header(key: str) -> str:
+    """
+    Message-ID for an idempotency key. Stable, so receivers drop a redelivered copy;
+    hashed, because keys may hold characters (such as ':') that a msg-id cannot.
+    """
+    return f"<{hashlib.sha256(key.encode('utf-8')).hexdigest()[:32]}@taskgenius>"
 
+
+def _build_message(settings, subject: str, to_email: str, body: str,
+                   message_id: Optional[str] = None) -> EmailMessage:
     msg = EmailMessage()
     msg['Subject'] = subject
-    msg['From'] = f"{FROM_NAME} <{FROM_EMAIL}>"
+    msg['From'] = f"{settings['from_name']} <{settings['from_email']}>"
     msg['To'] = to_email
+    if message_id:
+        msg['Message-ID'] = message_id_header(message_id)
     msg.set_content(body)
+    return msg
+
+
+class MailDispatcher:
+    """
+    Outbound mail queue drained by a few worker threads. Each worker keeps one
+    authenticated SMTP session open and reuses it for every message it sends,
+    reconnecting with exponential backoff when the session drops. Idle sessions are
+    closed after `idle_timeout` seconds.
+    """
+
+    def __init__(self, settings: Dict[str, Any], workers: int = 2, max_attempts: int = 3,
+                 backoff: float = 1.0, max_backoff: float = 30.0, idle_timeout: float = 60.0,
+                 smtp_factory=None):
+        self.settings = settings
+        self.workers = workers
+        self.max_attempts = max_attempts
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.idle_timeout = idle_timeout
+        self.smtp_factory = smtp_factory or smtplib.SMTP
+        self._queue: "queue.Queue" = queue.Queue()
+        self._lock = threading.Lock()
+        self._threads = []
+        self._latencies = deque(maxlen=1000)
+        self._started_at = time.monotonic()
+        self.sent = 0
+        self.failed = 0
+        self.retries = 0
+        self.connects = 0
+
+    def start(self):
+        for i in range(self.workers):
+            t = threading.Thread(target=self._run, name=f'mail-{i}', daemon=True)
+            t.start()
+            self._threads.append(t)
+
+    def submit(self, msg: EmailMessage) -> Future:
+        future: Future = Future()
+        self._queue.put((msg, future, time.monotonic()))
+        return future
+
+    def _connect(self):
+        s = self.settings
+        server = self.smtp_factory(s['host'], s['port'], timeout=s['timeout'])
+        try:
+            server.ehlo()
+            if s['starttls'] and server.has_extn('starttls'):
+                server.starttls()
+                server.ehlo()
+            if s['user'] and s['password']:
+                server.login(s['user'], s['password'])
+        except Exception:
+            self._close(server)
+            raise
+        with self._lock:
+            self.connects += 1
+        return server
+
+    @staticmethod
+    def _close(server):
+        if server is None:
+            return
+        try:
+            server.quit()
+        except Exception:
+            try:
+                server.close()
+            except Exception:
+                pass
+
+    def _run(self):
+        server = None
+        delay = self.backoff
+        while True:
+            try:
+                msg, future, queued_at = self._queue.get(timeout=self.idle_timeout)
+            except queue.Empty:
+                self._close(server)
+                server = None
+                continue
+            error: Optional[BaseException] = None
+            for attempt in range(self.max_attempts):
+                try:
+                    if server is None:
+                        server = self._connect()
+                    with span('smtp_send'):
+                        server.send_message(msg)
+                    error = None
+                    delay = self.backoff
+                    break
+                except PERMANENT_ERRORS as e:
+                    # Session is still usable; the message is not
+                    error = e
+                    break
+                except Exception as e:
+                    error = e
+                    self._close(server)
+                    server = None
+                    if attempt + 1 < self.max_attempts:
+                        with self._lock:
+                            self.retries += 1
+                        time.sleep(delay)
+                        delay = min(delay * 2, self.max_backoff)
+            with self._lock:
+                if error is None:
+                    self.sent += 1
+                    self._latencies.append(time.monotonic() - queued_at)
+                else:
+                    self.failed += 1
+            if error is None:
+                future.set_result(True)
+            else:
+                future.set_exception(error)
+            self._queue.task_done()
+
+    def join(self):
+        self._queue.join()
 
-    with smtplib.SMTP(SMTP_HOST, SMTP_PORT) as server:
-        server.ehlo()
-        server.starttls()
-        server.login(SMTP_USER, SMTP_PASSWORD)
-        server.send_message(msg)
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            latencies = sorted(self._latencies)
+            elapsed = time.monotonic() - self._started_at
+
+            def pct(p):
+                return round(latencies[min(len(latencies) - 1, int(p * len(latencies)))], 4) if latencies else 0.0
+
+            return {
+                'queue_depth': self._queue.qsize(),
+                'workers': self.workers,
+                'sent': self.sent,
+                'failed': self.failed,
+                'retries': self.retries,
+                'connects': self.connects,
+                'messages_per_connect': round(self.sent / self.connects, 2) if self.connects else 0.0,
+                'throughput_per_sec': round(self.sent / elapsed, 3) if elapsed > 0 else 0.0,
+                'latency_p50_seconds': pct(0.5),
+                'latency_p95_seconds': pct(0.95),
+            }
+
+
+_dispatcher: Optional[MailDispatcher] = None
+_dispatcher_lock = threading.Lock()
+
+
+def get_mail_dispatcher() -> MailDispatcher:
+    global _dispatcher
+    if _dispatcher is None:
+        with _dispatcher_lock:
+            if _dispatcher is None:
+                d = MailDispatcher(
+                    smtp_settings(),
+                    workers=int(os.environ.get('SMTP_POOL_SIZE', '2')),
+                    max_attempts=int(os.environ.get('SMTP_MAX_ATTEMPTS', '3')),
+                    idle_timeout=float(os.environ.get('SMTP_IDLE_TIMEOUT', '60')),
+                )
+                d.start()
+                _dispatcher = d
+    return _dispatcher
+
+
+def _check_configured(settings):
+    # Credentials are optional only for an explicitly configured sender (e.g. a local relay)
+    authenticated = settings['user'] and settings['password']
+    if not settings['from_email'] or not (authenticated or os.environ.get('MAIL_FROM_EMAIL')):
+        raise RuntimeError('SMTP is not configured. Set SMTP_USER/GMAIL_USER and SMTP_PASSWORD/GMAIL_APP_PASSWORD.')
+
+
+def queue_email(subject: str, to_email: str, body: str, message_id: Optional[str] = None) -> Future:
+    """Queues a message on the pooled dispatcher; the Future resolves once it is sent."""
+    settings = smtp_settings()
+    _check_configured(settings)
+    return get_mail_dispatcher().submit(_build_message(settings, subject, to_email, body, message_id))
+
+
+@timed('send_email')
+def send_email(subject: str, to_email: str, body: str):
+    # Blocks until sent, but over a pooled session instead of a fresh handshake
+    queue_email(subject, to_email, body).result()
@@ -0,0 +1,186 @@
+import glob
+import hashlib
+import os
+import re
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from typing import Dict, Any, Optional
+from sqlalchemy import select
+from ..models import db, Task, User
+from .exports import to_pdf, stream_csv, stream_excel, stream_ndjson
+
+EXPORT_CHUNK_ROWS = 1000
+_JOB_ID_RE = re.compile(r'^[a-z]+-[0-9a-f]{32}$')
+
+# format -> (writer, mimetype, file extension); writers take an iterable of row dicts
+# and yield bytes, except pdf which renders a list in one go
+EXPORT_FORMATS = {
+    'excel': (stream_excel, 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet', 'xlsx'),
+    'csv': (stream_csv, 'text/csv', 'csv'),
+    'ndjson': (stream_ndjson, 'application/x-ndjson', 'ndjson'),
+    'pdf': (lambda rows: iter([to_pdf(list(rows))]), 'application/pdf', 'pdf'),
+}
+
+
+def export_rows(uid: int):
+    """Yields export dicts, reading the user's tasks in chunks through a server-side cursor."""
+    query = (
+        db.session.query(Task.title, Task.category, Task.status, Task.priority, Task.due_date,
+                         Task.estimated_hours, Task.priority_score, Task.created_at)
+        .filter(Task.user_id == uid)
+        .order_by(Task.id)
+        .execution_options(yield_per=EXPORT_CHUNK_ROWS)
+    )
+    for t in query:
+        yield {
+            'title': t.title,
+            'category': t.category,
+            'status': t.status,
+            'priority': t.priority,
+            'due_date': t.due_date.isoformat() if t.due_date else '',
+            'estimated_hours': t.estimated_hours or '',
+            'priority_score': t.priority_score,
+            'created_at': t.created_at.isoformat(),
+        }
+
+
+def data_fingerprint(uid: int) -> str:
+    """
+    Changes whenever the export would: derived from the user's data version, no table
+    scan. created_at keeps a recreated database from matching old artifacts.
+    """
+    row = db.session.execute(select(User.created_at, User.data_version).where(User.id == uid)).first()
+    return hashlib.sha256(repr((uid, tuple(row) if row else None)).encode('utf-8')).hexdigest()
+
+
+class ExportJob:
+    def __init__(self, job_id: str, user_id: int, fmt: str, path: str):
+        self.id = job_id
+        self.user_id = user_id
+        self.format = fmt
+        self.path = path
+        self.status = 'queued'
+        self.error: Optional[str] = None
+        self.created_at = datetime.utcnow()
+        self.finished_at: Optional[datetime] = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'id': self.id,
+            'format': self.format,
+            'status': self.status,
+            'error': self.error,
+            'created_at': self.created_at.isoformat(),
+            'finished_at': self.finished_at.isoformat() if self.finished_at else None,
+        }
+
+
+class ExportJobManager:
+    """
+    Renders exports on a worker pool. Artifacts are cached on disk under a name derived
+    from user, format and data fingerprint, and that name doubles as the job id: an
+    unchanged export is served from disk at once, a repeated request while rendering
+    joins the running job, and any process sharing the cache dir can serve the result.
+    """
+
+    def __init__(self, app, cache_dir: str, workers: int = 2):
+        self.app = app
+        self.cache_dir = cache_dir
+        os.makedirs(cache_dir, exist_ok=True)
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='export')
+        self._jobs: Dict[tuple, ExportJob] = {}
+        self._lock = threading.Lock()
+
+    def _path(self, uid: int, fmt: str, job_id: str) -> str:
+        return os.path.join(self.cache_dir, f'{uid}-{job_id}.{EXPORT_FORMATS[fmt][2]}')
+
+    def _prune(self):
+        # Finished jobs stay reachable through their artifact on disk
+        cutoff = datetime.utcnow() - timedelta(hours=1)
+        for key, job in list(self._jobs.items()):
+            if job.finished_at and job.finished_at < cutoff:
+                del self._jobs[key]
+
+    def submit(self, uid: int, fmt: str) -> ExportJob:
+        """Must run inside an app context (computes the fingerprint)."""
+        job_id = f'{fmt}-{data_fingerprint(uid)[:32]}'
+        path = self._path(uid, fmt, job_id)
+        with self._lock:
+            self._prune()
+            job = self._jobs.get((uid, job_id))
+            if job is not None and job.status in ('queued', 'running', 'done'):
+                if job.status != 'done' or os.path.exists(path):
+                    return job
+            job = ExportJob(job_id, uid, fmt, path)
+            self._jobs[(uid, job_id)] = job
+        if os.path.exists(path):
+            job.status = 'done'
+            job.finished_at = datetime.utcnow()
+            return job
+        self._pool.submit(self._render, job)
+        return job
+
+    def get(self, uid: int, job_id: str) -> Optional[ExportJob]:
+        if not _JOB_ID_RE.match(job_id):
+            return None
+        with self._lock:
+            job = self._jobs.get((uid, job_id))
+        if job is not None:
+            return job
+        # Rendered by another process (or before a restart)
+        fmt = job_id.split('-', 1)[0]
+        if fmt in EXPORT_FORMATS:
+            path = self._path(uid, fmt, job_id)
+            if os.path.exists(path):
+                job = ExportJob(job_id, uid, fmt, path)
+                job.status = 'done'
+                return job
+        return None
+
+    def _render(self, job: ExportJob):
+        job.status = 'running'
+        fd, tmp = tempfile.mkstemp(dir=self.cache_dir, suffix='.part')
+        try:
+            writer = EXPORT_FORMATS[job.format][0]
+            with self.app.app_context(), os.fdopen(fd, 'wb') as f:
+                for chunk in writer(export_rows(job.user_id)):
+                    f.write(chunk)
+            # Atomic publish: readers never see a half-written artifact
+            os.replace(tmp, job.path)
+            self._evict_older(job)
+            job.status = 'done'
+        except Exception as e:
+            job.status = 'failed'
+            job.error = f'{type(e).__name__}: {e}'
+            if os.path.exists(tmp):
+                os.remove(tmp)
+        finally:
+            job.finished_at = datetime.utcnow()
+
+    def _evict_older(self, job: ExportJob):
+        """Older artifacts of the same user and format are stale once a new one exists."""
+        ext = EXPORT_FORMATS[job.format][2]
+        for path in glob.glob(os.path.join(self.cache_dir, f'{job.user_id}-{job.format}-*.{ext}')):
+            if path != job.path:
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+
+
+def get_export_jobs(app) -> Optional[ExportJobManager]:
+    return getattr(app, '_export_jobs', None)
+
+
+def init_export_jobs(app) -> ExportJobManager:
+    if get_export_jobs(app) is not None:
+        return get_export_jobs(app)
+    manager = ExportJobManager(
+        app,
+        cache_dir=app.config.get('EXPORT_CACHE_DIR') or os.path.join(tempfile.gettempdir(), 'taskgenius-exports'),
+        workers=app.config.get('EXPORT_WORKERS', 2),
+    )
+    setattr(app, '_export_jobs', manager)
+    return manager
@@ -1,17 +1,93 @@
+import csv
 import io
-import pandas as pd
-from xhtml2pdf import pisa
+import json
+import os
+import tempfile
+from ..instrumentation import timed
+
+EXPORT_COLUMNS = ['title', 'category', 'status', 'priority', 'due_date', 'estimated_hours',
+                  'priority_score', 'created_at']
+STREAM_CHUNK_BYTES = 64 * 1024
+
+
+class _LineBuffer:
+    """Write target for csv.writer that hands back what was written since the last drain."""
+
+    def __init__(self):
+        self._parts = []
+
+    def write(self, s):
+        self._parts.append(s)
+
+    def drain(self) -> str:
+        out = ''.join(self._parts)
+        self._parts.clear()
+        return out
+
+
+@timed('export_csv')
+def stream_csv(rows):
+    """Yields CSV in ~64 KiB chunks from an iterable of dicts keyed by EXPORT_COLUMNS."""
+    buf = _LineBuffer()
+    writer = csv.writer(buf)
+    writer.writerow(EXPORT_COLUMNS)
+    size = 0
+    for row in rows:
+        writer.writerow([row.get(k, '') for k in EXPORT_COLUMNS])
+        size += 1
+        if size >= 500:
+            yield buf.drain().encode('utf-8')
+            size = 0
+    tail = buf.drain()
+    if tail:
+        yield tail.encode('utf-8')
+
+
+@timed('export_ndjson')
+def stream_ndjson(rows):
+    """One JSON object per line, batched into chunks."""
+    lines = []
+    for row in rows:
+        lines.append(json.dumps({k: row.get(k, '') for k in EXPORT_COLUMNS}, default=str))
+        if len(lines) >= 500:
+            yield ('\n'.join(lines) + '\n').encode('utf-8')
+            lines = []
+    if lines:
+        yield ('\n'.join(lines) + '\n').encode('utf-8')
+
+
+@timed('export_excel')
+def stream_excel(rows):
+    """
+    Writes rows with openpyxl's write-only workbook (rows go straight to temporary XML
+    parts instead of a cell tree) into a temp file, then yields that file in chunks.
+    """
+    from openpyxl import Workbook
+
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet('Tasks')
+    ws.append(EXPORT_COLUMNS)
+    for row in rows:
+        ws.append([row.get(k, '') for k in EXPORT_COLUMNS])
+    fd, path = tempfile.mkstemp(suffix='.xlsx')
+    os.close(fd)
+    try:
+        wb.save(path)
+        with open(path, 'rb') as f:
+            while True:
+                chunk = f.read(STREAM_CHUNK_BYTES)
+                if not chunk:
+                    break
+                yield chunk
+    finally:
+        os.remove(path)
 
 
 def to_excel(tasks):
-    df = pd.DataFrame(tasks)
-    buf = io.BytesIO()
-    with pd.ExcelWriter(buf, engine='openpyxl') as writer:
-        df.to_excel(writer, index=False, sheet_name='Tasks')
-    buf.seek(0)
-    return buf.read()
+    return b''.join(stream_excel(tasks))
 
 
+@timed('export_pdf')
 def to_pdf(tasks):
     html = """
     <html><body>
@@ -29,6 +105,9 @@ def to_pdf(tasks):
         headers = ''.join(f'<th>{k}</th>' for k in tasks[0].keys())
         rows = '\n'.join('<tr>' + ''.join(f'<td>{row.get(k, "")}</td>' for k in tasks[0].keys()) + '</tr>' for row in tasks)
     html = html.format(headers, rows)
+    # xhtml2pdf (and reportlab behind it) is heavy; only PDF exports pay for the import
+    from xhtml2pdf import pisa
+
     buf = io.BytesIO()
     pisa.CreatePDF(io.StringIO(html), dest=buf)
     buf.seek(0)
@@ -0,0 +1,218 @@
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+from typing import Any, Dict, Optional
+from ..instrumentation import Counter, Histogram, METRICS
+
+DEFAULT_BASE_URL = 'https://generativelanguage.googleapis.com'
+API_VERSION = 'v1beta'
+
+GEMINI_CALLS = Counter('taskgenius_gemini_calls_total', 'Gemini calls by outcome.', ('outcome',))
+GEMINI_SECONDS = Histogram('taskgenius_gemini_call_duration_seconds', 'Latency of Gemini calls that were sent.',
+                           ('outcome',))
+GEMINI_FALLBACKS = Counter('taskgenius_gemini_fallbacks_total', 'Tasks scored by the local model instead of Gemini.')
+METRICS.extend([GEMINI_CALLS, GEMINI_SECONDS, GEMINI_FALLBACKS])
+
+_client: Optional['GeminiClient'] = None
+_client_lock = threading.Lock()
+
+
+class GeminiError(Exception):
+    pass
+
+
+class CircuitBreaker:
+    """
+    Opens after `threshold` consecutive failures; while open every call is refused.
+    After `reset_after` seconds a single trial call is let through (half-open): success
+    closes the breaker, failure opens it again.
+    """
+
+    def __init__(self, threshold: int = 5, reset_after: float = 30.0):
+        self.threshold = threshold
+        self.reset_after = reset_after
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self.times_opened = 0
+        self._trial_running = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            return self._state(time.monotonic())
+
+    def _state(self, now: float) -> str:
+        if self.opened_at is None:
+            return 'closed'
+        if now - self.opened_at >= self.reset_after:
+            return 'half_open'
+        return 'open'
+
+    def allow(self) -> bool:
+        with self._lock:
+            state = self._state(time.monotonic())
+            if state == 'closed':
+                return True
+            if state == 'half_open' and not self._trial_running:
+                self._trial_running = True
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+            self._trial_running = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self._trial_running or (self.opened_at is None and self.failures >= self.threshold):
+                self.opened_at = time.monotonic()
+                self.times_opened += 1
+            self._trial_running = False
+
+
+class GeminiClient:
+    """
+    Process-wide Gemini client: one pooled keep-alive HTTP session, a hard deadline per
+    call, at most `max_concurrency` calls in flight and a circuit breaker. `generate`
+    never raises; it returns None whenever the caller should fall back.
+    """
+
+    def __init__(self, api_key: str, model: str, base_url: str = DEFAULT_BASE_URL, timeout: float = 10.0,
+                 max_concurrency: int = 4, breaker: Optional[CircuitBreaker] = None, session=None):
+        self.api_key = api_key
+        self.model = model
+        self.url = f"{base_url.rstrip('/')}/{API_VERSION}/models/{model}:generateContent"
+        self.timeout = timeout
+        self.max_concurrency = max_concurrency
+        self.breaker = breaker or CircuitBreaker()
+        self._session = session
+        self._session_lock = threading.Lock()
+        # Released when the HTTP call really finishes, not when the caller gives up on it,
+        # so calls abandoned after their deadline still count against the limit
+        self._slots = threading.BoundedSemaphore(max_concurrency)
+        self._executor = ThreadPoolExecutor(max_workers=max_concurrency, thread_name_prefix='gemini')
+        self._lock = threading.Lock()
+        self._latencies: deque = deque(maxlen=512)
+        self.counts = {'calls': 0, 'ok': 0, 'errors': 0, 'timeouts': 0, 'rejected': 0,
+                       'short_circuited': 0, 'fallbacks': 0}
+
+    def _http(self):
+        if self._session is None:
+            with self._session_lock:
+                if self._session is None:
+                    import requests
+                    from requests.adapters import HTTPAdapter
+                    session = requests.Session()
+                    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.max_concurrency)
+                    session.mount('https://', adapter)
+                    session.mount('http://', adapter)
+                    session.headers.update({'x-goog-api-key': self.api_key, 'Content-Type': 'application/json'})
+                    self._session = session
+        return self._session
+
+    def _count(self, outcome: str, elapsed: Optional[float] = None):
+        GEMINI_CALLS.inc(outcome)
+        with self._lock:
+            self.counts[outcome] += 1
+            if elapsed is not None:
+                self._latencies.append(elapsed)
+        if elapsed is not None:
+            GEMINI_SECONDS.observe(elapsed, outcome)
+
+    def count_fallbacks(self, n: int = 1):
+        if n > 0:
+            GEMINI_FALLBACKS.inc(amount=n)
+            with self._lock:
+                self.counts['fallbacks'] += n
+
+    def _post(self, payload: Dict[str, Any]) -> str:
+        # The read timeout matches the deadline so an abandoned call frees its slot soon after
+        resp = self._http().post(self.url, json=payload, timeout=(min(self.timeout, 5.0), self.timeout))
+        if resp.status_code != 200:
+            raise GeminiError(f'HTTP {resp.status_code}: {resp.text[:200]}')
+        data = resp.json()
+        try:
+            parts = data['candidates'][0]['content']['parts']
+        except (KeyError, IndexError, TypeError):
+            raise GeminiError(f'unexpected response: {str(data)[:200]}')
+        return ''.join(p.get('text', '') for p in parts if isinstance(p, dict))
+
+    def generate(self, system_prompt: str, user_prompt: str, temperature: float = 0.2) -> Optional[str]:
+        """One JSON-mode model call; the response text, or None on any failure."""
+        with self._lock:
+            self.counts['calls'] += 1
+        if not self.breaker.allow():
+            self._count('short_circuited')
+            return None
+        deadline = time.monotonic() + self.timeout
+        if not self._slots.acquire(timeout=self.timeout):
+            # Every slot stayed busy for a whole deadline, so upstream is slow: treat it as a failure
+            self._count('rejected')
+            self.breaker.record_failure()
+            return None
+        payload = {
+            'systemInstruction': {'parts': [{'text': system_prompt}]},
+            'contents': [{'role': 'user', 'parts': [{'text': user_prompt}]}],
+            'generationConfig': {'temperature': temperature, 'responseMimeType': 'application/json'},
+        }
+        start = time.perf_counter()
+        future = self._executor.submit(self._post, payload)
+        future.add_done_callback(lambda _: self._slots.release())
+        try:
+            text = future.result(timeout=max(0.0, deadline - time.monotonic()))
+        except FutureTimeout:
+            self._count('timeouts', time.perf_counter() - start)
+            self.breaker.record_failure()
+            return None
+        except Exception:
+            self._count('errors', time.perf_counter() - start)
+            self.breaker.record_failure()
+            return None
+        self._count('ok', time.perf_counter() - start)
+        self.breaker.record_success()
+        return text or None
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            counts = dict(self.counts)
+            latencies = sorted(self._latencies)
+        if latencies:
+            counts['p50_ms'] = round(latencies[len(latencies) // 2] * 1000, 1)
+            counts['p95_ms'] = round(latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))] * 1000, 1)
+        counts.update({
+            'breaker': self.breaker.state,
+            'breaker_opened': self.breaker.times_opened,
+            'timeout_seconds': self.timeout,
+            'max_concurrency': self.max_concurrency,
+        })
+        return counts
+
+
+def get_gemini_client() -> Optional[GeminiClient]:
+    """The shared client, built from the environment on first use; None without GEMINI_API_KEY."""
+    global _client
+    if _client is None:
+        api_key = os.environ.get('GEMINI_API_KEY')
+        if not api_key:
+            return None
+        from .ml import MODEL_NAME
+        with _client_lock:
+            if _client is None:
+                _client = GeminiClient(
+                    api_key,
+                    model=os.environ.get('GEMINI_MODEL') or MODEL_NAME,
+                    base_url=os.environ.get('GEMINI_BASE_URL') or DEFAULT_BASE_URL,
+                    timeout=float(os.environ.get('GEMINI_TIMEOUT', '10')),
+                    max_concurrency=int(os.environ.get('GEMINI_MAX_CONCURRENCY', '4')),
+                    breaker=CircuitBreaker(
+                        threshold=int(os.environ.get('GEMINI_BREAKER_THRESHOLD', '5')),
+                        reset_after=float(os.environ.get('GEMINI_BREAKER_RESET_SECONDS', '30')),
+                    ),
+                )
+    return _client
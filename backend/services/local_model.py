@@ -0,0 +1,210 @@
+import json
+import os
+import re
+import threading
+from datetime import datetime
+from typing import Dict, Any, List, Optional, Sequence
+
+import numpy as np
+
+from .nlp import PRIORITY_WORDS, CATEGORIES
+
+FEATURES = (
+    'urgency',          # exp(-days_left / 3), 1.0 when due now or overdue
+    'overdue',
+    'no_due',
+    'log_hours',
+    'priority_low',
+    'priority_high',
+    'category_work',
+    'category_study',
+    'category_personal',
+    'kw_high',
+    'kw_low',
+)
+
+# Hand-tuned logit weights; train_from_history() replaces them with fitted ones
+DEFAULT_WEIGHTS = np.array([2.2, 1.5, -0.3, 0.25, -1.0, 1.0, 0.2, 0.15, 0.0, 0.8, -0.6])
+DEFAULT_BIAS = -0.4
+
+_HIGH_RE = re.compile(r"\b(?:" + "|".join(map(re.escape, PRIORITY_WORDS['high'])) + r")\b", re.I)
+_LOW_RE = re.compile(r"\b(?:" + "|".join(map(re.escape, PRIORITY_WORDS['low'])) + r")\b", re.I)
+_CATEGORY_INDEX = {cat: FEATURES.index(f'category_{cat}') for cat in CATEGORIES}
+
+
+def _to_datetime(value) -> Optional[datetime]:
+    if value is None or value == '':
+        return None
+    if isinstance(value, datetime):
+        dt = value
+    else:
+        try:
+            dt = datetime.fromisoformat(str(value))
+        except ValueError:
+            return None
+    return dt.replace(tzinfo=None) if dt.tzinfo else dt
+
+
+def build_features(tasks: Sequence[Dict[str, Any]], now: Optional[datetime] = None) -> np.ndarray:
+    """Feature matrix with one row per task, columns as in FEATURES."""
+    now = now or datetime.now()
+    n = len(tasks)
+    X = np.zeros((n, len(FEATURES)), dtype=np.float64)
+    if n == 0:
+        return X
+
+    days = np.full(n, np.nan)
+    hours = np.zeros(n)
+    for i, t in enumerate(tasks):
+        due = _to_datetime(t.get('due_date'))
+        if due is not None:
+            days[i] = (due - now).total_seconds() / 86400.0
+        est = t.get('estimated_hours')
+        if isinstance(est, (int, float)) and est > 0:
+            hours[i] = est
+        priority = (t.get('priority') or 'medium').lower()
+        if priority == 'low':
+            X[i, 4] = 1.0
+        elif priority == 'high':
+            X[i, 5] = 1.0
+        col = _CATEGORY_INDEX.get((t.get('category') or '').lower())
+        if col is not None:
+            X[i, col] = 1.0
+        text = f"{t.get('title') or ''} {t.get('description') or ''}"
+        if _HIGH_RE.search(text):
+            X[i, 9] = 1.0
+        if _LOW_RE.search(text):
+            X[i, 10] = 1.0
+
+    has_due = ~np.isnan(days)
+    X[:, 0] = np.where(has_due, np.exp(-np.clip(np.nan_to_num(days), 0.0, None) / 3.0), 0.0)
+    X[:, 1] = (has_due & (np.nan_to_num(days) < 0)).astype(np.float64)
+    X[:, 2] = (~has_due).astype(np.float64)
+    X[:, 3] = np.log1p(hours)
+    return X
+
+
+class LocalPriorityModel:
+    """
+    Deterministic logistic scorer over task features. Scores are 100 * sigmoid(X.w + b),
+    so a whole backlog is scored with one matrix product.
+    """
+
+    def __init__(self, weights: Optional[Sequence[float]] = None, bias: float = DEFAULT_BIAS):
+        self.weights = np.asarray(weights if weights is not None else DEFAULT_WEIGHTS, dtype=np.float64)
+        self.bias = float(bias)
+        self.trained_on = 0
+
+    def score_matrix(self, X: np.ndarray) -> np.ndarray:
+        z = X @ self.weights + self.bias
+        return np.round(100.0 / (1.0 + np.exp(-z)), 2)
+
+    def score_many(self, tasks: Sequence[Dict[str, Any]], now: Optional[datetime] = None) -> List[float]:
+        return self.score_matrix(build_features(tasks, now)).tolist()
+
+    def score(self, task_data: Dict[str, Any], now: Optional[datetime] = None) -> float:
+        return self.score_many([task_data], now)[0]
+
+    def fit(self, tasks: Sequence[Dict[str, Any]], targets: Sequence[float],
+            sample_weight: Optional[Sequence[float]] = None, now: Optional[datetime] = None):
+        """Fits the weights to past scores (0-100) by ridge regression in logit space."""
+        return self.fit_matrix(build_features(tasks, now), targets, sample_weight)
+
+    def fit_matrix(self, X: np.ndarray, targets: Sequence[float],
+                   sample_weight: Optional[Sequence[float]] = None):
+        from sklearn.linear_model import Ridge
+
+        y = np.clip(np.asarray(targets, dtype=np.float64) / 100.0, 0.01, 0.99)
+        reg = Ridge(alpha=1.0)
+        reg.fit(X, np.log(y / (1.0 - y)), sample_weight=sample_weight)
+        self.weights = reg.coef_.astype(np.float64)
+        self.bias = float(reg.intercept_)
+        self.trained_on = len(X)
+        return self
+
+    def save(self, path: str):
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump({'features': FEATURES, 'weights': self.weights.tolist(),
+                       'bias': self.bias, 'trained_on': self.trained_on}, f)
+
+    @classmethod
+    def load(cls, path: str) -> 'LocalPriorityModel':
+        with open(path, encoding='utf-8') as f:
+            obj = json.load(f)
+        if tuple(obj.get('features', ())) != FEATURES:
+            raise ValueError('local model was trained on a different feature set')
+        model = cls(obj['weights'], obj['bias'])
+        model.trained_on = obj.get('trained_on', 0)
+        return model
+
+
+_model: Optional[LocalPriorityModel] = None
+_model_lock = threading.Lock()
+
+
+def get_local_model() -> LocalPriorityModel:
+    global _model
+    if _model is None:
+        with _model_lock:
+            if _model is None:
+                path = os.environ.get('LOCAL_MODEL_PATH')
+                model = None
+                if path and os.path.exists(path):
+                    try:
+                        model = LocalPriorityModel.load(path)
+                    except Exception:
+                        model = None
+                _model = model or LocalPriorityModel()
+    return _model
+
+
+def local_priority_score(task_data: Dict[str, Any]) -> float:
+    return get_local_model().score(task_data)
+
+
+def train_from_history(min_samples: int = 20, save_path: Optional[str] = None) -> Optional[LocalPriorityModel]:
+    """
+    Distills past Gemini scores into the local weights. Only tasks whose score_source
+    is 'gemini' are used: fitting to the local model's own provisional and fallback
+    scores would only teach it what it already predicts. Tasks users actually worked on
+    (progress logs) or finished count more. Must run inside an app context; returns
+    None when there is not enough history yet.
+    """
+    global _model
+    from sqlalchemy import func
+    from ..models import db, Task, ProgressLog
+    from .ml import SOURCE_GEMINI
+
+    logs = (
+        db.session.query(ProgressLog.task_id, func.count(ProgressLog.id))
+        .group_by(ProgressLog.task_id)
+        .all()
+    )
+    log_counts = dict(logs)
+    rows = (
+        db.session.query(Task.id, Task.title, Task.description, Task.category, Task.status,
+                         Task.priority, Task.due_date, Task.estimated_hours,
+                         Task.priority_score, Task.created_at)
+        .filter(Task.priority_score.isnot(None), Task.score_source == SOURCE_GEMINI)
+        .all()
+    )
+    if len(rows) < min_samples:
+        return None
+
+    tasks, targets, weights = [], [], []
+    for r in rows:
+        tasks.append({'title': r.title, 'description': r.description, 'category': r.category,
+                      'priority': r.priority, 'due_date': r.due_date,
+                      'estimated_hours': r.estimated_hours})
+        targets.append(r.priority_score)
+        weights.append(1.0 + np.log1p(log_counts.get(r.id, 0)) + (1.0 if r.status == 'completed' else 0.0))
+
+    # Features are computed relative to when each task was created, as the model saw it
+    X = np.vstack([build_features([t], r.created_at or datetime.now()) for t, r in zip(tasks, rows)])
+    model = LocalPriorityModel().fit_matrix(X, targets, np.asarray(weights))
+    path = save_path or os.environ.get('LOCAL_MODEL_PATH')
+    if path:
+        model.save(path)
+    with _model_lock:
+        _model = model
+    return model
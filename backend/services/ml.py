@@ -1,110 +1,245 @@
 import os
 import json
-from typing import Dict, Any
+from typing import Dict, Any, Optional, List, Tuple
+from ..instrumentation import timed
+from .gemini_client import get_gemini_client
+from .score_cache import get_score_cache, score_key
+from .local_model import get_local_model, local_priority_score
 
-try:
-    from google import genai  # google-genai SDK
-except Exception:  # pragma: no cover - SDK may not be installed in some envs
-    genai = None  # type: ignore
+SCORERS = ('gemini', 'local')
+# Stored in Task.score_source: which model produced the task's priority_score
+SOURCE_GEMINI = 'gemini'
+SOURCE_LOCAL = 'local'
+MODEL_NAME = "gemini-2.5-flash"
 
 
-def gemini_priority_score(task_data: Dict[str, Any]) -> float:
+def batch_limits() -> Tuple[int, int]:
     """
-    Calls Gemini model to compute an AI-driven priority score in [0.0, 100.0].
-    Falls back to 50.0 on any error or missing dependency.
-    Expected task_data keys: title, description, priority, due_date, estimated_hours
+    Rough prompt budget and item cap per score_many model call (~4 characters per token
+    is close enough for chunking). Read at call time so values from backend/.env count.
     """
-    fallback = 50.0
+    return (int(os.environ.get('SCORING_BATCH_TOKEN_BUDGET', '6000')),
+            int(os.environ.get('SCORING_BATCH_MAX_ITEMS', '50')))
 
-    api_key = os.environ.get('GEMINI_API_KEY')
-    if genai is None or not api_key:
-        return fallback
 
-    try:
-        client = genai.Client(api_key=api_key)
-
-        system_prompt = (
-            "You are an expert Task Priority Analyst. Your goal is to analyze the provided task "
-            "details and assign a definitive 'priority_score' from 0.0 (lowest) to 100.0 (highest). "
-            "Consider the title, description, and especially the due date proximity. Respond only "
-            "with a single JSON object containing the key 'priority_score' and its float value."
-        )
-
-        title = task_data.get('title') or ''
-        description = task_data.get('description') or ''
-        priority = task_data.get('priority') or ''
-        due_date = task_data.get('due_date') or ''
-        estimated_hours = task_data.get('estimated_hours')
-
-        user_prompt = (
-            f"Title: {title}\n"
-            f"Description: {description}\n"
-            f"Due Date: {due_date}\n"
-            f"Initial Priority: {priority}\n"
-            f"Estimated Hours: {estimated_hours}"
-        )
-
-        response = client.models.generate_content(
-            model="gemini-2.5-flash",
-            contents=[
-                {"role": "system", "content": system_prompt},
-                {"role": "user", "content": user_prompt},
-            ],
-            generation_config={
-                "temperature": 0.2,
-                "response_mime_type": "application/json",
-            },
-        )
-
-        # Extract text from response; SDK returns candidates with parts
-        text = None
-        try:
-            if hasattr(response, 'text') and response.text:
-                text = response.text
-            elif getattr(response, 'candidates', None):
-                parts = response.candidates[0].content.parts  # type: ignore[attr-defined]
-                if parts:
-                    text = getattr(parts[0], 'text', None) or str(parts[0])
-        except Exception:
-            text = None
+def configured_scorer() -> str:
+    scorer = (os.environ.get('PRIORITY_SCORER') or 'gemini').lower()
+    return scorer if scorer in SCORERS else 'gemini'
 
-        if not text:
-            return fallback
-
-        obj = None
-        try:
-            obj = json.loads(text)
-        except json.JSONDecodeError:
-            # Try to extract JSON substring if model wrapped it in extra text
-            start = text.find('{')
-            end = text.rfind('}')
-            if start != -1 and end != -1 and end > start:
-                try:
-                    obj = json.loads(text[start:end + 1])
-                except Exception:
-                    obj = None
 
-        if not isinstance(obj, dict):
-            return fallback
+def priority_score(task_data: Dict[str, Any]) -> float:
+    """Scores one task with the scorer selected by PRIORITY_SCORER (gemini or local)."""
+    return priority_score_with_source(task_data)[0]
+
 
-        val = obj.get('priority_score')
-        if isinstance(val, (int, float)):
+def priority_score_with_source(task_data: Dict[str, Any]) -> Tuple[float, str]:
+    """Like priority_score, also returning which model answered (SOURCE_GEMINI or SOURCE_LOCAL)."""
+    if configured_scorer() == 'local':
+        return local_priority_score(task_data), SOURCE_LOCAL
+    return _gemini_score_with_source(task_data)
+
+
+def gemini_priority_score(task_data: Dict[str, Any]) -> float:
+    """
+    Calls Gemini model to compute an AI-driven priority score in [0.0, 100.0].
+    Results are cached by a hash of the prompt inputs; only real model answers are cached.
+    Falls back to the local model on any error or timeout, and while the circuit breaker is open.
+    Expected task_data keys: title, description, priority, due_date, estimated_hours
+    """
+    return _gemini_score_with_source(task_data)[0]
+
+
+@timed('gemini_priority_score')
+def _gemini_score_with_source(task_data: Dict[str, Any]) -> Tuple[float, str]:
+    cache = get_score_cache()
+    key = score_key(task_data)
+    cached = cache.get(key)
+    if cached is not None:
+        return cached, SOURCE_GEMINI
+    score = _gemini_request(task_data)
+    if score is None:
+        _count_fallbacks(1)
+        return local_priority_score(task_data), SOURCE_LOCAL
+    cache.set(key, score)
+    return score, SOURCE_GEMINI
+
+
+def _task_prompt(task_data: Dict[str, Any]) -> str:
+    title = task_data.get('title') or ''
+    description = task_data.get('description') or ''
+    priority = task_data.get('priority') or ''
+    due_date = task_data.get('due_date') or ''
+    estimated_hours = task_data.get('estimated_hours')
+    return (
+        f"Title: {title}\n"
+        f"Description: {description}\n"
+        f"Due Date: {due_date}\n"
+        f"Initial Priority: {priority}\n"
+        f"Estimated Hours: {estimated_hours}"
+    )
+
+
+def _generate(system_prompt: str, user_prompt: str) -> Optional[str]:
+    """Runs one model call and returns the response text, or None if unavailable."""
+    client = get_gemini_client()
+    if client is None:
+        return None
+    return client.generate(system_prompt, user_prompt)
+
+
+def _count_fallbacks(n: int):
+    client = get_gemini_client()
+    if client is not None:
+        client.count_fallbacks(n)
+
+
+def _load_json(text: str, opener: str, closer: str):
+    try:
+        return json.loads(text)
+    except json.JSONDecodeError:
+        # Try to extract JSON substring if model wrapped it in extra text
+        start = text.find(opener)
+        end = text.rfind(closer)
+        if start != -1 and end != -1 and end > start:
             try:
-                num = float(val)
-                if num < 0.0:
-                    return 0.0
-                if num > 100.0:
-                    return 100.0
-                return num
+                return json.loads(text[start:end + 1])
             except Exception:
-                return fallback
-        return fallback
+                return None
+    return None
+
+
+def _clamp_score(val) -> Optional[float]:
+    if isinstance(val, bool) or not isinstance(val, (int, float)):
+        return None
+    num = float(val)
+    if num != num:  # NaN
+        return None
+    return min(100.0, max(0.0, num))
+
+
+def _gemini_request(task_data: Dict[str, Any]) -> Optional[float]:
+    """Single uncached model call; returns None when no usable score came back."""
+    system_prompt = (
+        "You are an expert Task Priority Analyst. Your goal is to analyze the provided task "
+        "details and assign a definitive 'priority_score' from 0.0 (lowest) to 100.0 (highest). "
+        "Consider the title, description, and especially the due date proximity. Respond only "
+        "with a single JSON object containing the key 'priority_score' and its float value."
+    )
+    try:
+        text = _generate(system_prompt, _task_prompt(task_data))
+        if not text:
+            return None
+        obj = _load_json(text, '{', '}')
+        if not isinstance(obj, dict):
+            return None
+        return _clamp_score(obj.get('priority_score'))
+    except Exception:
+        return None
+
+
+def _estimate_tokens(text: str) -> int:
+    return len(text) // 4 + 1
+
+
+def _chunk_by_budget(prompts: List[str], budget: int, max_items: int) -> List[List[int]]:
+    """Groups prompt indexes so each chunk stays under the token budget."""
+    chunks: List[List[int]] = []
+    current: List[int] = []
+    used = 0
+    for i, prompt in enumerate(prompts):
+        cost = _estimate_tokens(prompt) + 8
+        if current and (used + cost > budget or len(current) >= max_items):
+            chunks.append(current)
+            current, used = [], 0
+        current.append(i)
+        used += cost
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+@timed('gemini_batch')
+def _gemini_batch_request(prompts: List[str]) -> List[Optional[float]]:
+    """One model call for several tasks; missing or malformed entries come back as None."""
+    system_prompt = (
+        "You are an expert Task Priority Analyst. For every task below assign a definitive "
+        "'priority_score' from 0.0 (lowest) to 100.0 (highest), considering the title, "
+        "description, and especially the due date proximity. Respond only with a JSON array "
+        "of objects, one per task, each with the integer key 'index' and the float "
+        "'priority_score'."
+    )
+    user_prompt = '\n\n'.join(f"Task {i}:\n{p}" for i, p in enumerate(prompts))
+    results: List[Optional[float]] = [None] * len(prompts)
+    try:
+        text = _generate(system_prompt, user_prompt)
+        if not text:
+            return results
+        arr = _load_json(text, '[', ']')
+        if not isinstance(arr, list):
+            return results
+        for pos, item in enumerate(arr):
+            if isinstance(item, dict):
+                idx = item.get('index', pos)
+                val = item.get('priority_score')
+            else:
+                idx, val = pos, item
+            if isinstance(idx, int) and 0 <= idx < len(prompts):
+                results[idx] = _clamp_score(val)
     except Exception:
-        return fallback
+        pass
+    return results
+
+
+def score_many(tasks: List[Dict[str, Any]]) -> List[float]:
+    """
+    Scores many tasks with as few model calls as possible. Cached inputs are answered
+    locally, the rest are packed into prompts chunked by a token budget. Each item that
+    the model fails to score falls back to the local model individually.
+    """
+    return score_many_with_sources(tasks)[0]
+
+
+def score_many_with_sources(tasks: List[Dict[str, Any]]) -> Tuple[List[float], List[str]]:
+    """score_many, plus the source of each score (see priority_score_with_source)."""
+    if configured_scorer() == 'local':
+        return get_local_model().score_many(tasks), [SOURCE_LOCAL] * len(tasks)
+
+    cache = get_score_cache()
+    keys = [score_key(t) for t in tasks]
+    scores: List[Optional[float]] = [cache.get(k) for k in keys]
+
+    # Identical inputs in one batch only need to be sent once
+    pending: Dict[str, List[int]] = {}
+    for i, (key, score) in enumerate(zip(keys, scores)):
+        if score is None:
+            pending.setdefault(key, []).append(i)
+
+    unique_keys = list(pending)
+    prompts = [_task_prompt(tasks[pending[k][0]]) for k in unique_keys]
+    budget, max_items = batch_limits()
+    for chunk in _chunk_by_budget(prompts, budget, max_items):
+        batch = _gemini_batch_request([prompts[j] for j in chunk])
+        for j, score in zip(chunk, batch):
+            if score is None:
+                continue
+            key = unique_keys[j]
+            cache.set(key, score)
+            for i in pending[key]:
+                scores[i] = score
+
+    sources = [SOURCE_GEMINI] * len(tasks)
+    missing = [i for i, s in enumerate(scores) if s is None]
+    if missing:
+        _count_fallbacks(len(missing))
+        fallback = get_local_model().score_many([tasks[i] for i in missing])
+        for i, score in zip(missing, fallback):
+            scores[i] = score
+            sources[i] = SOURCE_LOCAL
+    return scores, sources
 
 
 def heuristic_priority_score(priority: str, due_date, estimated_hours):
-    return gemini_priority_score({
+    return local_priority_score({
         'title': '',
         'description': '',
         'priority': priority,
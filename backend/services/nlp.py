@@ -1,6 +1,9 @@
 import re
+import threading
+import time
+from collections import OrderedDict
 from datetime import datetime, timedelta
-import dateparser
+from ..instrumentation import timed
 
 PRIORITY_WORDS = {
     'low': ['sometime', 'whenever', 'low', 'later'],
@@ -14,46 +17,114 @@ CATEGORIES = {
     'personal': ['gym', 'shopping', 'groceries', 'doctor', 'call'],
 }
 
+# Parse settings are fixed, so language detection is skipped and dateparser's
+# per-call parser construction happens once
+DATE_LANGUAGES = ['en']
+_KEYWORD_FLAGS = re.I
+
+
+def _keyword_pattern(table):
+    """One alternation for a whole keyword table; the named group says which key matched."""
+    groups = []
+    for key, words in table.items():
+        alternation = '|'.join(re.escape(w) for w in sorted(words, key=len, reverse=True))
+        groups.append(f'(?P<{key}>\\b(?:{alternation})\\b)')
+    return re.compile('|'.join(groups), _KEYWORD_FLAGS)
+
+
+_PRIORITY_RE = _keyword_pattern(PRIORITY_WORDS)
+_CATEGORY_RE = _keyword_pattern(CATEGORIES)
+_ESTIMATE_RE = re.compile(r"(\d+(?:\.\d+)?)\s*(h|hr|hrs|hour|hours)", re.I)
+_REMINDER_RE = re.compile(r"\b(remind\s+me|notify\s+me|alert\s+me)\s+(at|on|by)\s+(.+)")
+_TIME_ONLY_RE = re.compile(r"\b(by|at)\s+([0-9]{1,2}(:[0-9]{2})?\s*(am|pm)?)\b")
+
+_date_parser = None
+_date_parser_lock = threading.Lock()
+
+
+def _due_date_parser():
+    # dateparser takes a few hundred ms to import, so it loads with the first parse
+    global _date_parser
+    if _date_parser is None:
+        with _date_parser_lock:
+            if _date_parser is None:
+                from dateparser.date import DateDataParser
+                _date_parser = DateDataParser(languages=DATE_LANGUAGES, settings={'PREFER_DATES_FROM': 'future'})
+    return _date_parser
+
+
+def _first_key(pattern, text: str, table):
+    """Key of the first table entry (in table order) with a whole-word match in text."""
+    found = {m.lastgroup for m in pattern.finditer(text)}
+    for key in table:
+        if key in found:
+            return key
+    return None
+
+
+def _parse_relative(phrase: str, base: datetime):
+    import dateparser
+    return dateparser.parse(
+        phrase,
+        languages=DATE_LANGUAGES,
+        settings={'RELATIVE_BASE': base, 'PREFER_DATES_FROM': 'future'},
+    )
+
+
+# Results depend on the current time, so cached entries are only reused within the
+# same time bucket (PARSE_CACHE_BUCKET_SECONDS)
+PARSE_CACHE_SIZE = 2048
+PARSE_CACHE_BUCKET_SECONDS = 60
+_parse_cache: "OrderedDict[tuple, dict]" = OrderedDict()
+_parse_cache_lock = threading.Lock()
+
+
+@timed('parse_task_text')
 def parse_task_text(text: str):
+    """Memoized front for _parse_task_text; callers get their own copy of the result."""
+    text = text.strip()
+    key = (text, int(time.time() // PARSE_CACHE_BUCKET_SECONDS))
+    with _parse_cache_lock:
+        cached = _parse_cache.get(key)
+        if cached is not None:
+            _parse_cache.move_to_end(key)
+            return dict(cached)
+    result = _parse_task_text(text)
+    with _parse_cache_lock:
+        _parse_cache[key] = result
+        while len(_parse_cache) > PARSE_CACHE_SIZE:
+            _parse_cache.popitem(last=False)
+    return dict(result)
+
+
+def _parse_task_text(text: str):
     title = text.strip()
+    text_lower = text.lower()
     due_date = None
     # Use dateparser to find the main due date
-    parsed_date = dateparser.parse(text, settings={'PREFER_DATES_FROM': 'future'})
+    parsed_date = _due_date_parser().get_date_data(text).date_obj
     if parsed_date:
         due_date = parsed_date
-    
-    # ... (Existing parsing for priority, category, estimate remains here)
-    priority = 'medium'
-    for lvl, words in PRIORITY_WORDS.items():
-        if any(w in text.lower() for w in words):
-            priority = lvl
-            break
-    category = None
-    for cat, words in CATEGORIES.items():
-        if any(w in text.lower() for w in words):
-            category = cat
-            break
+
+    priority = _first_key(_PRIORITY_RE, text_lower, PRIORITY_WORDS) or 'medium'
+    category = _first_key(_CATEGORY_RE, text_lower, CATEGORIES)
     estimate = None
-    m = re.search(r"(\d+(?:\.\d+)?)\s*(h|hr|hrs|hour|hours)", text, re.I)
+    m = _ESTIMATE_RE.search(text)
     if m:
         estimate = float(m.group(1))
     if not due_date:
-        if 'tomorrow' in text.lower():
+        if 'tomorrow' in text_lower:
             due_date = datetime.now() + timedelta(days=1)
-    
+
     # --- NEW: Reminder Logic ---
     reminder_date = None
-    text_lower = text.lower()
 
     # 1) Explicit forms: "remind/notify/alert me at|on|by <phrase>"
-    reminder_match = re.search(r"\b(remind\s+me|notify\s+me|alert\s+me)\s+(at|on|by)\s+(.+)", text_lower)
+    reminder_match = _REMINDER_RE.search(text_lower)
     if reminder_match and not reminder_date:
         potential_reminder_text = reminder_match.group(3).strip()
         base_date = due_date or datetime.now()
-        parsed_reminder = dateparser.parse(
-            potential_reminder_text,
-            settings={'RELATIVE_BASE': base_date, 'PREFER_DATES_FROM': 'future'}
-        )
+        parsed_reminder = _parse_relative(potential_reminder_text, base_date)
         if parsed_reminder:
             # If due_date exists and parsed reminder is after due_date, keep due_date precedence
             if not due_date or parsed_reminder <= due_date:
@@ -61,14 +132,11 @@ def parse_task_text(text: str):
 
     # 2) Time-only phrases like: "by 9:00pm" or "at 9 pm" even without due_date
     if not reminder_date:
-        m_time_only = re.search(r"\b(by|at)\s+([0-9]{1,2}(:[0-9]{2})?\s*(am|pm)?)\b", text_lower)
+        m_time_only = _TIME_ONLY_RE.search(text_lower)
         if m_time_only:
             time_phrase = m_time_only.group(0)  # include the by/at for better parsing context
             base_date = due_date or datetime.now()
-            parsed_time = dateparser.parse(
-                time_phrase,
-                settings={'RELATIVE_BASE': base_date, 'PREFER_DATES_FROM': 'future'}
-            )
+            parsed_time = _parse_relative(time_phrase, base_date)
             if parsed_time:
                 # If there is a due_date, prefer same-day time before due
                 if due_date:
@@ -0,0 +1,175 @@
+import os
+import threading
+import uuid
+from datetime import datetime, timedelta
+from typing import Dict, Any, Optional
+from sqlalchemy import func, or_, and_, select, update
+from ..models import db, OutboxMessage
+from .email import queue_email
+
+
+def outbox_key(kind: str, *parts) -> str:
+    """
+    Idempotency key for an outbox email, built only from what identifies the event
+    (kind, user, task id, ...), so the same logical email always gets the same key.
+    """
+    return ':'.join([kind, *(str(p) for p in parts)])
+
+
+def add_outbox_email(kind: str, idempotency_key: str, to_email: str, subject: str, body: str) -> OutboxMessage:
+    """
+    Adds an email to the outbox in the caller's transaction; it is only delivered if
+    that transaction commits. With a key from outbox_key(), enqueueing the same logical
+    email twice is a unique constraint violation instead of a duplicate send.
+    """
+    msg = OutboxMessage(
+        idempotency_key=idempotency_key,
+        kind=kind,
+        to_email=to_email,
+        subject=subject,
+        body=body,
+        next_attempt_at=datetime.utcnow(),
+    )
+    db.session.add(msg)
+    return msg
+
+
+class OutboxWorker:
+    """
+    Drains the outbox in the background with at-least-once delivery. Rows are claimed
+    with a lease (claimed_by/claimed_until) so several processes can share one outbox;
+    a lease that expires because its worker died makes the row claimable again.
+    Failures back off exponentially and end in the 'dead' state after max_attempts.
+    """
+
+    def __init__(self, app, batch_size: int = 50, poll_interval: float = 5.0, lease: float = 120.0,
+                 max_attempts: int = 8, backoff: float = 30.0, max_backoff: float = 3600.0, sender=None):
+        self.app = app
+        self.batch_size = batch_size
+        self.poll_interval = poll_interval
+        self.lease = timedelta(seconds=lease)
+        self.max_attempts = max_attempts
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.sender = sender or queue_email
+        self.worker_id = f'{os.getpid()}-{uuid.uuid4().hex[:8]}'
+        self._wake = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name='outbox', daemon=True)
+        self._thread.start()
+
+    def notify(self):
+        self._wake.set()
+
+    def _claim(self, now: datetime):
+        claimable = or_(
+            and_(OutboxMessage.status == 'pending', OutboxMessage.next_attempt_at <= now),
+            and_(OutboxMessage.status == 'sending', OutboxMessage.claimed_until < now),
+        )
+        ids = select(OutboxMessage.id).where(claimable).order_by(OutboxMessage.id).limit(self.batch_size)
+        token = f'{self.worker_id}-{uuid.uuid4().hex[:8]}'
+        # Single UPDATE ... WHERE id IN (...) AND <still claimable>: two workers cannot both win a row
+        db.session.execute(
+            update(OutboxMessage)
+            .where(OutboxMessage.id.in_(ids), claimable)
+            .values(status='sending', claimed_by=token, claimed_until=now + self.lease)
+            .execution_options(synchronize_session=False)
+        )
+        db.session.commit()
+        return OutboxMessage.query.filter_by(claimed_by=token, status='sending').all()
+
+    def _backoff_for(self, attempts: int) -> timedelta:
+        return timedelta(seconds=min(self.backoff * (2 ** (attempts - 1)), self.max_backoff))
+
+    def drain_once(self) -> int:
+        """Claims and delivers one batch. Must run inside an app context; returns rows handled."""
+        now = datetime.utcnow()
+        rows = self._claim(now)
+        if not rows:
+            return 0
+        futures = []
+        for row in rows:
+            try:
+                futures.append((row, self.sender(row.subject, row.to_email, row.body,
+                                                 message_id=row.idempotency_key)))
+            except Exception as e:
+                futures.append((row, e))
+        for row, future in futures:
+            error = future if isinstance(future, Exception) else None
+            if error is None:
+                try:
+                    future.result()
+                except Exception as e:
+                    error = e
+            row.claimed_by = None
+            row.claimed_until = None
+            if error is None:
+                row.status = 'sent'
+                row.sent_at = datetime.utcnow()
+                row.last_error = None
+                continue
+            row.attempts += 1
+            row.last_error = f'{type(error).__name__}: {error}'[:2000]
+            if row.attempts >= self.max_attempts:
+                row.status = 'dead'
+            else:
+                row.status = 'pending'
+                row.next_attempt_at = datetime.utcnow() + self._backoff_for(row.attempts)
+        db.session.commit()
+        return len(rows)
+
+    def _run(self):
+        while True:
+            # Cleared before draining so a notify() during the drain is not lost
+            self._wake.clear()
+            handled = 0
+            try:
+                with self.app.app_context():
+                    handled = self.drain_once()
+            except Exception:
+                # Never crash the loop
+                pass
+            if handled >= self.batch_size:
+                continue
+            self._wake.wait(self.poll_interval)
+
+
+def outbox_stats() -> Dict[str, Any]:
+    rows = db.session.query(OutboxMessage.status, func.count(OutboxMessage.id)).group_by(OutboxMessage.status).all()
+    return {status: n for status, n in rows}
+
+
+def retry_dead_messages() -> int:
+    """Moves dead-lettered messages back to pending with a fresh attempt budget. Caller commits."""
+    res = db.session.execute(
+        update(OutboxMessage)
+        .where(OutboxMessage.status == 'dead')
+        .values(status='pending', attempts=0, next_attempt_at=datetime.utcnow())
+        .execution_options(synchronize_session=False)
+    )
+    return res.rowcount
+
+
+def get_outbox_worker(app) -> Optional[OutboxWorker]:
+    return getattr(app, '_outbox_worker', None)
+
+
+def notify_outbox(app):
+    worker = get_outbox_worker(app)
+    if worker is not None:
+        worker.notify()
+
+
+def start_outbox_worker(app):
+    if get_outbox_worker(app) is not None:
+        return get_outbox_worker(app)
+    worker = OutboxWorker(
+        app,
+        poll_interval=app.config.get('OUTBOX_POLL_SECONDS', 5.0),
+        max_attempts=app.config.get('OUTBOX_MAX_ATTEMPTS', 8),
+    )
+    worker.start()
+    setattr(app, '_outbox_worker', worker)
+    return worker
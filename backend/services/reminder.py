@@ -1,58 +1,364 @@
+import heapq
+import os
+import random
+import socket
 import threading
-import time
-from datetime import datetime
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+from flask import current_app
+from sqlalchemy import and_, bindparam, case, or_, select, update
 from ..models import db, Task, User
-from .email import send_email
+from .email import queue_email
+from .response_cache import bump_data_version
+from .users import get_user_cache
 
 
-def _run_loop(app):
-    # Simple polling loop; checks every 60 seconds
-    while True:
+class SystemClock:
+    """Wall clock used by the scheduler; tests pass a fake with the same two methods."""
+
+    def now(self) -> datetime:
+        return datetime.now()
+
+    def wait(self, cond: threading.Condition, timeout: Optional[float]):
+        cond.wait(timeout)
+
+
+def _reminder_email(t: Task):
+    subject = f"Reminder: {t.title}"
+    parts = [
+        f"Title: {t.title}",
+        f"Description: {t.description or '-'}",
+        f"Priority: {t.priority}",
+        f"Due: {t.due_date.isoformat() if t.due_date else '-'}",
+        f"Reminder Time: {t.reminder_date.isoformat() if t.reminder_date else '-'}",
+    ]
+    return subject, "\n".join(parts)
+
+
+def worker_id() -> str:
+    """Identifies this process in reminder claims; computed per call so forked workers differ."""
+    return f'{socket.gethostname()[:40]}:{os.getpid()}'
+
+
+def claim_due_reminders(task_ids: List[int], now: datetime, owner: str, lease: timedelta,
+                        due_by: Optional[datetime] = None) -> Tuple[List[int], List[int]]:
+    """
+    Claims the tasks whose reminder is due by `due_by` (default `now`) and not leased
+    by another live worker, in one UPDATE, and commits so the claim is visible to the
+    other processes. Returns (claimed, held_by_others); ids no longer due are in neither list.
+    """
+    if not task_ids:
+        return [], []
+    due = and_(Task.id.in_(task_ids), Task.reminder_date.isnot(None), Task.reminder_date <= (due_by or now))
+    db.session.execute(
+        update(Task.__table__)
+        .where(due)
+        .where(or_(Task.reminder_claim_expires.is_(None), Task.reminder_claim_expires <= now))
+        .values(reminder_claimed_by=owner, reminder_claim_expires=now + lease)
+    )
+    db.session.commit()
+    claimed, others = [], []
+    for task_id, holder in db.session.query(Task.id, Task.reminder_claimed_by).filter(due):
+        (claimed if holder == owner else others).append(task_id)
+    return claimed, others
+
+
+def _finish_claims(owner: str, sent: Dict[int, datetime], failed: List[int]):
+    """Clears the reminders that went out and releases every claim this worker holds on them."""
+    table = Task.__table__
+    conn = db.session.connection()
+    if sent:
+        # Only clear the reminder that was sent; one rescheduled meanwhile stays pending
+        conn.execute(
+            update(table)
+            .where(table.c.id == bindparam('tid'), table.c.reminder_claimed_by == owner)
+            .values(
+                reminder_date=case((table.c.reminder_date == bindparam('sent_for'), None),
+                                   else_=table.c.reminder_date),
+                reminder_claimed_by=None,
+                reminder_claim_expires=None,
+            ),
+            [{'tid': tid, 'sent_for': when} for tid, when in sent.items()],
+        )
+        # reminder_date is part of the task API; Core updates skip the ORM version hooks
+        user_ids = db.session.query(Task.user_id).filter(Task.id.in_(list(sent))).distinct()
+        bump_data_version(conn, [uid for uid, in user_ids])
+    if failed:
+        conn.execute(
+            update(table)
+            .where(table.c.id.in_(failed), table.c.reminder_claimed_by == owner)
+            .values(reminder_claimed_by=None, reminder_claim_expires=None)
+        )
+    db.session.commit()
+
+
+def _group_by_user(task_ids: List[int], now: datetime, window: timedelta) -> List[List[int]]:
+    """
+    The due tasks plus, for users who take digests, their other reminders falling due
+    within `window`, as one id list per user.
+    """
+    due_users = select(Task.user_id).where(Task.id.in_(task_ids))
+    wanted = Task.id.in_(task_ids)
+    if window:
+        wanted = or_(wanted, and_(
+            Task.user_id.in_(due_users),
+            Task.reminder_date <= now + window,
+            User.reminder_digest.is_(True),
+        ))
+    rows = (
+        db.session.query(Task.id, Task.user_id)
+        .join(User, User.id == Task.user_id)
+        .filter(Task.reminder_date.isnot(None))
+        .filter(wanted)
+        .all()
+    )
+    groups: Dict[int, List[int]] = {}
+    for task_id, user_id in rows:
+        groups.setdefault(user_id, []).append(task_id)
+    return list(groups.values())
+
+
+def send_due_reminders(task_ids: List[int], now: datetime) -> List[int]:
+    """
+    Sends reminders for the given tasks that are still due at `now` and clears their
+    reminder_date. Returns the ids to retry later: sends that failed and reminders
+    currently leased by another worker (retried in case that worker dies).
+    Must run inside an app context.
+
+    Reminders are grouped by user: a user who takes digests gets one email listing
+    every task due now or within REMINDER_DIGEST_WINDOW_SECONDS, so reminders that
+    fall due close together go out at the time of the earliest one.
+
+    Every process runs a scheduler over the same rows, so each batch is claimed first
+    (see claim_due_reminders): only the claiming worker sends, and a reminder goes out
+    once however many processes see it due. Users are shuffled per worker so concurrent
+    workers start on different batches and share the load. A worker that dies holding
+    a claim delays those reminders until the lease (REMINDER_CLAIM_SECONDS) runs out.
+    """
+    config = current_app.config
+    lease = timedelta(seconds=config.get('REMINDER_CLAIM_SECONDS', 300))
+    batch = max(1, config.get('REMINDER_CLAIM_BATCH', 50))
+    window = timedelta(seconds=config.get('REMINDER_DIGEST_WINDOW_SECONDS', 300))
+    owner = worker_id()
+    requested = set(task_ids)
+    groups = _group_by_user(list(requested), now, window)
+    # Claims are writes; don't start them from this read transaction's snapshot
+    db.session.rollback()
+    random.shuffle(groups)
+    retry = []
+    # Batches hold whole users, so a digest is never split between workers
+    while groups:
+        chunk = []
+        while groups and (not chunk or len(chunk) + len(groups[-1]) <= batch):
+            chunk.extend(groups.pop())
+        claimed, held = claim_due_reminders(chunk, now, owner, lease, due_by=now + window)
+        # Upcoming reminders held elsewhere still fire from this scheduler at their own time
+        retry.extend(i for i in held if i in requested)
+        if claimed:
+            retry.extend(_send_claimed(claimed, owner))
+    return retry
+
+
+def _digest_email(tasks: List[Task]):
+    subject = f"Reminder: {len(tasks)} tasks due"
+    sections = [_reminder_email(t)[1] for t in tasks]
+    return subject, f"You have {len(tasks)} tasks coming up:\n\n" + "\n\n".join(sections)
+
+
+def _send_claimed(task_ids: List[int], owner: str) -> List[int]:
+    failed = []
+    sent: Dict[int, datetime] = {}
+    tasks = (
+        Task.query
+        .filter(Task.id.in_(task_ids), Task.reminder_claimed_by == owner)
+        .order_by(Task.reminder_date, Task.id)
+        .all()
+    )
+    by_user: Dict[int, List[Task]] = {}
+    for t in tasks:
+        by_user.setdefault(t.user_id, []).append(t)
+    users = get_user_cache().get_many(by_user)
+    messages = []
+    for user_id, user_tasks in by_user.items():
+        user = users.get(user_id)
+        due = [(t.id, t.reminder_date) for t in user_tasks]
+        if not user or not user.email:
+            # Prevent repeated attempts if user email missing
+            sent.update(due)
+            continue
+        if user.reminder_digest and len(user_tasks) > 1:
+            messages.append((due, user.email) + _digest_email(user_tasks))
+        else:
+            messages.extend(([d], user.email) + _reminder_email(t) for d, t in zip(due, user_tasks))
+    # End the read transaction now: in WAL mode a write that upgrades a snapshot older
+    # than another process's commit fails at once instead of waiting on busy_timeout
+    db.session.rollback()
+    pending = []
+    for due, email, subject, body in messages:
         try:
-            with app.app_context():
-                now = datetime.now()
-                # Fetch tasks needing reminders
-                tasks = (
-                    Task.query
-                    .filter(Task.reminder_date.isnot(None))
-                    .filter(Task.reminder_date <= now)
-                    .all()
-                )
-                for t in tasks:
-                    user = User.query.get(t.user_id)
-                    if not user or not user.email:
-                        # Prevent repeated attempts if user email missing
-                        t.reminder_date = None
-                        db.session.add(t)
-                        continue
-                    subject = f"Reminder: {t.title}"
-                    parts = [
-                        f"Title: {t.title}",
-                        f"Description: {t.description or '-'}",
-                        f"Priority: {t.priority}",
-                        f"Due: {t.due_date.isoformat() if t.due_date else '-'}",
-                        f"Reminder Time: {t.reminder_date.isoformat() if t.reminder_date else '-'}",
-                    ]
-                    body = "\n".join(parts)
-                    try:
-                        send_email(subject, user.email, body)
-                        # Clear reminder_date to avoid duplicate sends
-                        t.reminder_date = None
-                    except Exception:
-                        # Best-effort: try next cycle again
-                        pass
-                    db.session.add(t)
-                if tasks:
-                    db.session.commit()
+            # Queue everything first so the mail workers send in parallel over pooled sessions
+            pending.append((due, queue_email(subject, email, body)))
         except Exception:
-            # Never crash the loop
-            pass
-        time.sleep(60)
+            failed.extend(task_id for task_id, _ in due)
+    for due, future in pending:
+        try:
+            future.result()
+            sent.update(due)
+        except Exception:
+            # Best-effort: retried after REMINDER_RETRY_SECONDS
+            failed.extend(task_id for task_id, _ in due)
+    _finish_claims(owner, sent, failed)
+    return failed
+
+
+class ReminderScheduler:
+    """
+    Keeps upcoming reminders in a min-heap and sleeps until the earliest one is due.
+    Only reminders inside the lookahead window are held in memory; the window is
+    reloaded from the database when the scheduler reaches its end. Routes call
+    schedule()/cancel() after committing so changes take effect immediately.
+    """
+
+    def __init__(self, app, lookahead: timedelta = timedelta(hours=1),
+                 retry_after: timedelta = timedelta(minutes=1), clock=None, sender=None):
+        self.app = app
+        self.lookahead = lookahead
+        self.retry_after = retry_after
+        self.clock = clock or SystemClock()
+        self.sender = sender or send_due_reminders
+        self._heap = []
+        # task_id -> the only reminder time still valid; heap entries that disagree are stale
+        self._scheduled: Dict[int, datetime] = {}
+        self._cond = threading.Condition()
+        self._horizon: Optional[datetime] = None
+        self._stopped = False
+        self._thread: Optional[threading.Thread] = None
+        self.sent_batches = 0
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name='reminder-scheduler', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        with self._cond:
+            self._stopped = True
+            self._cond.notify_all()
+
+    def _push(self, task_id: int, when: datetime):
+        self._scheduled[task_id] = when
+        heapq.heappush(self._heap, (when, task_id))
+
+    def schedule(self, task_id: int, when: Optional[datetime]):
+        if when is None:
+            self.cancel(task_id)
+            return
+        with self._cond:
+            if self._horizon is not None and when > self._horizon:
+                # Picked up by the next window load
+                self._scheduled.pop(task_id, None)
+                return
+            self._push(task_id, when)
+            if self._heap[0] == (when, task_id):
+                self._cond.notify_all()
+
+    def cancel(self, task_id: int):
+        with self._cond:
+            self._scheduled.pop(task_id, None)
+
+    def pending(self) -> int:
+        with self._cond:
+            return len(self._scheduled)
+
+    def load_window(self, now: datetime):
+        """Loads every reminder due up to now + lookahead (including overdue ones)."""
+        horizon = now + self.lookahead
+        with self.app.app_context():
+            rows = (
+                db.session.query(Task.id, Task.reminder_date)
+                .filter(Task.reminder_date.isnot(None))
+                .filter(Task.reminder_date <= horizon)
+                .all()
+            )
+        with self._cond:
+            for task_id, when in rows:
+                # Tasks already held (e.g. waiting for a retry) keep their in-memory time
+                if task_id not in self._scheduled:
+                    self._push(task_id, when)
+            self._horizon = horizon
+
+    def _pop_due(self, now: datetime) -> List[int]:
+        due = []
+        while self._heap and self._heap[0][0] <= now:
+            when, task_id = heapq.heappop(self._heap)
+            if self._scheduled.get(task_id) == when:
+                del self._scheduled[task_id]
+                due.append(task_id)
+        return due
+
+    def _next_wakeup(self) -> Optional[datetime]:
+        while self._heap and self._scheduled.get(self._heap[0][1]) != self._heap[0][0]:
+            heapq.heappop(self._heap)
+        candidates = [w for w in (self._heap[0][0] if self._heap else None, self._horizon) if w is not None]
+        return min(candidates) if candidates else None
+
+    def run_once(self):
+        """Sends whatever is due now and refreshes the window if it has been reached."""
+        now = self.clock.now()
+        if self._horizon is None or now >= self._horizon:
+            self.load_window(now)
+        with self._cond:
+            due = self._pop_due(now)
+        if not due:
+            return
+        with self.app.app_context():
+            try:
+                failed = self.sender(due, now)
+            except Exception:
+                # e.g. the database stayed locked; claims this worker holds are picked up again on retry
+                failed = due
+        self.sent_batches += 1
+        for task_id in failed:
+            self.schedule(task_id, now + self.retry_after)
+
+    def _run(self):
+        while True:
+            try:
+                self.run_once()
+            except Exception:
+                # Never crash the loop
+                pass
+            with self._cond:
+                if self._stopped:
+                    return
+                wake = self._next_wakeup()
+                now = self.clock.now()
+                if wake is None or wake > now:
+                    timeout = (wake - now).total_seconds() if wake else None
+                    self.clock.wait(self._cond, timeout)
+                if self._stopped:
+                    return
+
+
+def get_reminder_scheduler(app) -> Optional[ReminderScheduler]:
+    return getattr(app, '_reminder_scheduler', None)
+
+
+def notify_reminder_changed(app, task_id: int, reminder_date: Optional[datetime]):
+    """Tells the scheduler about a committed reminder change; no-op without a worker."""
+    scheduler = get_reminder_scheduler(app)
+    if scheduler is not None:
+        scheduler.schedule(task_id, reminder_date)
 
 
-def start_reminder_worker(app):
-    if getattr(app, '_reminder_worker_started', False):
-        return
-    t = threading.Thread(target=_run_loop, args=(app,), daemon=True)
-    t.start()
-    setattr(app, '_reminder_worker_started', True)
+def start_reminder_worker(app, clock=None):
+    if get_reminder_scheduler(app) is not None:
+        return get_reminder_scheduler(app)
+    scheduler = ReminderScheduler(
+        app,
+        lookahead=timedelta(minutes=app.config.get('REMINDER_LOOKAHEAD_MINUTES', 60)),
+        retry_after=timedelta(seconds=app.config.get('REMINDER_RETRY_SECONDS', 60)),
+        clock=clock,
+    )
+    scheduler.start()
+    setattr(app, '_reminder_scheduler', scheduler)
+    return scheduler
@@ -0,0 +1,181 @@
+import functools
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from itertools import chain
+from typing import Dict, Iterable, Optional, Tuple
+from flask import current_app, make_response, request
+from flask_jwt_extended import get_jwt_identity
+from sqlalchemy import event, func, inspect, select, update
+from sqlalchemy.orm import Session
+from ..models import db, User, Task, Subtask
+
+# Response headers worth replaying from the cache (besides the body and content type)
+_CACHED_HEADERS = ('X-Next-Cursor',)
+
+_listeners_installed = False
+
+
+def bump_data_version(conn, user_ids: Iterable[int]):
+    """Marks the users' task data as changed. For writes that bypass the ORM (Core inserts)."""
+    ids = sorted({uid for uid in user_ids if uid is not None})
+    if ids:
+        conn.execute(
+            update(User)
+            .where(User.id.in_(ids))
+            .values(data_version=func.coalesce(User.data_version, 0) + 1)
+        )
+
+
+def data_version(uid: int) -> int:
+    return db.session.execute(select(User.data_version).where(User.id == uid)).scalar() or 0
+
+
+def _before_flush(session, flush_context, instances):
+    users = session.info.setdefault('data_version_users', set())
+    tasks = session.info.setdefault('data_version_tasks', set())
+    for obj in chain(session.new, session.dirty, session.deleted):
+        if obj in session.dirty and not session.is_modified(obj):
+            continue
+        if isinstance(obj, Task):
+            users.add(obj.user_id)
+            # A task moved to another user changes both users' data
+            users.update(inspect(obj).attrs.user_id.history.deleted or ())
+        elif isinstance(obj, Subtask):
+            if obj.task_id is not None:
+                tasks.add(obj.task_id)
+            elif obj.task is not None:
+                users.add(obj.task.user_id)
+
+
+def _after_flush(session, flush_context):
+    users = session.info.pop('data_version_users', set())
+    tasks = session.info.pop('data_version_tasks', set())
+    if not users and not tasks:
+        return
+    conn = session.connection()
+    if tasks:
+        users.update(conn.execute(select(Task.user_id).where(Task.id.in_(tasks))).scalars())
+    bump_data_version(conn, users)
+
+
+def install_version_listeners():
+    """Bumps user.data_version in the same transaction as every task/subtask change. Idempotent."""
+    global _listeners_installed
+    if _listeners_installed:
+        return
+    event.listen(Session, 'before_flush', _before_flush)
+    event.listen(Session, 'after_flush', _after_flush)
+    _listeners_installed = True
+
+
+class ResponseCache:
+    """LRU of serialized responses bounded by total body size."""
+
+    def __init__(self, max_bytes: int = 32 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self._data: "OrderedDict[tuple, Tuple[bytes, str, Dict[str, str]]]" = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.not_modified = 0
+
+    def get(self, key: tuple):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return entry
+
+    def set(self, key: tuple, body: bytes, mimetype: str, headers: Dict[str, str]):
+        if len(body) > self.max_bytes // 4:
+            # One huge backlog should not flush everybody else's entries
+            return
+        with self._lock:
+            old = self._data.pop(key, None)
+            if old is not None:
+                self._size -= len(old[0])
+            self._data[key] = (body, mimetype, headers)
+            self._size += len(body)
+            while self._size > self.max_bytes and self._data:
+                _, (evicted, _, _) = self._data.popitem(last=False)
+                self._size -= len(evicted)
+
+    def count_not_modified(self):
+        with self._lock:
+            self.not_modified += 1
+
+    def stats(self):
+        with self._lock:
+            return {
+                'entries': len(self._data),
+                'bytes': self._size,
+                'max_bytes': self.max_bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'not_modified': self.not_modified,
+            }
+
+
+def get_response_cache(app) -> Optional[ResponseCache]:
+    return getattr(app, '_response_cache', None)
+
+
+def init_response_cache(app):
+    install_version_listeners()
+    if get_response_cache(app) is None and app.config.get('RESPONSE_CACHE_MAX_BYTES', 0) > 0:
+        setattr(app, '_response_cache', ResponseCache(app.config['RESPONSE_CACHE_MAX_BYTES']))
+    return get_response_cache(app)
+
+
+def versioned_response(name: str, time_bucket: Optional[int] = None):
+    """
+    ETag/304 and response caching for a per-user GET view, keyed on (user, data
+    version, query args). `time_bucket` seconds are added to the key for views whose
+    output also depends on the clock (e.g. overdue counts), bounding their staleness.
+    Goes below @jwt_required().
+    """
+    def decorate(view):
+        @functools.wraps(view)
+        def wrapper(*args, **kwargs):
+            uid = int(get_jwt_identity())
+            # Read before the view runs: a write landing in between then only makes the
+            # cached copy newer than its key, never older
+            version = data_version(uid)
+            bucket = int(time.time() // time_bucket) if time_bucket else 0
+            query = tuple(sorted(request.args.items(multi=True)))
+            digest = hashlib.sha1(repr((name, uid, query, bucket)).encode('utf-8')).hexdigest()[:16]
+            etag = f'v{version}-{digest}'
+            if request.if_none_match.contains_weak(etag):
+                cache = get_response_cache(current_app)
+                if cache is not None:
+                    cache.count_not_modified()
+                resp = make_response('', 304)
+                resp.set_etag(etag)
+                resp.headers['Cache-Control'] = 'private, no-cache'
+                return resp
+
+            cache = get_response_cache(current_app)
+            key = (name, uid, version, query, bucket)
+            entry = cache.get(key) if cache is not None else None
+            if entry is not None:
+                body, mimetype, headers = entry
+                resp = current_app.response_class(body, mimetype=mimetype, headers=headers)
+            else:
+                resp = make_response(view(*args, **kwargs))
+                if resp.status_code != 200 or resp.is_streamed:
+                    return resp
+                if cache is not None:
+                    headers = {h: resp.headers[h] for h in _CACHED_HEADERS if h in resp.headers}
+                    cache.set(key, resp.get_data(), resp.mimetype, headers)
+            resp.set_etag(etag)
+            # Clients may keep the copy but must revalidate (cheaply, via If-None-Match)
+            resp.headers['Cache-Control'] = 'private, no-cache'
+            return resp
+        return wrapper
+    return decorate
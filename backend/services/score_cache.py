@@ -0,0 +1,152 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Dict, Any, Optional
+
+# Inputs that actually reach the prompt; anything else (status, category, ...) must not
+# change the key or a status-only PATCH would miss the cache.
+KEY_FIELDS = ('title', 'description', 'priority', 'due_date', 'estimated_hours')
+
+
+def _normalize(value):
+    if value is None:
+        return ''
+    if isinstance(value, float) and value.is_integer():
+        value = int(value)
+    if hasattr(value, 'isoformat'):
+        value = value.isoformat()
+    return ' '.join(str(value).split())
+
+
+def score_key(task_data: Dict[str, Any]) -> str:
+    payload = json.dumps([_normalize(task_data.get(k)) for k in KEY_FIELDS], ensure_ascii=False)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+class ScoreCache:
+    """
+    Content-addressed LRU cache for priority scores with a TTL. An optional SQLite
+    file backs the in-memory tier so scores survive restarts.
+    """
+
+    def __init__(self, maxsize: int = 4096, ttl: float = 6 * 3600, db_path: Optional[str] = None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.db_path = db_path
+        self._data: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.persistent_hits = 0
+        self.evictions = 0
+        if db_path:
+            with self._connect() as conn:
+                conn.execute(
+                    'CREATE TABLE IF NOT EXISTS score_cache ('
+                    'key TEXT PRIMARY KEY, score REAL NOT NULL, stored_at REAL NOT NULL)'
+                )
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.db_path, timeout=5)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def get(self, key: str) -> Optional[float]:
+        now = time.time()
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None:
+                score, stored_at = entry
+                if now - stored_at <= self.ttl:
+                    self._data.move_to_end(key)
+                    self.hits += 1
+                    return score
+                del self._data[key]
+        if self.db_path:
+            try:
+                with self._connect() as conn:
+                    row = conn.execute(
+                        'SELECT score, stored_at FROM score_cache WHERE key = ?', (key,)
+                    ).fetchone()
+            except sqlite3.Error:
+                row = None
+            if row and now - row[1] <= self.ttl:
+                self._put_memory(key, row[0], row[1])
+                with self._lock:
+                    self.hits += 1
+                    self.persistent_hits += 1
+                return row[0]
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def _put_memory(self, key: str, score: float, stored_at: float):
+        with self._lock:
+            self._data[key] = (score, stored_at)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def set(self, key: str, score: float):
+        stored_at = time.time()
+        self._put_memory(key, score, stored_at)
+        if self.db_path:
+            try:
+                with self._connect() as conn:
+                    conn.execute(
+                        'INSERT OR REPLACE INTO score_cache (key, score, stored_at) VALUES (?, ?, ?)',
+                        (key, score, stored_at),
+                    )
+                    conn.execute('DELETE FROM score_cache WHERE stored_at < ?', (stored_at - self.ttl,))
+            except sqlite3.Error:
+                pass
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+        if self.db_path:
+            with self._connect() as conn:
+                conn.execute('DELETE FROM score_cache')
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'size': len(self._data),
+                'maxsize': self.maxsize,
+                'ttl_seconds': self.ttl,
+                'hits': self.hits,
+                'persistent_hits': self.persistent_hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_ratio': round(self.hits / lookups, 4) if lookups else 0.0,
+                'persistent': bool(self.db_path),
+            }
+
+
+_cache: Optional[ScoreCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_score_cache() -> ScoreCache:
+    # Built on first use so values from backend/.env are already loaded
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = ScoreCache(
+                    maxsize=int(os.environ.get('SCORE_CACHE_SIZE', '4096')),
+                    ttl=float(os.environ.get('SCORE_CACHE_TTL', str(6 * 3600))),
+                    db_path=os.environ.get('SCORE_CACHE_DB') or None,
+                )
+    return _cache
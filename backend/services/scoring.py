@@ -0,0 +1,191 @@
+import queue
+import threading
+import time
+from typing import Dict, Any, Optional, Sequence, Tuple
+from ..models import db, Task
+from .ml import priority_score_with_source, score_many_with_sources, configured_scorer
+from .local_model import local_priority_score
+
+
+# Tasks per bulk scoring job; matches ml's default SCORING_BATCH_MAX_ITEMS, so one model call each
+BATCH_JOB_SIZE = 50
+
+
+def provisional_score(task_data: Dict[str, Any]) -> float:
+    # The local model is cheap enough to run inline, so new tasks start out roughly ranked
+    return local_priority_score(task_data)
+
+
+class ScoringQueue:
+    """
+    Bounded background scorer. Tasks are committed with a provisional score and
+    enqueued here; a fixed pool of worker threads calls the model and writes the
+    score back in its own app context. `scorer` returns (score, source) like
+    ml.priority_score_with_source; jobs holding several tasks (bulk imports) go
+    through `batch_scorer`, ml.score_many_with_sources by default.
+    """
+
+    def __init__(self, app, workers: int = 4, maxsize: int = 1000, scorer=None, batch_scorer=None,
+                 batch_size: int = BATCH_JOB_SIZE):
+        self.app = app
+        self.scorer = scorer or priority_score_with_source
+        self.batch_scorer = batch_scorer or score_many_with_sources
+        self.batch_size = batch_size
+        self._queue: "queue.Queue" = queue.Queue(maxsize=maxsize)
+        self._lock = threading.Lock()
+        # Latest enqueue generation per task; stale jobs are skipped
+        self._generation: Dict[int, int] = {}
+        self._threads = []
+        self._workers = workers
+        self.enqueued = 0
+        self.scored = 0
+        self.dropped = 0
+        self.stale = 0
+        self.failed = 0
+        self.last_lag = 0.0
+        self.max_lag = 0.0
+        self._total_lag = 0.0
+
+    def start(self):
+        for i in range(self._workers):
+            t = threading.Thread(target=self._run, name=f'scoring-{i}', daemon=True)
+            t.start()
+            self._threads.append(t)
+
+    def submit(self, task_id: int, task_data: Dict[str, Any]) -> bool:
+        return self._put([(task_id, task_data)])
+
+    def submit_many(self, items: Sequence[Tuple[int, Dict[str, Any]]]) -> bool:
+        """Queues (task_id, task_data) pairs as jobs of up to batch_size tasks, one model call each."""
+        results = [self._put(items[i:i + self.batch_size]) for i in range(0, len(items), self.batch_size)]
+        return all(results)
+
+    def _put(self, items) -> bool:
+        with self._lock:
+            jobs = [(task_id, self._generation.get(task_id, 0) + 1, dict(task_data))
+                    for task_id, task_data in items]
+            try:
+                # Under the lock, so no worker checks the job before its generation is recorded
+                self._queue.put_nowait((jobs, time.monotonic()))
+            except queue.Full:
+                # Keep the provisional score. The generation is left alone, so a job already
+                # queued for this task still runs instead of being skipped as stale.
+                self.dropped += len(jobs)
+                return False
+            for task_id, gen, _ in jobs:
+                self._generation[task_id] = gen
+            self.enqueued += len(jobs)
+        return True
+
+    def _run(self):
+        while True:
+            jobs, enqueued_at = self._queue.get()
+            try:
+                self._score_jobs(jobs, enqueued_at)
+            except Exception:
+                with self._lock:
+                    self.failed += len(jobs)
+            finally:
+                self._queue.task_done()
+
+    def _current(self, jobs):
+        with self._lock:
+            current = [job for job in jobs if self._generation.get(job[0]) == job[1]]
+            self.stale += len(jobs) - len(current)
+        return current
+
+    def _score_jobs(self, jobs, enqueued_at: float):
+        jobs = self._current(jobs)
+        if not jobs:
+            return
+        if len(jobs) == 1:
+            results = [self.scorer(jobs[0][2])]
+        else:
+            results = list(zip(*self.batch_scorer([data for _, _, data in jobs])))
+        # A newer edit may have arrived while the model was thinking
+        fresh = {(task_id, gen) for task_id, gen, _ in self._current(jobs)}
+        scored = {task_id: result for (task_id, gen, _), result in zip(jobs, results) if (task_id, gen) in fresh}
+        if not scored:
+            return
+        with self.app.app_context():
+            for task in Task.query.filter(Task.id.in_(list(scored))):
+                task.priority_score, task.score_source = scored[task.id]
+            db.session.commit()
+        lag = time.monotonic() - enqueued_at
+        with self._lock:
+            for task_id, gen in fresh:
+                if self._generation.get(task_id) == gen:
+                    del self._generation[task_id]
+            self.scored += len(scored)
+            self.last_lag = lag
+            self.max_lag = max(self.max_lag, lag)
+            self._total_lag += lag * len(scored)
+
+    def join(self):
+        self._queue.join()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                'queue_depth': self._queue.qsize(),
+                'queue_capacity': self._queue.maxsize,
+                'workers': self._workers,
+                'enqueued': self.enqueued,
+                'scored': self.scored,
+                'dropped': self.dropped,
+                'stale': self.stale,
+                'failed': self.failed,
+                'last_lag_seconds': round(self.last_lag, 4),
+                'max_lag_seconds': round(self.max_lag, 4),
+                'avg_lag_seconds': round(self._total_lag / self.scored, 4) if self.scored else 0.0,
+            }
+
+
+def get_scoring_queue(app) -> Optional[ScoringQueue]:
+    return getattr(app, '_scoring_queue', None)
+
+
+def start_scoring_worker(app, scorer=None):
+    if get_scoring_queue(app) is not None:
+        return get_scoring_queue(app)
+    q = ScoringQueue(
+        app,
+        workers=app.config.get('SCORING_WORKERS', 4),
+        maxsize=app.config.get('SCORING_QUEUE_SIZE', 1000),
+        scorer=scorer,
+    )
+    q.start()
+    setattr(app, '_scoring_queue', q)
+    return q
+
+
+def enqueue_priority_score(app, task_id: int, task_data: Dict[str, Any]) -> bool:
+    if configured_scorer() == 'local':
+        # Callers store provisional_score() before enqueueing, which already is the final score
+        return True
+    q = get_scoring_queue(app)
+    if q is None:
+        # No worker running (e.g. scripts); score inline as before
+        with app.app_context():
+            task = db.session.get(Task, task_id)
+            if task is not None:
+                task.priority_score, task.score_source = priority_score_with_source(task_data)
+                db.session.commit()
+        return True
+    return q.submit(task_id, task_data)
+
+
+def enqueue_priority_scores(app, items: Sequence[Tuple[int, Dict[str, Any]]]) -> bool:
+    """enqueue_priority_score for many (task_id, task_data) pairs, e.g. a bulk import, in batched jobs."""
+    if configured_scorer() == 'local' or not items:
+        return True
+    q = get_scoring_queue(app)
+    if q is None:
+        scores, sources = score_many_with_sources([data for _, data in items])
+        results = {task_id: result for (task_id, _), result in zip(items, zip(scores, sources))}
+        with app.app_context():
+            for task in Task.query.filter(Task.id.in_(list(results))):
+                task.priority_score, task.score_source = results[task.id]
+            db.session.commit()
+        return True
+    return q.submit_many(items)
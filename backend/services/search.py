@@ -0,0 +1,172 @@
+import html
+import logging
+import re
+from typing import Dict, List, Optional
+from sqlalchemy import DateTime, or_, text
+from ..models import db, Task, Subtask
+
+log = logging.getLogger(__name__)
+
+FTS_TABLE = 'task_fts'
+MAX_QUERY_TERMS = 16
+# bm25 weights per column: owner (only filters), title, description, subtask titles
+RANK_WEIGHTS = (0.0, 10.0, 4.0, 2.0)
+# Private-use markers, swapped for <mark> after the snippet text is HTML-escaped
+_HL_START, _HL_END = '\x02', '\x03'
+_TERM_RE = re.compile(r'\w+', re.UNICODE)
+# engine url -> whether the FTS table exists there
+_available: Dict[str, bool] = {}
+
+_SUBTASK_TITLES = "coalesce((SELECT group_concat(title, ' ') FROM subtask WHERE task_id = {id}), '')"
+
+# One row per task (rowid = task.id). The owner column holds 'u<user_id>' so a user's
+# search is an index intersection instead of a scan over everybody's matches.
+FTS_DDL = [
+    f"CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5("
+    "owner, title, description, subtasks, tokenize='unicode61 remove_diacritics 2', prefix='2 3')",
+    f"CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_task_ai AFTER INSERT ON task BEGIN "
+    f"INSERT INTO {FTS_TABLE}(rowid, owner, title, description, subtasks) "
+    f"VALUES (new.id, 'u' || new.user_id, new.title, coalesce(new.description, ''), "
+    f"{_SUBTASK_TITLES.format(id='new.id')}); END",
+    # Score, status and reminder writes are frequent and don't touch the index
+    f"CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_task_au AFTER UPDATE OF title, description, user_id ON task BEGIN "
+    f"UPDATE {FTS_TABLE} SET owner = 'u' || new.user_id, title = new.title, "
+    f"description = coalesce(new.description, '') WHERE rowid = new.id; END",
+    f"CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_task_ad AFTER DELETE ON task BEGIN "
+    f"DELETE FROM {FTS_TABLE} WHERE rowid = old.id; END",
+    f"CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_subtask_ai AFTER INSERT ON subtask BEGIN "
+    f"UPDATE {FTS_TABLE} SET subtasks = {_SUBTASK_TITLES.format(id='new.task_id')} WHERE rowid = new.task_id; END",
+    f"CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_subtask_au AFTER UPDATE OF title, task_id ON subtask BEGIN "
+    f"UPDATE {FTS_TABLE} SET subtasks = {_SUBTASK_TITLES.format(id='old.task_id')} WHERE rowid = old.task_id; "
+    f"UPDATE {FTS_TABLE} SET subtasks = {_SUBTASK_TITLES.format(id='new.task_id')} WHERE rowid = new.task_id; END",
+    f"CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_subtask_ad AFTER DELETE ON subtask BEGIN "
+    f"UPDATE {FTS_TABLE} SET subtasks = {_SUBTASK_TITLES.format(id='old.task_id')} WHERE rowid = old.task_id; END",
+]
+
+
+def _fts_exists(conn) -> bool:
+    return conn.execute(
+        text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :name"), {'name': FTS_TABLE}
+    ).first() is not None
+
+
+def rebuild_search_index(conn):
+    """Refills the index from the task and subtask tables (e.g. after restoring a backup)."""
+    conn.execute(text(f'DELETE FROM {FTS_TABLE}'))
+    conn.execute(text(
+        f"INSERT INTO {FTS_TABLE}(rowid, owner, title, description, subtasks) "
+        f"SELECT id, 'u' || user_id, title, coalesce(description, ''), {_SUBTASK_TITLES.format(id='task.id')} "
+        f"FROM task"
+    ))
+    conn.execute(text(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('optimize')"))
+
+
+def install_search_index(conn) -> bool:
+    """
+    Creates the FTS5 table and its sync triggers on SQLite, filling it from existing
+    tasks the first time. Returns True if the index was created. Other databases, and
+    SQLite builds without FTS5, keep the LIKE fallback in search_tasks.
+    """
+    if conn.dialect.name != 'sqlite':
+        return False
+    if _fts_exists(conn):
+        # IF NOT EXISTS: only restores triggers that went missing
+        for ddl in FTS_DDL[1:]:
+            conn.execute(text(ddl))
+        return False
+    try:
+        # A failed CREATE leaves nothing behind, so the rest of the upgrade can go on
+        conn.execute(text(FTS_DDL[0]))
+    except Exception as exc:
+        log.warning('full-text search disabled, could not create %s: %s', FTS_TABLE, exc)
+        return False
+    for ddl in FTS_DDL[1:]:
+        conn.execute(text(ddl))
+    rebuild_search_index(conn)
+    _available.clear()
+    return True
+
+
+def search_available() -> bool:
+    key = str(db.engine.url)
+    if key not in _available:
+        _available[key] = db.engine.dialect.name == 'sqlite' and _fts_exists(db.session.connection())
+    return _available[key]
+
+
+def query_terms(q: str) -> List[str]:
+    return _TERM_RE.findall(q.lower())[:MAX_QUERY_TERMS]
+
+
+def match_expression(uid: int, terms: List[str]) -> str:
+    """All terms must match (the last one as a prefix, for search-as-you-type), within the user's tasks."""
+    phrases = [f'"{t}"' for t in terms]
+    phrases[-1] += '*'
+    return f"owner:u{int(uid)} AND {{title description subtasks}}: ({' '.join(phrases)})"
+
+
+def _highlight(value: Optional[str]) -> Optional[str]:
+    if not value:
+        return None
+    return html.escape(value, quote=False).replace(_HL_START, '<mark>').replace(_HL_END, '</mark>')
+
+
+def search_tasks(uid: int, q: str, limit: int, offset: int = 0) -> List[Dict]:
+    """
+    Tasks of `uid` matching every word of `q`, best first (BM25, titles weigh most),
+    with HTML-escaped highlights where matches are wrapped in <mark>. Fetches limit + 1
+    rows so the caller can tell whether another page exists.
+    """
+    terms = query_terms(q)
+    if not terms:
+        return []
+    if not search_available():
+        return _search_like(uid, terms, limit, offset)
+    marks = f"'{_HL_START}', '{_HL_END}'"
+    # Spelled out rather than configured as the table's rank function, which is slower
+    score = f"bm25({FTS_TABLE}, {', '.join(f'{w:g}' for w in RANK_WEIGHTS)})"
+    rows = db.session.execute(text(
+        f"SELECT task.id, task.title, task.status, task.priority, task.due_date, {score} AS score, "
+        f"highlight({FTS_TABLE}, 1, {marks}) AS title_hl, "
+        f"snippet({FTS_TABLE}, 2, {marks}, '…', 16) AS description_hl, "
+        f"snippet({FTS_TABLE}, 3, {marks}, '…', 12) AS subtasks_hl "
+        f"FROM {FTS_TABLE} JOIN task ON task.id = {FTS_TABLE}.rowid "
+        f"WHERE {FTS_TABLE} MATCH :match AND task.user_id = :uid "
+        f"ORDER BY score LIMIT :limit OFFSET :offset"
+    ).columns(due_date=DateTime), {'match': match_expression(uid, terms), 'uid': uid, 'limit': limit + 1, 'offset': offset}).all()
+    return [{
+        'id': r.id,
+        'title': r.title,
+        'status': r.status,
+        'priority': r.priority,
+        'due_date': r.due_date,
+        # bm25() is negative, more negative is better; flip it so higher means more relevant
+        'rank': round(-r.score, 6),
+        'highlights': {
+            'title': _highlight(r.title_hl),
+            'description': _highlight(r.description_hl),
+            'subtasks': _highlight(r.subtasks_hl),
+        },
+    } for r in rows]
+
+
+def _like_pattern(term: str) -> str:
+    # \w+ terms can contain '_', a LIKE wildcard; escape it (and % and the escape itself) to match literally
+    escaped = term.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+    return f'%{escaped}%'
+
+
+def _search_like(uid: int, terms: List[str], limit: int, offset: int) -> List[Dict]:
+    """Unranked substring search over titles, descriptions and subtask titles, for databases without FTS5."""
+    query = db.session.query(Task.id, Task.title, Task.status, Task.priority, Task.due_date).filter(Task.user_id == uid)
+    for term in terms:
+        pattern = _like_pattern(term)
+        in_subtasks = db.session.query(Subtask.id).filter(
+            Subtask.task_id == Task.id, Subtask.title.ilike(pattern, escape='\\')
+        ).exists()
+        query = query.filter(or_(
+            Task.title.ilike(pattern, escape='\\'), Task.description.ilike(pattern, escape='\\'), in_subtasks
+        ))
+    rows = query.order_by(Task.priority_score.desc(), Task.id).limit(limit + 1).offset(offset).all()
+    return [{'id': r.id, 'title': r.title, 'status': r.status, 'priority': r.priority, 'due_date': r.due_date,
+             'rank': None, 'highlights': None} for r in rows]
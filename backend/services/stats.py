@@ -0,0 +1,237 @@
+from collections import defaultdict
+from functools import partial
+from datetime import datetime, timedelta
+from typing import Dict, Any, Optional
+from sqlalchemy import event, func, case, inspect, update, insert, delete
+from sqlalchemy.orm import Session
+from ..models import db, Task, TaskCounter
+
+# Task columns mirrored in TaskCounter; 'total' is tracked under value ''
+COUNTED_DIMENSIONS = ('status', 'priority', 'category')
+LEGACY_STATUSES = ('completed', 'pending', 'in_progress')
+
+# Column defaults are applied at INSERT time, after before_flush has already looked
+_COLUMN_DEFAULTS = {
+    dim: (Task.__table__.c[dim].default.arg if Task.__table__.c[dim].default is not None else None)
+    for dim in COUNTED_DIMENSIONS
+}
+
+_listeners_installed = False
+
+
+def _due_window(now: datetime, due_soon_hours: float):
+    open_task = Task.status != 'completed'
+    overdue = func.sum(case(((Task.due_date < now) & open_task, 1), else_=0))
+    due_soon = func.sum(case((
+        (Task.due_date >= now) & (Task.due_date < now + timedelta(hours=due_soon_hours)) & open_task, 1
+    ), else_=0))
+    return overdue, due_soon
+
+
+def _shape(by_status, by_priority, by_category, total, overdue, due_soon) -> Dict[str, Any]:
+    out = {
+        'total': total,
+        'by_status': by_status,
+        'by_priority': by_priority,
+        'by_category': by_category,
+        'overdue': overdue,
+        'due_soon': due_soon,
+    }
+    # Flat keys the dashboard already reads
+    for status in LEGACY_STATUSES:
+        out[status] = by_status.get(status, 0)
+    return out
+
+
+def compute_stats(uid: int, now: Optional[datetime] = None, due_soon_hours: float = 24) -> Dict[str, Any]:
+    """Every status/priority/category count plus overdue and due-soon in one GROUP BY query."""
+    now = now or datetime.now()
+    overdue, due_soon = _due_window(now, due_soon_hours)
+    rows = (
+        db.session.query(Task.status, Task.priority, Task.category, func.count(Task.id), overdue, due_soon)
+        .filter(Task.user_id == uid)
+        .group_by(Task.status, Task.priority, Task.category)
+        .all()
+    )
+    by_status, by_priority, by_category = defaultdict(int), defaultdict(int), defaultdict(int)
+    total = overdue_n = due_soon_n = 0
+    for status, priority, category, n, od, ds in rows:
+        by_status[status or ''] += n
+        by_priority[priority or ''] += n
+        by_category[category or ''] += n
+        total += n
+        overdue_n += od or 0
+        due_soon_n += ds or 0
+    return _shape(dict(by_status), dict(by_priority), dict(by_category), total, overdue_n, due_soon_n)
+
+
+def counter_stats(uid: int, now: Optional[datetime] = None, due_soon_hours: float = 24) -> Dict[str, Any]:
+    """
+    Same shape as compute_stats, read from TaskCounter. Overdue/due-soon depend on the
+    clock so they stay a (single, indexed) query.
+    """
+    now = now or datetime.now()
+    rows = db.session.query(TaskCounter.dimension, TaskCounter.value, TaskCounter.count).filter(
+        TaskCounter.user_id == uid).all()
+    if not any(dim == 'total' for dim, _, _ in rows):
+        rebuild_counters(uid)
+        db.session.commit()
+        rows = db.session.query(TaskCounter.dimension, TaskCounter.value, TaskCounter.count).filter(
+            TaskCounter.user_id == uid).all()
+    dims = {d: {} for d in COUNTED_DIMENSIONS}
+    total = 0
+    for dim, value, count in rows:
+        if dim == 'total':
+            total = count
+        elif count:
+            dims[dim][value] = count
+    overdue, due_soon = _due_window(now, due_soon_hours)
+    od, ds = db.session.query(overdue, due_soon).filter(Task.user_id == uid).one()
+    return _shape(dims['status'], dims['priority'], dims['category'], total, od or 0, ds or 0)
+
+
+def _grouped_counts(uid: Optional[int] = None):
+    """{user_id: {(dimension, value): count}} straight from the task table."""
+    counts = defaultdict(lambda: defaultdict(int))
+    query = db.session.query(Task.user_id, Task.status, Task.priority, Task.category, func.count(Task.id))
+    if uid is not None:
+        query = query.filter(Task.user_id == uid)
+    for user_id, status, priority, category, n in query.group_by(
+            Task.user_id, Task.status, Task.priority, Task.category):
+        c = counts[user_id]
+        c[('total', '')] += n
+        c[('status', status or '')] += n
+        c[('priority', priority or '')] += n
+        c[('category', category or '')] += n
+    return counts
+
+
+def rebuild_counters(uid: Optional[int] = None):
+    """Recomputes TaskCounter rows for one user (or everyone). Caller commits."""
+    counts = _grouped_counts(uid)
+    stmt = delete(TaskCounter)
+    if uid is not None:
+        stmt = stmt.where(TaskCounter.user_id == uid)
+        # Keep a 'total' row even for users without tasks so readers know it is built
+        counts[uid][('total', '')] += 0
+    db.session.execute(stmt)
+    rows = [
+        {'user_id': user_id, 'dimension': dim, 'value': value, 'count': n}
+        for user_id, c in counts.items() for (dim, value), n in c.items()
+    ]
+    if rows:
+        db.session.execute(insert(TaskCounter), rows)
+
+
+def verify_counters(uid: Optional[int] = None) -> Dict[int, Dict[str, Any]]:
+    """Returns {user_id: {'dimension:value': (counter, actual)}} for every mismatch."""
+    actual = _grouped_counts(uid)
+    stored = defaultdict(dict)
+    query = db.session.query(TaskCounter.user_id, TaskCounter.dimension, TaskCounter.value, TaskCounter.count)
+    if uid is not None:
+        query = query.filter(TaskCounter.user_id == uid)
+    for user_id, dim, value, count in query:
+        stored[user_id][(dim, value)] = count
+    mismatches = {}
+    for user_id in set(actual) | set(stored):
+        diff = {}
+        keys = set(actual.get(user_id, {})) | set(stored.get(user_id, {}))
+        for key in keys:
+            have = stored.get(user_id, {}).get(key, 0)
+            want = actual.get(user_id, {}).get(key, 0)
+            if have != want:
+                diff[f'{key[0]}:{key[1]}'] = (have, want)
+        if diff:
+            mismatches[user_id] = diff
+    return mismatches
+
+
+def apply_counter_deltas(conn, deltas):
+    """deltas: {(user_id, dimension, value): change}. Used by the flush hook and bulk inserts."""
+    for (user_id, dim, value), change in deltas.items():
+        if not change:
+            continue
+        res = conn.execute(
+            update(TaskCounter)
+            .where(TaskCounter.user_id == user_id, TaskCounter.dimension == dim, TaskCounter.value == value)
+            .values(count=TaskCounter.count + change)
+        )
+        if res.rowcount == 0:
+            conn.execute(insert(TaskCounter).values(user_id=user_id, dimension=dim, value=value, count=change))
+
+
+def task_deltas(rows, sign: int = 1, deltas=None):
+    """Adds +/-1 per dimension for each task-like row (needs user_id, status, priority, category)."""
+    deltas = deltas if deltas is not None else defaultdict(int)
+    for r in rows:
+        get = r.get if isinstance(r, dict) else partial(getattr, r)
+        uid = get('user_id')
+        deltas[(uid, 'total', '')] += sign
+        for dim in COUNTED_DIMENSIONS:
+            value = get(dim)
+            if value is None:
+                value = _COLUMN_DEFAULTS[dim]
+            deltas[(uid, dim, value or '')] += sign
+    return deltas
+
+
+def _before_flush(session, flush_context, instances):
+    deltas = defaultdict(int)
+    task_deltas([o for o in session.new if isinstance(o, Task)], +1, deltas)
+    task_deltas([o for o in session.deleted if isinstance(o, Task)], -1, deltas)
+    for obj in session.dirty:
+        if not isinstance(obj, Task) or obj in session.deleted:
+            continue
+        state = inspect(obj)
+        for dim in COUNTED_DIMENSIONS:
+            hist = state.attrs[dim].history
+            if not hist.has_changes():
+                continue
+            for old in hist.deleted:
+                deltas[(obj.user_id, dim, old or '')] -= 1
+            for new in hist.added:
+                deltas[(obj.user_id, dim, new or '')] += 1
+    if deltas:
+        session.info.setdefault('task_counter_deltas', defaultdict(int))
+        for key, change in deltas.items():
+            session.info['task_counter_deltas'][key] += change
+
+
+def _after_flush(session, flush_context):
+    deltas = session.info.pop('task_counter_deltas', None)
+    if deltas:
+        apply_counter_deltas(session.connection(), deltas)
+
+
+def _load_old_value(target, value, oldvalue, initiator):
+    return value
+
+
+def install_counter_listeners():
+    """Keeps TaskCounter in step with every ORM flush. Idempotent."""
+    global _listeners_installed
+    if _listeners_installed:
+        return
+    # active_history makes SQLAlchemy load the previous value on assignment, so the
+    # flush hook always knows which counter to decrement
+    for dim in COUNTED_DIMENSIONS:
+        event.listen(getattr(Task, dim), 'set', _load_old_value, active_history=True, retval=True)
+    event.listen(Session, 'before_flush', _before_flush)
+    event.listen(Session, 'after_flush', _after_flush)
+    _listeners_installed = True
+
+
+def counters_enabled(app) -> bool:
+    return bool(app.config.get('STATS_COUNTERS'))
+
+
+def init_stats_counters(app):
+    """
+    Installs the flush hooks. Nothing is rebuilt here: a full rebuild on every worker
+    start would scan the task table and race with sibling workers and live writes.
+    counter_stats builds a user's counters on first read; drift (e.g. from running
+    with STATS_COUNTERS off) is repaired with `check-stats-counters --fix`.
+    """
+    if not counters_enabled(app):
+        return
+    install_counter_listeners()
@@ -0,0 +1,114 @@
+import os
+import threading
+import time
+from collections import OrderedDict, namedtuple
+from typing import Dict, Iterable, Optional
+from ..models import db, User
+
+# Plain snapshot, safe to share across threads and sessions (unlike a User instance)
+UserInfo = namedtuple('UserInfo', ['id', 'email', 'reminder_digest'])
+
+
+class UserCache:
+    """Small TTL'd LRU of user records keyed by id, for hot paths that only need the email and preferences."""
+
+    def __init__(self, maxsize: int = 1024, ttl: float = 300.0):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: "OrderedDict[int, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def _lookup(self, user_id: int, now: float):
+        entry = self._data.get(user_id)
+        if entry is None or now - entry[1] > self.ttl:
+            return None
+        self._data.move_to_end(user_id)
+        return entry
+
+    def _store(self, info: Optional[UserInfo], user_id: int, now: float):
+        self._data[user_id] = (info, now)
+        self._data.move_to_end(user_id)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def get(self, user_id: int) -> Optional[UserInfo]:
+        """Must run inside an app context. Missing users are cached too (as None)."""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._lookup(user_id, now)
+            if entry is not None:
+                self.hits += 1
+                return entry[0]
+            self.misses += 1
+        user = db.session.get(User, user_id)
+        info = UserInfo(user.id, user.email, user.reminder_digest) if user else None
+        with self._lock:
+            self._store(info, user_id, now)
+        return info
+
+    def get_many(self, user_ids: Iterable[int]) -> Dict[int, Optional[UserInfo]]:
+        """Like get() for several ids, fetching all misses in one query."""
+        now = time.monotonic()
+        out: Dict[int, Optional[UserInfo]] = {}
+        missing = []
+        with self._lock:
+            for user_id in set(user_ids):
+                entry = self._lookup(user_id, now)
+                if entry is not None:
+                    self.hits += 1
+                    out[user_id] = entry[0]
+                else:
+                    self.misses += 1
+                    missing.append(user_id)
+        if missing:
+            rows = (db.session.query(User.id, User.email, User.reminder_digest)
+                    .filter(User.id.in_(missing)).all())
+            found = {r.id: UserInfo(*r) for r in rows}
+            with self._lock:
+                for user_id in missing:
+                    out[user_id] = found.get(user_id)
+                    self._store(out[user_id], user_id, now)
+        return out
+
+    def invalidate(self, user_id: int):
+        with self._lock:
+            self._data.pop(user_id, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def stats(self):
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                'size': len(self._data),
+                'maxsize': self.maxsize,
+                'ttl_seconds': self.ttl,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_ratio': round(self.hits / total, 4) if total else 0.0,
+            }
+
+
+_cache: Optional[UserCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_user_cache() -> UserCache:
+    # Built on first use so values from backend/.env are already loaded
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = UserCache(
+                    maxsize=int(os.environ.get('USER_CACHE_SIZE', '1024')),
+                    ttl=float(os.environ.get('USER_CACHE_TTL', '300')),
+                )
+    return _cache
+
+
+def cached_user(user_id: int) -> Optional[UserInfo]:
+    return get_user_cache().get(user_id)
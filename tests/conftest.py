@@ -0,0 +1,61 @@
+import os
+
+# Set before backend is imported: Config reads JWT_SECRET_KEY at import time, and
+# create_app's load_dotenv never overrides variables that are already set
+os.environ['PRIORITY_SCORER'] = 'local'
+os.environ['GEMINI_API_KEY'] = ''
+os.environ['MAIL_FROM_EMAIL'] = 'tests@example.com'
+os.environ['SMTP_STARTTLS'] = 'false'
+os.environ['PROFILE_SAMPLE_RATE'] = '0'
+os.environ['JWT_SECRET_KEY'] = 'tests-only-jwt-secret-key-0123456789'
+
+import pytest
+
+from backend.app import create_app
+from backend.bench.stubs import FakeSMTP
+from backend.models import db
+from backend.services import email as email_service
+from backend.services.email import MailDispatcher, smtp_settings
+from backend.services.reminder import get_reminder_scheduler
+from backend.services.users import get_user_cache
+
+
+@pytest.fixture(scope='session', autouse=True)
+def fake_smtp():
+    dispatcher = MailDispatcher(smtp_settings(), smtp_factory=FakeSMTP)
+    dispatcher.start()
+    email_service._dispatcher = dispatcher
+    return FakeSMTP
+
+
+@pytest.fixture
+def app_env():
+    """Extra environment for create_app; override in a test module to change settings."""
+    return {}
+
+
+@pytest.fixture
+def app(tmp_path, monkeypatch, app_env):
+    monkeypatch.setenv('DATABASE_URL', f"sqlite:///{tmp_path / 'test.db'}")
+    for name, value in app_env.items():
+        monkeypatch.setenv(name, value)
+    # Ids restart at 1 in every fresh database
+    get_user_cache().clear()
+    app = create_app()
+    app.config['TESTING'] = True
+    yield app
+    get_reminder_scheduler(app).stop()
+    with app.app_context():
+        db.engine.dispose()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+@pytest.fixture
+def auth_headers(client):
+    client.post('/api/auth/register', json={'email': 'user@example.com', 'password': 'secret'})
+    token = client.post('/api/auth/login', json={'email': 'user@example.com', 'password': 'secret'}).json['access_token']
+    return {'Authorization': f'Bearer {token}'}
@@ -0,0 +1,68 @@
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from backend.services import bulk_import
+from backend.services.bulk_import import split_lines
+
+
+def test_split_lines_strips_list_markers():
+    text = "- buy groceries\n* call mom\n[ ] pay rent\n- [x] file taxes\n\n   \nplain task"
+    assert split_lines(text) == ['buy groceries', 'call mom', 'pay rent', 'file taxes', 'plain task']
+
+
+def test_json_lines_are_normalized_like_text(client, auth_headers):
+    lines = ['- buy groceries', '  * call mom  ', '[ ] pay rent', '', '   ']
+    by_lines = client.post('/api/tasks/bulk', headers=auth_headers, json={'lines': lines})
+    by_text = client.post('/api/tasks/bulk', headers=auth_headers, json={'text': '\n'.join(lines)})
+    assert by_lines.status_code == by_text.status_code == 201
+    assert [r['text'] for r in by_lines.json['results']] == ['buy groceries', 'call mom', 'pay rent']
+    assert [r['text'] for r in by_lines.json['results']] == [r['text'] for r in by_text.json['results']]
+    assert [r['parsed']['title'] for r in by_lines.json['results']] == \
+        [r['parsed']['title'] for r in by_text.json['results']]
+
+
+def test_empty_json_lines_are_rejected(client, auth_headers):
+    resp = client.post('/api/tasks/bulk', headers=auth_headers, json={'lines': ['', '  ']})
+    assert resp.status_code == 400
+
+
+def broken_pool():
+    pool = ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context('spawn'))
+    # A worker that dies breaks the whole pool, as an OOM kill would
+    pool.submit(os._exit, 1).exception()
+    return pool
+
+
+def test_broken_parse_pool_is_replaced(monkeypatch):
+    lines = [f'task {i} tomorrow' for i in range(bulk_import.INLINE_PARSE_LINES + 10)]
+    pool = broken_pool()
+    monkeypatch.setattr(bulk_import, '_pool', pool)
+
+    results = bulk_import.parse_lines(lines)
+    assert [r['parsed']['title'] for r in results] == [bulk_import.parse_task_text(l)['title'] for l in lines]
+    assert bulk_import._pool is not None and bulk_import._pool is not pool
+
+
+def test_pool_that_keeps_breaking_gives_per_line_errors(monkeypatch):
+    lines = [f'task {i}' for i in range(bulk_import.INLINE_PARSE_LINES + 10)]
+    monkeypatch.setattr(bulk_import, '_parse_pool', broken_pool)
+
+    results = bulk_import.parse_lines(lines)
+    assert len(results) == len(lines)
+    assert all(r == {'error': 'parser process crashed'} for r in results)
+
+
+def test_bulk_import_queues_batched_scoring_jobs(app, client, auth_headers, monkeypatch):
+    from backend.services.scoring import BATCH_JOB_SIZE, get_scoring_queue
+
+    monkeypatch.setenv('PRIORITY_SCORER', 'gemini')
+    q = get_scoring_queue(app)
+    submitted = []
+    monkeypatch.setattr(q, '_put', lambda items: submitted.append(list(items)) or True)
+
+    lines = [f'imported task {i}' for i in range(BATCH_JOB_SIZE * 2 + 5)]
+    resp = client.post('/api/tasks/bulk', headers=auth_headers, json={'lines': lines})
+    assert resp.status_code == 201
+    assert [len(job) for job in submitted] == [BATCH_JOB_SIZE, BATCH_JOB_SIZE, 5]
+    assert [task_id for job in submitted for task_id, _ in job] == [r['id'] for r in resp.json['results']]
@@ -0,0 +1,129 @@
+import json
+import threading
+import time
+
+import pytest
+
+from backend.bench.stubs import FakeGeminiServer
+from backend.services import gemini_client, ml
+from backend.services.gemini_client import CircuitBreaker, GeminiClient
+from backend.services.local_model import local_priority_score
+
+
+@pytest.fixture
+def server():
+    server = FakeGeminiServer(score=80.0).start()
+    yield server
+    server.stop()
+
+
+def make_client(server, **kwargs):
+    kwargs.setdefault('timeout', 2.0)
+    return GeminiClient('test-key', 'test-model', base_url=server.url, **kwargs)
+
+
+def generate(client):
+    return client.generate('system', 'Title: write report')
+
+
+def test_generate_returns_model_text(server):
+    client = make_client(server)
+    assert json.loads(generate(client)) == {'priority_score': 80.0}
+    assert client.stats()['ok'] == 1
+
+
+def test_deadline_returns_none_without_waiting_for_the_server(server):
+    server.hang_rate = 1.0
+    server.hang_seconds = 3.0
+    client = make_client(server, timeout=0.3)
+
+    start = time.monotonic()
+    assert generate(client) is None
+    assert time.monotonic() - start < 1.5
+    assert client.stats()['timeouts'] == 1
+
+
+def test_timeout_falls_back_to_local_score(server, monkeypatch):
+    server.hang_rate = 1.0
+    server.hang_seconds = 3.0
+    monkeypatch.setattr(gemini_client, '_client', make_client(server, timeout=0.3))
+    monkeypatch.setenv('PRIORITY_SCORER', 'gemini')
+    task = {'title': 'deadline fallback test', 'priority': 'high', 'due_date': '2100-01-01T09:00:00'}
+
+    assert ml.gemini_priority_score(task) == local_priority_score(task)
+    assert ml.priority_score_with_source(task) == (local_priority_score(task), ml.SOURCE_LOCAL)
+    assert gemini_client._client.stats()['fallbacks'] == 2
+
+
+def test_model_answer_is_reported_as_gemini(server, monkeypatch):
+    monkeypatch.setattr(gemini_client, '_client', make_client(server))
+    monkeypatch.setenv('PRIORITY_SCORER', 'gemini')
+    task = {'title': 'remote answer test', 'priority': 'low'}
+    assert ml.priority_score_with_source(task) == (80.0, ml.SOURCE_GEMINI)
+
+
+def test_breaker_opens_after_repeated_failures_and_recovers(server):
+    server.error_rate = 1.0
+    client = make_client(server, breaker=CircuitBreaker(threshold=3, reset_after=0.3))
+
+    for _ in range(3):
+        assert generate(client) is None
+    assert client.breaker.state == 'open'
+    assert client.breaker.times_opened == 1
+
+    # While open, calls are refused without reaching the server
+    requests = server.requests
+    assert generate(client) is None
+    assert server.requests == requests
+    assert client.stats()['short_circuited'] == 1
+
+    time.sleep(0.35)
+    assert client.breaker.state == 'half_open'
+    server.error_rate = 0.0
+    assert generate(client) is not None
+    assert client.breaker.state == 'closed'
+    assert generate(client) is not None
+
+
+def test_failed_half_open_probe_opens_breaker_again(server):
+    server.error_rate = 1.0
+    client = make_client(server, breaker=CircuitBreaker(threshold=2, reset_after=0.2))
+    generate(client)
+    generate(client)
+    assert client.breaker.state == 'open'
+
+    time.sleep(0.25)
+    assert generate(client) is None
+    assert client.breaker.state == 'open'
+    assert client.breaker.times_opened == 2
+
+
+def test_half_open_lets_a_single_probe_through():
+    breaker = CircuitBreaker(threshold=1, reset_after=0.05)
+    breaker.record_failure()
+    time.sleep(0.06)
+    assert breaker.allow()
+    assert not breaker.allow()
+    breaker.record_success()
+    assert breaker.state == 'closed'
+
+
+def test_concurrent_requests_are_capped(server):
+    server.model.latency = 0.1
+    client = make_client(server, max_concurrency=2)
+    results = []
+
+    def call():
+        results.append(generate(client))
+
+    threads = [threading.Thread(target=call) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert len(results) == 8 and all(r is not None for r in results)
+    assert server.requests == 8
+    assert server.max_in_flight == 2
+    # Keep-alive pooling: no more connections than concurrent calls
+    assert server.connections <= 2
@@ -0,0 +1,60 @@
+from contextlib import contextmanager
+
+import pytest
+from sqlalchemy import event
+
+from backend.models import db, Subtask, Task, User
+
+
+@contextmanager
+def count_statements(app):
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    with app.app_context():
+        engine = db.engine
+    event.listen(engine, 'before_cursor_execute', before_cursor_execute)
+    try:
+        yield statements
+    finally:
+        event.remove(engine, 'before_cursor_execute', before_cursor_execute)
+
+
+def add_tasks(app, n, subtasks=3):
+    with app.app_context():
+        uid = User.query.filter_by(email='user@example.com').one().id
+        for i in range(n):
+            task = Task(user_id=uid, title=f'task {i}', priority_score=float(i))
+            task.subtasks = [Subtask(title=f'step {j}') for j in range(subtasks)]
+            db.session.add(task)
+        db.session.commit()
+
+
+def list_statements(app, client, headers, query=''):
+    with count_statements(app) as statements:
+        resp = client.get(f'/api/tasks{query}', headers=headers)
+    assert resp.status_code == 200
+    return resp.json, len(statements)
+
+
+@pytest.mark.parametrize('query', ['', '?include=subtasks&limit=500', '?fields=title&include=subtasks'])
+def test_list_query_count_does_not_grow_with_tasks(app, client, auth_headers, query):
+    add_tasks(app, 5)
+    tasks, small = list_statements(app, client, auth_headers, query)
+    assert len(tasks) == 5
+    assert all(len(t['subtasks']) == 3 for t in tasks)
+
+    add_tasks(app, 95)
+    tasks, large = list_statements(app, client, auth_headers, query)
+    assert len(tasks) == 100
+    assert all(len(t['subtasks']) == 3 for t in tasks)
+    assert large == small
+
+
+def test_subtasks_are_loaded_in_one_query(app, client, auth_headers):
+    add_tasks(app, 20)
+    with count_statements(app) as statements:
+        client.get('/api/tasks?include=subtasks', headers=auth_headers)
+    assert sum('FROM subtask' in s for s in statements) == 1
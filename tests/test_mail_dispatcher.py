@@ -0,0 +1,110 @@
+import smtplib
+import time
+
+import pytest
+
+from backend.bench.stubs import FakeSMTP
+from backend.services.email import MailDispatcher, _build_message, smtp_settings
+
+
+class ScriptedSMTP(FakeSMTP):
+    """FakeSMTP whose sends fail as scripted: `failures` is consumed one send at a time (None = accept)."""
+
+    def __init__(self, server, host, port, timeout=None):
+        super().__init__(host, port, timeout)
+        self.server = server
+        self.closed = False
+
+    def send_message(self, msg):
+        if self.closed:
+            raise smtplib.SMTPServerDisconnected('session is closed')
+        failure = self.server.failures.pop(0) if self.server.failures else None
+        if failure is not None:
+            if isinstance(failure, smtplib.SMTPServerDisconnected):
+                self.closed = True
+            raise failure
+        self.server.delivered.append((id(self), msg['Subject']))
+
+    def quit(self):
+        self.server.quits += 1
+        self.closed = True
+
+
+class ScriptedServer:
+    def __init__(self, failures=()):
+        self.failures = list(failures)
+        self.delivered = []
+        self.sessions = []
+        self.quits = 0
+
+    def __call__(self, host, port, timeout=None):
+        session = ScriptedSMTP(self, host, port, timeout)
+        self.sessions.append(session)
+        return session
+
+
+@pytest.fixture
+def settings():
+    return smtp_settings()
+
+
+def dispatch(server, settings, subjects, **kwargs):
+    kwargs.setdefault('workers', 1)
+    dispatcher = MailDispatcher(settings, smtp_factory=server, **kwargs)
+    dispatcher.start()
+    futures = [dispatcher.submit(_build_message(settings, s, 'to@example.com', 'body')) for s in subjects]
+    dispatcher.join()
+    return dispatcher, futures
+
+
+def test_session_is_reused_across_messages(settings):
+    server = ScriptedServer()
+    dispatcher, futures = dispatch(server, settings, [f'm{i}' for i in range(20)])
+
+    assert all(f.result() is True for f in futures)
+    assert len(server.sessions) == 1
+    assert [s for _, s in server.delivered] == [f'm{i}' for i in range(20)]
+    stats = dispatcher.stats()
+    assert (stats['sent'], stats['connects'], stats['retries']) == (20, 1, 0)
+    assert stats['messages_per_connect'] == 20.0
+
+
+def test_dropped_session_reconnects_with_backoff(settings):
+    drop = smtplib.SMTPServerDisconnected('connection lost')
+    server = ScriptedServer(failures=[None, drop, drop])
+    start = time.monotonic()
+    dispatcher, futures = dispatch(server, settings, ['a', 'b', 'c'], backoff=0.05, max_attempts=3)
+
+    assert all(f.result() is True for f in futures)
+    # Waited 0.05s, then twice that, before the third session took 'b'
+    assert time.monotonic() - start >= 0.15
+    assert [s for _, s in server.delivered] == ['a', 'b', 'c']
+    stats = dispatcher.stats()
+    assert (stats['sent'], stats['failed'], stats['retries'], stats['connects']) == (3, 0, 2, 3)
+    # Later messages stay on the new session
+    assert len({session for session, _ in server.delivered[1:]}) == 1
+
+
+def test_session_drop_gives_up_after_max_attempts(settings):
+    drop = smtplib.SMTPServerDisconnected('connection lost')
+    server = ScriptedServer(failures=[drop] * 3)
+    dispatcher, [future] = dispatch(server, settings, ['a'], backoff=0.01, max_attempts=3)
+
+    with pytest.raises(smtplib.SMTPServerDisconnected):
+        future.result()
+    assert (dispatcher.stats()['failed'], dispatcher.stats()['retries']) == (1, 2)
+
+
+def test_permanent_error_fails_fast_without_reconnecting(settings):
+    refused = smtplib.SMTPRecipientsRefused({'to@example.com': (550, b'no such user')})
+    server = ScriptedServer(failures=[refused])
+    start = time.monotonic()
+    dispatcher, [bad, good] = dispatch(server, settings, ['bad', 'good'], backoff=5.0)
+
+    with pytest.raises(smtplib.SMTPRecipientsRefused):
+        bad.result()
+    assert good.result() is True
+    assert time.monotonic() - start < 1.0
+    assert len(server.sessions) == 1 and server.quits == 0
+    stats = dispatcher.stats()
+    assert (stats['sent'], stats['failed'], stats['retries'], stats['connects']) == (1, 1, 0, 1)
@@ -0,0 +1,19 @@
+import pytest
+
+OPS_ENDPOINTS = ['/api/metrics', '/api/scoring/stats', '/api/mail/stats', '/api/cache/stats']
+
+
+@pytest.mark.parametrize('path', OPS_ENDPOINTS)
+def test_ops_endpoints_require_jwt(client, auth_headers, path):
+    assert client.get(path).status_code == 401
+    assert client.get(path, headers=auth_headers).status_code == 200
+
+
+@pytest.mark.parametrize('path', OPS_ENDPOINTS)
+def test_metrics_public_opens_ops_endpoints(app, client, path):
+    app.config['METRICS_PUBLIC'] = True
+    assert client.get(path).status_code == 200
+
+
+def test_health_is_public(client):
+    assert client.get('/api/health').status_code == 200
@@ -0,0 +1,55 @@
+import pytest
+from sqlalchemy.exc import IntegrityError
+
+from backend.models import db, OutboxMessage, Task
+from backend.services.outbox import add_outbox_email, outbox_key
+
+
+def test_created_task_email_key_comes_from_the_task(app, client, auth_headers):
+    task_id = client.post('/api/tasks', headers=auth_headers, json={'title': 'write report'}).json['id']
+    with app.app_context():
+        task = db.session.get(Task, task_id)
+        msg = OutboxMessage.query.filter_by(kind='task_created').one()
+        assert msg.idempotency_key == outbox_key('task_created', task.user_id, task.id, task.created_at.isoformat())
+
+
+def test_bulk_import_sends_one_summary(app, client, auth_headers):
+    resp = client.post('/api/tasks/bulk', headers=auth_headers, json={'lines': ['first', 'second']})
+    assert resp.status_code == 201
+    first, last = (r['id'] for r in resp.json['results'])
+    with app.app_context():
+        messages = OutboxMessage.query.filter_by(kind='bulk_import').all()
+        assert len(messages) == 1
+        task = db.session.get(Task, first)
+        assert messages[0].idempotency_key == outbox_key('bulk_import', task.user_id, first, last,
+                                                         task.created_at.isoformat())
+
+
+def test_same_event_cannot_be_enqueued_twice(app):
+    key = outbox_key('task_created', 1, 2, '2100-01-01T00:00:00')
+    with app.app_context():
+        add_outbox_email('task_created', key, 'user@example.com', 'Task Created: x', 'body')
+        db.session.commit()
+        add_outbox_email('task_created', key, 'user@example.com', 'Task Created: x', 'body')
+        with pytest.raises(IntegrityError):
+            db.session.commit()
+        db.session.rollback()
+        assert OutboxMessage.query.filter_by(idempotency_key=key).count() == 1
+
+
+def test_message_id_survives_smtp_flattening():
+    from email import message_from_bytes, policy
+    from backend.services.email import _build_message, message_id_header, smtp_settings
+
+    keys = [outbox_key('task_created', 1, 5, '2100-01-01T09:00:00.123456'),
+            outbox_key('task_created', 1, 6, '2100-01-01T09:00:01.000001'),
+            outbox_key('bulk_import', 1, 7, 9, '2100-01-01T09:00:02')]
+    headers = []
+    for key in keys:
+        msg = _build_message(smtp_settings(), 'Task Created: x', 'user@example.com', 'body', message_id=key)
+        # smtplib.send_message flattens with the SMTP policy
+        parsed = message_from_bytes(msg.as_bytes(policy=policy.SMTP), policy=policy.default)
+        assert parsed['Message-ID'] == message_id_header(key)
+        assert ':' not in parsed['Message-ID']
+        headers.append(parsed['Message-ID'])
+    assert len(set(headers)) == len(keys)
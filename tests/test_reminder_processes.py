@@ -0,0 +1,10 @@
+from backend.bench.reminders import bench_reminder_workers
+
+
+def test_each_due_reminder_is_sent_once_across_processes():
+    # Three app processes, each with its own scheduler, share one SQLite file
+    result = bench_reminder_workers(processes=3, reminders=300, users=30, smtp_latency_ms=1.0,
+                                    start_after=5.0, timeout=60.0)['reminder_workers']
+    assert result['duplicates'] == 0
+    assert result['missing'] == 0
+    assert result['sent'] == 300
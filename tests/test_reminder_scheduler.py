@@ -0,0 +1,299 @@
+from concurrent.futures import Future
+from datetime import datetime, timedelta
+
+import pytest
+
+from backend.models import db, Task, User
+from backend.services import reminder
+from backend.services.reminder import ReminderScheduler, get_reminder_scheduler, send_due_reminders
+
+# Far enough ahead that the app's own scheduler (on the real clock) never touches these tasks
+T0 = datetime(2100, 1, 1, 9, 0)
+
+
+class FakeClock:
+    def __init__(self, now):
+        self.current = now
+
+    def now(self):
+        return self.current
+
+    def wait(self, cond, timeout):
+        pass
+
+
+class RecordingSender:
+    """Stands in for send_due_reminders: records each batch and clears the reminders it sent."""
+
+    def __init__(self, fail=()):
+        self.calls = []
+        self.fail = set(fail)
+
+    def __call__(self, task_ids, now):
+        self.calls.append((sorted(task_ids), now))
+        failed = [i for i in task_ids if i in self.fail]
+        sent = [i for i in task_ids if i not in self.fail]
+        Task.query.filter(Task.id.in_(sent)).update({'reminder_date': None}, synchronize_session=False)
+        db.session.commit()
+        return failed
+
+    @property
+    def sent_ids(self):
+        return [i for ids, _ in self.calls for i in ids]
+
+
+@pytest.fixture
+def clock():
+    return FakeClock(T0)
+
+
+@pytest.fixture
+def sender():
+    return RecordingSender()
+
+
+@pytest.fixture
+def scheduler(app, clock, sender):
+    # Replaces the app's scheduler, so routes notify this one; run_once is driven by hand
+    get_reminder_scheduler(app).stop()
+    scheduler = ReminderScheduler(app, lookahead=timedelta(hours=1), retry_after=timedelta(minutes=5),
+                                  clock=clock, sender=sender)
+    setattr(app, '_reminder_scheduler', scheduler)
+    return scheduler
+
+
+def add_task(app, reminder_date, email='user@example.com', title='reminded'):
+    with app.app_context():
+        uid = User.query.filter_by(email=email).one().id
+        task = Task(user_id=uid, title=title, reminder_date=reminder_date)
+        db.session.add(task)
+        db.session.commit()
+        return task.id
+
+
+def test_loads_only_the_lookahead_window_at_startup(app, auth_headers, scheduler, clock, sender):
+    soon = add_task(app, T0 + timedelta(minutes=10))
+    within = add_task(app, T0 + timedelta(minutes=50))
+    later = add_task(app, T0 + timedelta(hours=2))
+
+    scheduler.run_once()
+    assert scheduler.pending() == 2
+    assert sender.calls == []
+
+    clock.current = T0 + timedelta(minutes=50)
+    scheduler.run_once()
+    assert sender.sent_ids == [soon, within]
+
+    # Reaching the end of the window loads the next one
+    clock.current = T0 + timedelta(hours=1)
+    scheduler.run_once()
+    assert scheduler.pending() == 1
+    clock.current = T0 + timedelta(hours=2)
+    scheduler.run_once()
+    assert sender.sent_ids == [soon, within, later]
+
+
+def test_overdue_reminders_fire_on_startup(app, auth_headers, scheduler, sender):
+    overdue = add_task(app, T0 - timedelta(days=1))
+    scheduler.run_once()
+    assert sender.calls == [([overdue], T0)]
+
+
+def test_fires_exactly_at_due_time(app, auth_headers, scheduler, clock, sender):
+    due = T0 + timedelta(minutes=10)
+    task_id = add_task(app, due)
+
+    clock.current = due - timedelta(seconds=1)
+    scheduler.run_once()
+    assert sender.calls == []
+
+    clock.current = due
+    scheduler.run_once()
+    assert sender.calls == [([task_id], due)]
+
+
+def test_patch_reschedules_reminder(app, client, auth_headers, scheduler, clock, sender):
+    task_id = add_task(app, T0 + timedelta(minutes=10))
+    scheduler.run_once()
+
+    new_time = T0 + timedelta(minutes=20)
+    resp = client.patch(f'/api/tasks/{task_id}', headers=auth_headers,
+                        json={'reminder_date': new_time.isoformat()})
+    assert resp.status_code == 200
+
+    clock.current = T0 + timedelta(minutes=10)
+    scheduler.run_once()
+    assert sender.calls == []
+
+    clock.current = new_time
+    scheduler.run_once()
+    assert sender.calls == [([task_id], new_time)]
+
+
+def test_patch_cancels_reminder(app, client, auth_headers, scheduler, clock, sender):
+    task_id = add_task(app, T0 + timedelta(minutes=10))
+    scheduler.run_once()
+    assert scheduler.pending() == 1
+
+    resp = client.patch(f'/api/tasks/{task_id}', headers=auth_headers, json={'reminder_date': None})
+    assert resp.status_code == 200
+    assert scheduler.pending() == 0
+
+    clock.current = T0 + timedelta(hours=3)
+    scheduler.run_once()
+    assert sender.calls == []
+
+
+def test_delete_cancels_reminder(app, client, auth_headers, scheduler, clock, sender):
+    task_id = add_task(app, T0 + timedelta(minutes=10))
+    scheduler.run_once()
+    client.delete(f'/api/tasks/{task_id}', headers=auth_headers)
+
+    clock.current = T0 + timedelta(minutes=10)
+    scheduler.run_once()
+    assert sender.calls == []
+
+
+def test_reminder_fires_once(app, client, auth_headers, scheduler, clock, sender):
+    due = T0 + timedelta(minutes=10)
+    task_id = add_task(app, due)
+    scheduler.run_once()
+    # Scheduling the same time again (e.g. a PATCH that re-sends it) must not add a second entry
+    scheduler.schedule(task_id, due)
+
+    for minutes in (10, 10, 30, 60, 90, 180):
+        clock.current = T0 + timedelta(minutes=minutes)
+        scheduler.run_once()
+    assert sender.sent_ids == [task_id]
+
+
+def test_failed_send_is_retried_after_delay(app, auth_headers, scheduler, clock):
+    due = T0 + timedelta(minutes=10)
+    task_id = add_task(app, due)
+    sender = RecordingSender(fail=[task_id])
+    scheduler.sender = sender
+
+    clock.current = due
+    scheduler.run_once()
+    assert sender.calls == [([task_id], due)]
+
+    clock.current = due + timedelta(minutes=4)
+    scheduler.run_once()
+    assert len(sender.calls) == 1
+
+    sender.fail.clear()
+    clock.current = due + timedelta(minutes=5)
+    scheduler.run_once()
+    assert sender.calls[1] == ([task_id], due + timedelta(minutes=5))
+    assert scheduler.pending() == 0
+
+
+class RecordingMailer:
+    """Stands in for queue_email: records (to, subject, body) and reports every send as done."""
+
+    def __init__(self):
+        self.sent = []
+
+    def __call__(self, subject, to_email, body, message_id=None):
+        self.sent.append((to_email, subject, body))
+        future = Future()
+        future.set_result(True)
+        return future
+
+    def to(self, email):
+        return [(subject, body) for to, subject, body in self.sent if to == email]
+
+
+@pytest.fixture
+def mailer(monkeypatch):
+    mailer = RecordingMailer()
+    monkeypatch.setattr(reminder, 'queue_email', mailer)
+    return mailer
+
+
+@pytest.fixture
+def digest_scheduler(scheduler, app):
+    # The real sender: claims, digest grouping and clearing the sent reminders
+    scheduler.sender = send_due_reminders
+    app.config['REMINDER_DIGEST_WINDOW_SECONDS'] = 300
+    return scheduler
+
+
+def add_user(app, email, reminder_digest=True):
+    with app.app_context():
+        db.session.add(User(email=email, password_hash='-', reminder_digest=reminder_digest))
+        db.session.commit()
+
+
+def reminders_left(app):
+    with app.app_context():
+        return Task.query.filter(Task.reminder_date.isnot(None)).count()
+
+
+def test_one_digest_per_user(app, auth_headers, digest_scheduler, clock, mailer):
+    add_user(app, 'other@example.com')
+    due = T0 + timedelta(minutes=10)
+    for title, when in (('first', due), ('second', due), ('within window', due + timedelta(minutes=2))):
+        add_task(app, when, title=title)
+    add_task(app, due, email='other@example.com', title='alone')
+
+    digest_scheduler.run_once()
+    clock.current = due
+    digest_scheduler.run_once()
+
+    [(subject, body)] = mailer.to('user@example.com')
+    assert subject == 'Reminder: 3 tasks due'
+    assert all(f'Title: {t}' in body for t in ('first', 'second', 'within window'))
+    assert [subject for subject, _ in mailer.to('other@example.com')] == ['Reminder: alone']
+    assert len(mailer.sent) == 2
+    assert reminders_left(app) == 0
+
+    # The reminder pulled into the digest does not fire again at its own time
+    clock.current = due + timedelta(minutes=2)
+    digest_scheduler.run_once()
+    assert len(mailer.sent) == 2
+
+
+def test_reminders_outside_window_are_sent_separately(app, auth_headers, digest_scheduler, clock, mailer):
+    due = T0 + timedelta(minutes=10)
+    add_task(app, due, title='now')
+    add_task(app, due + timedelta(minutes=6), title='later')
+
+    digest_scheduler.run_once()
+    clock.current = due
+    digest_scheduler.run_once()
+    assert [subject for subject, _ in mailer.to('user@example.com')] == ['Reminder: now']
+    assert reminders_left(app) == 1
+
+    clock.current = due + timedelta(minutes=6)
+    digest_scheduler.run_once()
+    assert [subject for subject, _ in mailer.to('user@example.com')] == ['Reminder: now', 'Reminder: later']
+    assert reminders_left(app) == 0
+
+
+def test_digest_opt_out_sends_one_email_per_task(app, auth_headers, digest_scheduler, clock, mailer):
+    add_user(app, 'nodigest@example.com', reminder_digest=False)
+    due = T0 + timedelta(minutes=10)
+    add_task(app, due, email='nodigest@example.com', title='a')
+    add_task(app, due, email='nodigest@example.com', title='b')
+    add_task(app, due + timedelta(minutes=1), email='nodigest@example.com', title='c')
+
+    digest_scheduler.run_once()
+    clock.current = due
+    digest_scheduler.run_once()
+    assert sorted(subject for subject, _ in mailer.to('nodigest@example.com')) == ['Reminder: a', 'Reminder: b']
+    assert reminders_left(app) == 1
+
+    clock.current = due + timedelta(minutes=1)
+    digest_scheduler.run_once()
+    assert sorted(subject for subject, _ in mailer.to('nodigest@example.com')) == \
+        ['Reminder: a', 'Reminder: b', 'Reminder: c']
+
+
+def test_digest_preference_endpoint(client, auth_headers):
+    assert client.get('/api/auth/preferences', headers=auth_headers).json == {'reminder_digest': True}
+    resp = client.patch('/api/auth/preferences', headers=auth_headers, json={'reminder_digest': False})
+    assert resp.status_code == 200
+    assert client.get('/api/auth/preferences', headers=auth_headers).json == {'reminder_digest': False}
+    assert client.patch('/api/auth/preferences', headers=auth_headers,
+                        json={'reminder_digest': 'no'}).status_code == 400
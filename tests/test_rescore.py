@@ -0,0 +1,34 @@
+import pytest
+
+from backend.bench.stubs import FakeGemini
+from backend.services import ml
+
+
+@pytest.fixture
+def task_ids(client, auth_headers):
+    return [client.post('/api/tasks', headers=auth_headers, json={'title': f'task {i}'}).json['id'] for i in range(3)]
+
+
+@pytest.mark.parametrize('ids', [['x'], '1', [True], [1.5], {'a': 1}])
+def test_rescore_rejects_invalid_ids(client, auth_headers, task_ids, ids):
+    resp = client.post('/api/tasks/rescore', headers=auth_headers, json={'ids': ids})
+    assert resp.status_code == 400
+    assert resp.json == {'message': 'ids must be a list of task ids'}
+
+
+def test_rescore_selected_ids(client, auth_headers, task_ids):
+    assert client.post('/api/tasks/rescore', headers=auth_headers, json={'ids': task_ids[:2]}).json == {'rescored': 2}
+    assert client.post('/api/tasks/rescore', headers=auth_headers, json={'ids': []}).json == {'rescored': 0}
+    assert client.post('/api/tasks/rescore', headers=auth_headers, json={}).json == {'rescored': 3}
+
+
+def test_batch_limits_are_read_at_call_time(monkeypatch):
+    fake = FakeGemini()
+    monkeypatch.setattr(ml, '_generate', fake)
+    monkeypatch.setenv('PRIORITY_SCORER', 'gemini')
+    monkeypatch.setenv('SCORING_BATCH_MAX_ITEMS', '4')
+    tasks = [{'title': f'batch limit test {i}'} for i in range(10)]
+
+    scores, sources = ml.score_many_with_sources(tasks)
+    assert fake.calls == 3
+    assert scores == [55.0] * 10 and sources == [ml.SOURCE_GEMINI] * 10
@@ -0,0 +1,91 @@
+from types import SimpleNamespace
+
+import pytest
+
+from backend.models import db, Task
+from backend.services import response_cache
+from backend.services.scoring import ScoringQueue
+
+
+@pytest.fixture
+def task_id(client, auth_headers):
+    resp = client.post('/api/tasks', headers=auth_headers, json={'title': 'write report'})
+    assert resp.status_code == 201
+    return resp.json['id']
+
+
+def get(client, headers, path, etag=None):
+    if etag is not None:
+        headers = {**headers, 'If-None-Match': etag}
+    return client.get(path, headers=headers)
+
+
+def assert_changed(client, headers, path, etag):
+    """The conditional GET must miss, and the cached body must not be replayed."""
+    resp = get(client, headers, path, etag)
+    assert resp.status_code == 200
+    assert resp.headers['ETag'] != etag
+    return resp
+
+
+@pytest.mark.parametrize('path', ['/api/tasks', '/api/stats', '/api/tasks/search?q=report'])
+def test_unchanged_data_revalidates_with_304(client, auth_headers, task_id, path, monkeypatch):
+    # Stats ETags also roll over each minute; hold the clock still
+    monkeypatch.setattr(response_cache, 'time', SimpleNamespace(time=lambda: 1_000_000.0))
+    first = get(client, auth_headers, path)
+    assert first.status_code == 200
+    etag = first.headers['ETag']
+
+    resp = get(client, auth_headers, path, etag)
+    assert resp.status_code == 304
+    assert resp.data == b''
+    assert resp.headers['ETag'] == etag
+
+
+def test_task_patch_changes_etag(client, auth_headers, task_id):
+    etag = get(client, auth_headers, '/api/tasks').headers['ETag']
+    assert client.patch(f'/api/tasks/{task_id}', headers=auth_headers,
+                        json={'title': 'write final report'}).status_code == 200
+
+    resp = assert_changed(client, auth_headers, '/api/tasks', etag)
+    assert [t['title'] for t in resp.json] == ['write final report']
+
+
+def test_subtask_create_changes_etag(client, auth_headers, task_id):
+    etag = get(client, auth_headers, '/api/tasks').headers['ETag']
+    assert client.post(f'/api/tasks/{task_id}/subtasks', headers=auth_headers,
+                       json={'title': 'outline'}).status_code == 201
+
+    resp = assert_changed(client, auth_headers, '/api/tasks', etag)
+    assert [s['title'] for s in resp.json[0]['subtasks']] == ['outline']
+
+
+def test_background_score_write_back_changes_etag(app, client, auth_headers, task_id):
+    etag = get(client, auth_headers, '/api/tasks').headers['ETag']
+    q = ScoringQueue(app, workers=1, scorer=lambda data: (99.5, 'gemini'))
+    q.start()
+    assert q.submit(task_id, {'title': 'write report'})
+    q.join()
+    with app.app_context():
+        assert db.session.get(Task, task_id).priority_score == 99.5
+
+    resp = assert_changed(client, auth_headers, '/api/tasks', etag)
+    assert resp.json[0]['priority_score'] == 99.5
+
+
+def test_bulk_import_changes_etag(client, auth_headers, task_id):
+    etags = {path: get(client, auth_headers, path).headers['ETag'] for path in ('/api/tasks', '/api/stats')}
+    resp = client.post('/api/tasks/bulk', headers=auth_headers, json={'lines': ['call mom', 'pay rent']})
+    assert resp.status_code == 201
+
+    assert len(assert_changed(client, auth_headers, '/api/tasks', etags['/api/tasks']).json) == 3
+    assert_changed(client, auth_headers, '/api/stats', etags['/api/stats'])
+
+
+def test_other_users_writes_keep_etag(client, auth_headers, task_id):
+    etag = get(client, auth_headers, '/api/tasks').headers['ETag']
+    client.post('/api/auth/register', json={'email': 'other@example.com', 'password': 'secret'})
+    token = client.post('/api/auth/login', json={'email': 'other@example.com', 'password': 'secret'}).json['access_token']
+    client.post('/api/tasks', headers={'Authorization': f'Bearer {token}'}, json={'title': 'not yours'})
+
+    assert get(client, auth_headers, '/api/tasks', etag).status_code == 304
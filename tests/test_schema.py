@@ -0,0 +1,32 @@
+from sqlalchemy import create_engine, inspect, text
+from sqlalchemy.dialects import postgresql, sqlite
+
+from backend.models import User
+from backend.schema import add_column_ddl, upgrade_schema
+
+
+def test_add_column_quotes_reserved_table_names():
+    column = User.__table__.c.reminder_digest
+    assert add_column_ddl(postgresql.dialect(), User.__table__, column) == \
+        'ALTER TABLE "user" ADD COLUMN reminder_digest BOOLEAN DEFAULT \'1\''
+    assert add_column_ddl(sqlite.dialect(), User.__table__, column).startswith(
+        'ALTER TABLE user ADD COLUMN reminder_digest BOOLEAN')
+
+
+def test_upgrade_adds_columns_to_old_user_table(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'old.db'}")
+    with engine.begin() as conn:
+        # The user table as the original release created it
+        conn.execute(text(
+            'CREATE TABLE "user" (id INTEGER PRIMARY KEY, email VARCHAR(120) NOT NULL UNIQUE, '
+            'password_hash VARCHAR(255) NOT NULL, created_at DATETIME)'
+        ))
+        conn.execute(text("INSERT INTO \"user\" (email, password_hash) VALUES ('old@example.com', '-')"))
+
+    changes = upgrade_schema(engine)
+    assert {'user.data_version', 'user.reminder_digest'} <= set(changes['columns'])
+    assert {c['name'] for c in inspect(engine).get_columns('user')} >= {'data_version', 'reminder_digest'}
+    with engine.connect() as conn:
+        assert conn.execute(text('SELECT reminder_digest FROM "user"')).scalar() == 1
+    assert upgrade_schema(engine)['columns'] == []
+    engine.dispose()
@@ -0,0 +1,142 @@
+import threading
+
+import pytest
+
+from backend.models import db, Task, User
+from backend.services.scoring import ScoringQueue
+
+
+class StubScorer:
+    """Stands in for the model: returns a score derived from the title and records each call."""
+
+    def __init__(self, fail=False):
+        self.calls = []
+        self.fail = fail
+        self.entered = threading.Event()
+        self.release = threading.Event()
+        self.release.set()
+
+    def __call__(self, task_data):
+        self.entered.set()
+        self.release.wait(5)
+        self.calls.append(task_data['title'])
+        if self.fail:
+            raise RuntimeError('model unavailable')
+        return float(len(task_data['title'])), 'gemini'
+
+
+@pytest.fixture
+def task_ids(app, auth_headers):
+    with app.app_context():
+        uid = User.query.filter_by(email='user@example.com').one().id
+        tasks = [Task(user_id=uid, title=f'task {i}', priority_score=1.0, score_source='local') for i in range(3)]
+        db.session.add_all(tasks)
+        db.session.commit()
+        return [t.id for t in tasks]
+
+
+def stored(app, task_id):
+    with app.app_context():
+        task = db.session.get(Task, task_id)
+        return task.priority_score, task.score_source
+
+
+def test_worker_writes_score_back(app, task_ids):
+    scorer = StubScorer()
+    q = ScoringQueue(app, workers=2, scorer=scorer)
+    q.start()
+    assert q.submit(task_ids[0], {'title': 'a title of 20 chars'})
+    q.join()
+    assert stored(app, task_ids[0]) == (19.0, 'gemini')
+    assert q.stats()['scored'] == 1
+
+
+def test_newer_edit_makes_queued_job_stale(app, task_ids):
+    scorer = StubScorer()
+    q = ScoringQueue(app, workers=1, scorer=scorer)
+    q.submit(task_ids[0], {'title': 'old'})
+    q.submit(task_ids[0], {'title': 'newer'})
+    q.start()
+    q.join()
+    assert scorer.calls == ['newer']
+    assert stored(app, task_ids[0]) == (5.0, 'gemini')
+    assert q.stats()['stale'] == 1
+
+
+def test_edit_while_scoring_discards_the_old_answer(app, task_ids):
+    scorer = StubScorer()
+    scorer.release.clear()
+    q = ScoringQueue(app, workers=1, scorer=scorer)
+    q.start()
+    q.submit(task_ids[0], {'title': 'old'})
+    assert scorer.entered.wait(5)
+    # The worker is now blocked inside the model call with the old data
+    q.submit(task_ids[0], {'title': 'newest'})
+    scorer.release.set()
+    q.join()
+    assert scorer.calls == ['old', 'newest']
+    assert stored(app, task_ids[0]) == (6.0, 'gemini')
+
+
+def test_full_queue_drops_without_losing_queued_job(app, task_ids):
+    scorer = StubScorer()
+    q = ScoringQueue(app, workers=1, maxsize=1, scorer=scorer)
+    assert q.submit(task_ids[0], {'title': 'queued'})
+    assert not q.submit(task_ids[1], {'title': 'dropped'})
+    # Resubmitting the queued task while full must not turn its queued job stale
+    assert not q.submit(task_ids[0], {'title': 'queued again'})
+    q.start()
+    q.join()
+
+    assert scorer.calls == ['queued']
+    assert stored(app, task_ids[0]) == (6.0, 'gemini')
+    assert stored(app, task_ids[1]) == (1.0, 'local')
+    stats = q.stats()
+    assert (stats['enqueued'], stats['dropped'], stats['stale'], stats['scored']) == (1, 2, 0, 1)
+
+
+def test_scorer_failure_keeps_provisional_score(app, task_ids):
+    q = ScoringQueue(app, workers=1, scorer=StubScorer(fail=True))
+    q.start()
+    q.submit(task_ids[0], {'title': 'boom'})
+    q.join()
+    assert stored(app, task_ids[0]) == (1.0, 'local')
+    assert q.stats()['failed'] == 1
+
+
+def test_settings_set_after_import_reach_app_config(tmp_path, monkeypatch):
+    # As with backend/.env, which create_app loads after backend.config was imported
+    from backend.app import create_app
+    from backend.services.reminder import get_reminder_scheduler
+    from backend.services.scoring import get_scoring_queue
+
+    monkeypatch.setenv('DATABASE_URL', f"sqlite:///{tmp_path / 'config.db'}")
+    monkeypatch.setenv('SCORING_WORKERS', '7')
+    monkeypatch.setenv('SCORING_QUEUE_SIZE', '123')
+    app = create_app()
+    try:
+        assert app.config['SCORING_WORKERS'] == 7
+        assert get_scoring_queue(app).stats()['queue_capacity'] == 123
+    finally:
+        get_reminder_scheduler(app).stop()
+        with app.app_context():
+            db.engine.dispose()
+
+
+def test_submit_many_scores_each_chunk_with_one_batch_call(app, task_ids):
+    batches = []
+
+    def batch_scorer(tasks):
+        batches.append([t['title'] for t in tasks])
+        return [float(len(t['title'])) for t in tasks], ['gemini'] * len(tasks)
+
+    scorer = StubScorer()
+    q = ScoringQueue(app, workers=1, scorer=scorer, batch_scorer=batch_scorer, batch_size=2)
+    assert q.submit_many([(task_id, {'title': 'x' * (i + 1)}) for i, task_id in enumerate(task_ids)])
+    q.start()
+    q.join()
+
+    assert batches == [['x', 'xx']]
+    assert scorer.calls == ['xxx']
+    assert [stored(app, task_id) for task_id in task_ids] == [(1.0, 'gemini'), (2.0, 'gemini'), (3.0, 'gemini')]
+    assert q.stats()['scored'] == 3
@@ -0,0 +1,108 @@
+import pytest
+
+from backend.services import search
+
+
+def add_task(client, headers, title, description=None, subtasks=()):
+    resp = client.post('/api/tasks', headers=headers, json={'title': title, 'description': description})
+    assert resp.status_code == 201
+    task_id = resp.json['id']
+    for sub in subtasks:
+        add_subtask(client, headers, task_id, sub)
+    return task_id
+
+
+def add_subtask(client, headers, task_id, title):
+    resp = client.post(f'/api/tasks/{task_id}/subtasks', headers=headers, json={'title': title})
+    assert resp.status_code == 201
+    return resp.json['id']
+
+
+def find(client, headers, q, **params):
+    resp = client.get('/api/tasks/search', headers=headers, query_string={'q': q, **params})
+    assert resp.status_code == 200
+    return resp
+
+
+def found_ids(client, headers, q):
+    return [r['id'] for r in find(client, headers, q).json]
+
+
+@pytest.fixture
+def like_only(monkeypatch):
+    # As on a database without FTS5
+    monkeypatch.setattr(search, 'search_available', lambda: False)
+
+
+def test_title_match_ranks_above_description_and_subtasks(client, auth_headers):
+    in_subtask = add_task(client, auth_headers, 'weekly chores', subtasks=['invoice the client'])
+    in_description = add_task(client, auth_headers, 'finance', 'send the invoice today')
+    in_title = add_task(client, auth_headers, 'invoice for march')
+    # bm25 gives terms found in most rows next to no weight; keep 'invoice' rare
+    for i in range(10):
+        add_task(client, auth_headers, f'unrelated {i}')
+
+    results = find(client, auth_headers, 'invoice').json
+    assert [r['id'] for r in results] == [in_title, in_description, in_subtask]
+    assert results[0]['rank'] > results[1]['rank'] > results[2]['rank']
+
+
+def test_highlights_are_escaped_and_marked(client, auth_headers):
+    add_task(client, auth_headers, '<b>budget</b> & plan', 'the budget <script>')
+
+    [result] = find(client, auth_headers, 'budget').json
+    assert result['highlights']['title'] == '&lt;b&gt;<mark>budget</mark>&lt;/b&gt; &amp; plan'
+    assert result['highlights']['description'] == 'the <mark>budget</mark> &lt;script&gt;'
+
+
+def test_cursor_pages_through_all_results(client, auth_headers):
+    ids = {add_task(client, auth_headers, f'report {i}') for i in range(5)}
+
+    seen, cursor, pages = [], None, 0
+    while True:
+        params = {'limit': 2, **({'cursor': cursor} if cursor else {})}
+        resp = find(client, auth_headers, 'report', **params)
+        seen += [r['id'] for r in resp.json]
+        pages += 1
+        cursor = resp.headers.get('X-Next-Cursor')
+        if not cursor:
+            break
+    assert pages == 3
+    assert sorted(seen) == sorted(ids)
+    assert client.get('/api/tasks/search', headers=auth_headers,
+                      query_string={'q': 'report', 'cursor': '!'}).status_code == 400
+
+
+def test_index_follows_subtask_insert_and_delete(client, auth_headers):
+    task_id = add_task(client, auth_headers, 'groceries')
+    assert found_ids(client, auth_headers, 'avocado') == []
+
+    sub_id = add_subtask(client, auth_headers, task_id, 'buy avocados')
+    assert found_ids(client, auth_headers, 'avocado') == [task_id]
+
+    assert client.delete(f'/api/subtasks/{sub_id}', headers=auth_headers).status_code == 200
+    assert found_ids(client, auth_headers, 'avocado') == []
+    assert found_ids(client, auth_headers, 'groceries') == [task_id]
+
+
+def test_other_users_tasks_are_not_found(client, auth_headers):
+    add_task(client, auth_headers, 'secret project')
+    client.post('/api/auth/register', json={'email': 'other@example.com', 'password': 'secret'})
+    token = client.post('/api/auth/login', json={'email': 'other@example.com', 'password': 'secret'}).json['access_token']
+    assert found_ids(client, {'Authorization': f'Bearer {token}'}, 'secret') == []
+
+
+def test_like_fallback_matches_subtask_titles(client, auth_headers, like_only):
+    task_id = add_task(client, auth_headers, 'groceries', subtasks=['buy avocados'])
+    add_task(client, auth_headers, 'cleaning')
+
+    results = find(client, auth_headers, 'avocado').json
+    assert [r['id'] for r in results] == [task_id]
+    assert results[0]['rank'] is None and results[0]['highlights'] is None
+
+
+def test_like_fallback_treats_underscore_literally(client, auth_headers, like_only):
+    snake = add_task(client, auth_headers, 'rename user_id column')
+    add_task(client, auth_headers, 'userXid is not a match')
+
+    assert found_ids(client, auth_headers, 'user_id') == [snake]
@@ -0,0 +1,79 @@
+import pytest
+from sqlalchemy import insert
+
+from backend.app import create_app
+from backend.models import db, Task, TaskCounter, User
+from backend.services.reminder import get_reminder_scheduler
+from backend.services.stats import compute_stats, counter_stats, rebuild_counters, verify_counters
+
+
+@pytest.fixture
+def app_env():
+    return {'STATS_COUNTERS': 'true'}
+
+
+def uid_of(app):
+    with app.app_context():
+        return User.query.filter_by(email='user@example.com').one().id
+
+
+def assert_counters_match(app):
+    with app.app_context():
+        assert verify_counters() == {}
+        uid = uid_of(app)
+        assert counter_stats(uid) == compute_stats(uid)
+
+
+def test_flush_hooks_keep_counters_exact(app, client, auth_headers):
+    ids = [client.post('/api/tasks', headers=auth_headers,
+                       json={'title': f'task {i}', 'category': 'work', 'priority': 'low'}).json['id']
+           for i in range(4)]
+    client.post('/api/tasks', headers=auth_headers, json={'title': 'defaults only'})
+    assert_counters_match(app)
+
+    client.patch(f'/api/tasks/{ids[0]}', headers=auth_headers, json={'status': 'completed'})
+    client.patch(f'/api/tasks/{ids[1]}', headers=auth_headers, json={'category': 'study'})
+    client.patch(f'/api/tasks/{ids[2]}', headers=auth_headers, json={'priority': 'high', 'category': None})
+    assert_counters_match(app)
+
+    client.delete(f'/api/tasks/{ids[3]}', headers=auth_headers)
+    assert_counters_match(app)
+
+    resp = client.post('/api/tasks/bulk', headers=auth_headers, json={'lines': ['read a book', 'urgent: pay rent']})
+    assert resp.status_code == 201
+    assert_counters_match(app)
+
+    stats = client.get('/api/stats', headers=auth_headers).json
+    assert stats['total'] == 6
+    assert stats['completed'] == 1
+
+
+def test_counters_are_built_on_first_read(app, client, auth_headers):
+    client.post('/api/tasks', headers=auth_headers, json={'title': 'x'})
+    with app.app_context():
+        TaskCounter.query.delete()
+        db.session.commit()
+    assert client.get('/api/stats', headers=auth_headers).json['total'] == 1
+    assert_counters_match(app)
+
+
+def test_startup_does_not_rebuild_counters(app, client, auth_headers, monkeypatch):
+    client.post('/api/tasks', headers=auth_headers, json={'title': 'counted'})
+    uid = uid_of(app)
+    with app.app_context():
+        # Bypasses the flush hooks, as writes made with STATS_COUNTERS off would
+        db.session.execute(insert(Task).values(user_id=uid, title='not counted', status='pending',
+                                               priority='medium'))
+        db.session.commit()
+        drift = verify_counters()
+        assert drift
+
+    second = create_app()
+    try:
+        with second.app_context():
+            assert verify_counters() == drift
+            rebuild_counters()
+            db.session.commit()
+            assert verify_counters() == {}
+    finally:
+        get_reminder_scheduler(second).stop()